@@ -7,9 +7,11 @@ import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel, Label, Entry, Button
 from tkinter.font import Font
 import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime
 import base64
 
+from login_log import LoginLog, LOGIN_LOG_DIR
+
 # from main_app import MainApp
 
 # Настройка логирования
@@ -271,39 +273,28 @@ class IntroWindow(tk.Toplevel):
 
         self.config = self.load_config()
         self.parent.config = self.config  # Передаём конфигурацию в MainApp
+        # Попытки входа — в отдельный журнал с дозаписью, config.json при входе не переписывается
+        self.login_log = LoginLog(self.config.get("login_log_dir", LOGIN_LOG_DIR))
+        attempts = self.config.pop("login_attempts", None)
+        if attempts:
+            self.login_log.import_attempts(attempts)
+            self.save_config()
+        self.clean_login_attempts()
         
         self.focus_set()
         self.password_entry.focus_set()
 
     def load_config(self):
-        try:
-            with open("config.json", "r", encoding="utf-8") as f:
-                config = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.info(f"[{time.strftime('%H:%M:%S')}] config.json not found or corrupted: {str(e)}. Creating default config.")
-            config = {"cams": [], "groups": [], "period": 1, "admin_password": None, "user_password": None, "login_attempts": [], "user_password_timestamp": None}
-        return config
+        default = {"cams": [], "groups": [], "period": 1, "admin_password": None, "user_password": None, "user_password_timestamp": None}
+        return self.parent.config_store.load(default)
 
     def save_config(self):
-        try:
-            with open("config.json", "w", encoding="utf-8") as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
-            logger.info(f"[{time.strftime('%H:%M:%S')}] Config saved to config.json.")
-        except Exception as e:
-            logger.error(f"[{time.strftime('%H:%M:%S')}] Error saving config: {str(e)}")
-            messagebox.showerror("Ошибка", "Не удалось сохранить конфигурацию")
+        self.parent.config_store.save(self.config)
 
     def clean_login_attempts(self):
-        """Удаление записей о попытках входа старше 7 дней"""
-        cutoff = datetime.now() - timedelta(days=7)
-        initial_count = len(self.config.get("login_attempts", []))
-        self.config["login_attempts"] = [
-            attempt for attempt in self.config.get("login_attempts", [])
-            if datetime.fromisoformat(attempt["timestamp"]) > cutoff
-        ]
-        if len(self.config["login_attempts"]) < initial_count:
-            logger.info(f"[{time.strftime('%H:%M:%S')}] Removed {initial_count - len(self.config['login_attempts'])} old login attempts.")
-        self.save_config()
+        """Удаление записей о попытках входа старше 7 дней (целыми файлами журнала):
+        при открытии окна входа, дальше — при первой записи новых суток"""
+        self.login_log.prune()
 
     def hash_password(self, password):
         """Хеширование пароля с использованием SHA-256"""
@@ -323,19 +314,13 @@ class IntroWindow(tk.Toplevel):
         logger = logging.getLogger(__name__)  # Добавлено для явного логирования
         if self.login_attempts_count >= 3:
             messagebox.showerror("Ошибка", "Превышено количество попыток входа (3).")
-            self.config.setdefault("login_attempts", []).append({
-                "user": self.login_combobox.get(),
-                "timestamp": datetime.now().isoformat(),
-                "success": False
-            })
-            self.save_config()
+            self.login_log.append(self.login_combobox.get(), False)
             self.destroy()
             return
 
         login = self.login_combobox.get()
         password = self.password_entry.get()
         now = datetime.now().isoformat()
-        self.clean_login_attempts()
         self.login_attempts_count += 1
 
         # Проверка пароля
@@ -344,8 +329,7 @@ class IntroWindow(tk.Toplevel):
             if user_password_hash is None:
                 messagebox.showerror("Ошибка", "Пароль пользователя не установлен. Обратитесь к администратору.")
                 if self.login_attempts_count >= 3:
-                    self.config.setdefault("login_attempts", []).append({"user": login, "timestamp": now, "success": False})
-                    self.save_config()
+                    self.login_log.append(login, False, now)
                 self.on_cancel()
                 return
 
@@ -365,8 +349,7 @@ class IntroWindow(tk.Toplevel):
                         logger.warning(f"[{time.strftime('%H:%M:%S')}] User password expired or invalid timestamp: {str(e)}")
                         messagebox.showerror("Ошибка", "Пароль пользователя просрочен, обратитесь к администратору.")
                         if self.login_attempts_count >= 3:
-                            self.config.setdefault("login_attempts", []).append({"user": login, "timestamp": now, "success": False})
-                            self.save_config()
+                            self.login_log.append(login, False, now)
                         return
 
                 logger.info(f"[{time.strftime('%H:%M:%S')}] Successful user login")
@@ -386,8 +369,7 @@ class IntroWindow(tk.Toplevel):
             else:
                 messagebox.showerror("Ошибка", f"Неверный пароль. Осталось попыток: {3 - self.login_attempts_count}")
                 if self.login_attempts_count >= 3:
-                    self.config.setdefault("login_attempts", []).append({"user": login, "timestamp": now, "success": False})
-                    self.save_config()
+                    self.login_log.append(login, False, now)
                     self.destroy()
 
         elif login == "Администратор":
@@ -417,8 +399,10 @@ class IntroWindow(tk.Toplevel):
                         logger.info(f"[{time.strftime('%H:%M:%S')}] Passwords changed successfully, proceeding to show app")
                     else:
                         logger.info(f"[{time.strftime('%H:%M:%S')}] Password change cancelled, closing application")
-                        self.parent.destroy()  # Если отмена, закрываем приложение
-                        sys.exit(0)
+                        # Если отмена, закрываем приложение: MainApp сворачивает упреждающий
+                        # запуск (браузеры закрываются) и завершается сам
+                        self.destroy()
+                        return
                 
                 # Показываем приложение только после обработки дефолтного пароля (если был)
                 if not is_default or change_window.success:
@@ -432,12 +416,10 @@ class IntroWindow(tk.Toplevel):
             else:
                 messagebox.showerror("Ошибка", f"Неверный пароль. Осталось попыток: {3 - self.login_attempts_count}")
                 if self.login_attempts_count >= 3:
-                    self.config.setdefault("login_attempts", []).append({"user": login, "timestamp": now, "success": False})
-                    self.save_config()
+                    self.login_log.append(login, False, now)
                     self.destroy()
 
     def on_cancel(self):
-        """Завершение приложения при нажатии на Отмена"""
-        super().destroy()  # Вызываем стандартное закрытие Toplevel
-        self.parent.destroy()  # Закрываем основное окно
-        sys.exit(0)  # Гарантируем завершение
\ No newline at end of file
+        """Завершение приложения при нажатии на Отмена: закрывается окно входа, MainApp
+        дописывает конфигурацию, закрывает упреждающе запущенные браузеры и завершается"""
+        self.destroy()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import bisect
+import logging
+import time
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+GROUP_ITEM = "group"
+CAM_ITEM = "cam"
+SEARCH_LIMIT = 50  # найденных камер в списке поиска
+
+
+class CameraRegistry:
+    """Индексы над списками камер и групп конфигурации: камера по ссылке и названию,
+    группа по имени и позиции, группы, где используется ссылка, и соответствие
+    элементов дерева объектам модели. Списки остаются общими с конфигурацией;
+    после изменения состава камер или групп вызывается reindex()"""
+
+    def __init__(self, cams, groups):
+        self.cams = cams
+        self.groups = groups
+        self.items = {}          # iid дерева -> (вид, объект, группа)
+        self.group_items = {}    # id(группы) -> iid
+        self.cam_items = {}      # (id(группы), ссылка) -> iid
+        self.item_keys = {}      # iid камеры -> ключ cam_items (ссылка камеры может измениться)
+        self.rendered = {}       # iid -> выведенные текст и значок (дерево меняется только при отличии)
+        self.loaded = set()      # id(группы), чьи камеры вставлены в дерево
+        self.reindex()
+
+    def reindex(self):
+        self.by_link = {}
+        self.by_street = {}
+        for cam in self.cams:
+            self.by_link.setdefault(cam["link"], cam)
+            self.by_street.setdefault(cam["street"], []).append(cam)
+        self.by_name = {}
+        self.link_groups = {}
+        for group in self.groups:
+            self.by_name.setdefault(group.get("name"), group)
+            for link in group.get("grid", []):
+                if link:
+                    self.link_groups.setdefault(link, []).append(group)
+        self.reindex_positions()
+        # Поисковый индекс строится при первом поиске после изменения списка камер
+        self.search_corpus = None
+
+    def reindex_positions(self):
+        # Порядок групп меняется перемещениями в дереве, состав при этом тот же
+        self.positions = {id(group): i for i, group in enumerate(self.groups)}
+        self.current = next((g for g in self.groups if g.get("current", False)), None)
+
+    def cam(self, link):
+        return self.by_link.get(link)
+
+    def cams_by_street(self, street):
+        return self.by_street.get(street, [])
+
+    def group(self, name):
+        return self.by_name.get(name)
+
+    def group_index(self, group):
+        return self.positions.get(id(group), -1)
+
+    def groups_with_link(self, link):
+        return self.link_groups.get(link, [])
+
+    def current_group(self):
+        return self.current
+
+    def set_current(self, group):
+        for g in self.groups:
+            g["current"] = g is group
+        self.current = group
+
+    def grid_cams(self, group):
+        """Камеры сетки группы по позициям (None — пустая ячейка или неизвестная ссылка)"""
+        grid = group.get("grid", []) if group else []
+        return [self.cam(grid[i]) if i < len(grid) and grid[i] else None for i in range(9)]
+
+    # Поиск
+
+    def _build_search(self):
+        started = time.time()
+        texts = [f"{cam['street']}\t{cam['link']}".lower() for cam in self.cams]
+        # Подстрока ищется одним проходом str.find по общей строке, номер камеры — по смещению
+        self.search_offsets = []
+        offset = 0
+        for text in texts:
+            self.search_offsets.append(offset)
+            offset += len(text) + 1
+        self.search_corpus = "\n".join(texts)
+        # Начала слов названия — отсортированный список для поиска по префиксу
+        self.search_words = sorted(
+            (word, i) for i, cam in enumerate(self.cams) for word in cam["street"].lower().split()
+        )
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Search index built for {len(self.cams)} cameras in {time.time() - started:.3f} s")
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Камеры по подстроке названия или ссылки; сначала совпадения с началом слова названия"""
+        query = query.strip().lower()
+        if not query or "\n" in query:
+            return []
+        if self.search_corpus is None:
+            self._build_search()
+        found = []
+        seen = set()
+        start = bisect.bisect_left(self.search_words, (query,))
+        for k in range(start, len(self.search_words)):
+            word, i = self.search_words[k]
+            if len(found) >= limit or not word.startswith(query):
+                break
+            if i not in seen:
+                seen.add(i)
+                found.append(self.cams[i])
+        position = self.search_corpus.find(query)
+        while position != -1 and len(found) < limit:
+            i = bisect.bisect_right(self.search_offsets, position) - 1
+            if i not in seen:
+                seen.add(i)
+                found.append(self.cams[i])
+            # Следующее совпадение ищется с начала текста следующей камеры
+            if i + 1 >= len(self.search_offsets):
+                break
+            position = self.search_corpus.find(query, self.search_offsets[i + 1])
+        return found
+
+    # Элементы дерева
+
+    def clear_items(self):
+        self.items.clear()
+        self.group_items.clear()
+        self.cam_items.clear()
+        self.item_keys.clear()
+        self.rendered.clear()
+        self.loaded.clear()
+
+    def bind_group_item(self, iid, group):
+        self.items[iid] = (GROUP_ITEM, group, group)
+        self.group_items[id(group)] = iid
+
+    def bind_cam_item(self, iid, cam, group):
+        self.items[iid] = (CAM_ITEM, cam, group)
+        self.item_keys[iid] = (id(group), cam["link"])
+        self.cam_items[self.item_keys[iid]] = iid
+
+    def unbind_item(self, iid):
+        kind, _, group = self.items.pop(iid, (None, None, None))
+        if kind == GROUP_ITEM:
+            self.group_items.pop(id(group), None)
+            self.loaded.discard(id(group))
+        key = self.item_keys.pop(iid, None)
+        if key is not None and self.cam_items.get(key) == iid:
+            del self.cam_items[key]
+        self.rendered.pop(iid, None)
+
+    def is_loaded(self, group):
+        return id(group) in self.loaded
+
+    def item(self, iid):
+        """(вид, объект, группа) элемента дерева или (None, None, None)"""
+        return self.items.get(iid, (None, None, None))
+
+    def group_item(self, group):
+        return self.group_items.get(id(group)) if group else None
+
+    def cam_item(self, group, link):
+        return self.cam_items.get((id(group), link)) if group else None
@@ -0,0 +1,499 @@
+import os
+import io
+import logging
+import time
+from PIL import Image
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import StaleElementReferenceException, NoSuchElementException
+
+from http_source import HttpSourceManager, cam_source, SOURCE_HTTP, SOURCE_UFANET
+from stream_source import (
+    StreamSourceManager, discover_stream_url, CAPTURE_SCREENSHOT, CAPTURE_STREAM,
+    STREAM_RETRY_INTERVAL, STREAM_RETRY_TIMEOUT
+)
+from composite_capture import CompositeCapture, CAPTURE_COMPOSITE
+from cdp_client import CdpTransport, TRANSPORT_SELENIUM, TRANSPORT_CDP
+from replay_buffer import ReplayBuffer
+from recorder import ArchiveRecorder
+from motion import MotionMonitor, MOTION_LOG, setup_motion_log
+from scheduler import CaptureScheduler
+from frame_server import FrameHub, FrameServer
+from instance_lock import ENGINE_HOST, frame_server_enabled
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+GRID_SIZE = 9
+
+# Результат захвата ячейки за цикл
+FRAME_NEW = "frame"              # новый кадр
+FRAME_NOCAM = "nocam"            # камера не назначена или страница пуста
+FRAME_NOCONNECT = "noconnect"    # нет связи с камерой
+FRAME_UNCHANGED = "unchanged"    # кадр в этом цикле не снимался, остаётся прежний
+
+
+def grid_cams(config):
+    """Камеры текущей группы по ячейкам сетки (None — пустая ячейка)"""
+    groups = config.get("groups", [])
+    current_group = next((g for g in groups if g.get("current", False)), groups[0] if groups else {})
+    current_grid = current_group.get("grid", [None] * GRID_SIZE)
+    cams_by_link = {cam["link"]: cam for cam in config.get("cams", [])}
+    return [cams_by_link.get(current_grid[i]) if i < len(current_grid) else None for i in range(GRID_SIZE)]
+
+
+def display_tile(pil_image, size):
+    """Кадр, готовый к выводу в ячейку: растяжение до размера ячейки с искажением"""
+    if pil_image.size == tuple(size):
+        return pil_image
+    return pil_image.resize(tuple(size), Image.LANCZOS)
+
+
+class CaptureEngine:
+    """Драйверы, источники кадров, буферы и цикл захвата без Tk.
+    Окно программы и фоновый режим (--headless) — потребители результатов capture()"""
+
+    def __init__(self, config, period_ms=None, cams_provider=None, publish_frames=True, listen_socket=None, serve=True):
+        self.config = config
+        self.cams_provider = cams_provider
+        # False — процесс-обработчик: архив и HTTP-публикация выполняются в процессе окна
+        self.publish_frames = publish_frames
+        self.period = period_ms or config.get("period", 1) * 1000
+        # Режим захвата: скриншоты страницы плеера, прямое декодирование потока или страница-сетка
+        self.capture_mode = config.get("capture_mode", CAPTURE_SCREENSHOT)
+        if self.capture_mode not in [CAPTURE_SCREENSHOT, CAPTURE_STREAM, CAPTURE_COMPOSITE]:
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Invalid capture_mode '{self.capture_mode}' in config. Using screenshot mode.")
+            self.capture_mode = CAPTURE_SCREENSHOT
+        # Транспорт захвата: HTTP chromedriver или прямой websocket DevTools
+        self.transport = config.get("transport", TRANSPORT_SELENIUM)
+        if self.transport not in [TRANSPORT_SELENIUM, TRANSPORT_CDP]:
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Invalid transport '{self.transport}' in config. Using selenium.")
+            self.transport = TRANSPORT_SELENIUM
+        self.cams = [None] * GRID_SIZE  # камера каждой ячейки сетки
+        self.last_frames = {}  # ячейка -> (JPEG bytes, время) последнего нового кадра
+
+        # Буфер последних кадров по камерам для перемотки
+        self.replay = ReplayBuffer(
+            max_seconds=config.get("replay_seconds", 60),
+            max_bytes=config.get("replay_memory_mb", 64) * 1024 * 1024
+        )
+        # Детекция движения по уменьшенным серым кадрам; журнал событий — в процессе окна
+        self.motion = MotionMonitor()
+        if publish_frames:
+            setup_motion_log(config.get("motion_log", MOTION_LOG))
+        # Запись на диск камер с "record": true в сегменты с индексом
+        self.recorder = ArchiveRecorder(
+            root=config.get("record_path", "archive"),
+            segment_seconds=config.get("record_segment_minutes", 10) * 60,
+            segment_bytes=config.get("record_segment_mb", 64) * 1024 * 1024,
+            retention_seconds=config.get("record_retention_days", 7) * 24 * 3600,
+            retention_bytes=config.get("record_retention_gb", 20) * 1024 ** 3
+        ) if publish_frames else None
+        # Счётчики для /metrics и журнала фонового режима
+        self.metrics = {"started": time.time(), "cycles": 0, "frames": 0, "errors": 0, "last_cycle_seconds": 0.0}
+        # Локальная публикация кадров по HTTP: на сокете блокировки движка (к нему подключаются
+        # повторные запуски программы) или на порту "frame_server_port"; "frame_server": false — выключено
+        self.frame_hub = FrameHub()
+        self.frame_server = None
+        # Прерывание загрузки сетки (отмена упреждающего запуска)
+        self.load_aborted = False
+        if serve:
+            self.start_frame_server(listen_socket)
+
+        self._init_sources()
+
+    def start_frame_server(self, listen_socket=None):
+        """Запуск HTTP-сервера кадров; при упреждающем запуске — только после входа"""
+        if self.frame_server or not self.publish_frames or not frame_server_enabled(self.config):
+            return
+        if not (listen_socket or self.config.get("frame_server_port", 0)):
+            return
+        try:
+            self.frame_server = FrameServer(
+                self.frame_hub, self.cams_provider or (lambda: self.config.get("cams", [])),
+                host=self.config.get("frame_server_host", ENGINE_HOST),
+                port=self.config.get("frame_server_port", 0),
+                metrics_provider=self.metrics_snapshot,
+                grid_provider=lambda: self.cams,
+                sock=listen_socket
+            )
+            self.frame_server.start()
+        except OSError as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error starting frame server: {str(e)}")
+
+    def _init_sources(self):
+        config = self.config
+        # chromedriver.exe рядом с программой; иначе (Linux-сервер) драйвер ищет Selenium
+        self.driver_path = config.get("chromedriver_path") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "chromedriver.exe")
+        self.options = Options()
+        self.options.add_argument('--headless=new')
+        self.options.add_argument('--disable-gpu')
+        self.options.add_argument('--window-size=1920,1080')
+        self.options.add_argument('--no-sandbox')
+        self.options.add_argument('--disable-dev-shm-usage')
+
+        # HTTP-камеры (source == "http") получают кадры без браузера
+        self.http_sources = HttpSourceManager(interval=self.period / 1000)
+        # Декодеры видеопотоков плеера ufanet (capture_mode == "stream")
+        self.stream_sources = StreamSourceManager(self.http_sources.pool, interval=self.period / 1000)
+        self.stream_retry_at = {}  # индекс ячейки на скриншотах -> время следующей попытки потока
+        # Общая страница-сетка плееров (capture_mode == "composite")
+        self.composite = None
+        self.composite_cells = set()
+        # Прямые CDP-сессии к Chrome (transport == "cdp"), Selenium остаётся запасным путём
+        self.cdp = CdpTransport() if self.transport == TRANSPORT_CDP else None
+        # Частота захвата по активности (по выбору: "idle_period", "capture_budget"): спокойные
+        # камеры реже, в пределах бюджета; без настроек каждая ячейка снимается в каждом цикле
+        self.scheduler = CaptureScheduler(
+            activity=lambda i: self.motion.activity(self.cams[i]["link"]) if self.cams[i] else 0.0,
+            floor_period=config.get("idle_period", 0),
+            budget=config.get("capture_budget", 0)
+        )
+
+        self.initialize_drivers()
+
+    def initialize_drivers(self):
+        # Драйверы создаются по требованию только для ячеек с камерами ufanet,
+        # HTTP-камерам Chrome не нужен
+        self.drivers = [None] * GRID_SIZE
+        # Адрес, загруженный в драйвер ячейки (вместо запроса driver.current_url на каждый кадр)
+        self.driver_urls = [None] * GRID_SIZE
+        # Кешированный элемент плеера по ячейке, переопределяется только при устаревании
+        self.player_handles = {}
+
+    def _create_driver(self):
+        try:
+            service = Service(self.driver_path) if os.path.exists(self.driver_path) else Service()
+            driver = webdriver.Chrome(service=service, options=self.options)
+            driver.implicitly_wait(5)
+            return driver
+        except Exception as e:
+            error_msg = f"[{time.strftime('%H:%M:%S')}] Error creating driver: {str(e)}"
+            logger.error(error_msg)
+            return None
+
+    def set_period(self, period_ms):
+        self.period = period_ms
+        self.http_sources.set_interval(self.period / 1000)
+
+    def set_tile_size(self, size):
+        """Размер ячеек сетки (ширина, высота); нужен только обработчикам с общей памятью"""
+
+    def navigate_driver(self, cell_index, url):
+        # Переход драйвера ячейки на адрес со сбросом кеша элементов плеера
+        self.player_handles.pop(cell_index, None)
+        self.scheduler.reset(cell_index)
+        if self.cdp:
+            self.cdp.invalidate(cell_index)
+        self.driver_urls[cell_index] = None
+        self.drivers[cell_index].get(url)
+        self.driver_urls[cell_index] = url
+
+    def _resolve_player(self, cell_index, driver):
+        element = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.ID, "ModalBodyPlayer"))
+        )
+        # Скриншот самого iframe (из основного документа) равен скриншоту body внутри него,
+        # но не требует switch_to.frame / default_content на каждый кадр
+        iframes = element.find_elements(By.TAG_NAME, "iframe")
+        handle = iframes[0] if iframes else element
+        self.player_handles[cell_index] = handle
+        return handle
+
+    def _grab_player_png(self, cell_index, driver):
+        # Один запрос к chromedriver на кадр; повторный поиск элемента только при устаревании
+        for attempt in range(2):
+            handle = self.player_handles.get(cell_index) or self._resolve_player(cell_index, driver)
+            try:
+                return handle.screenshot_as_png
+            except (StaleElementReferenceException, NoSuchElementException):
+                logger.info(f"[{time.strftime('%H:%M:%S')}] Cell {cell_index}: player element is stale, resolving again")
+                self.player_handles.pop(cell_index, None)
+        return None
+
+    def sync_sources(self):
+        http_links = [cam["link"] for cam in self.cams if cam_source(cam) == SOURCE_HTTP]
+        self.http_sources.sync(http_links)
+        self.stream_sources.sync([cam["link"] for cam in self.cams if cam_source(cam) == SOURCE_UFANET])
+        self.motion.forget([cam["link"] for cam in self.cams if cam])
+        return http_links
+
+    def start_stream(self, cell_index, driver, link, timeout=10):
+        # Браузер нужен только для поиска адреса потока, затем страница сбрасывается
+        stream_url = discover_stream_url(driver, timeout=timeout)
+        if stream_url and self.stream_sources.start(link, stream_url):
+            self.stream_retry_at.pop(cell_index, None)
+            self.navigate_driver(cell_index, 'about:blank')
+            return True
+        logger.warning(f"[{time.strftime('%H:%M:%S')}] Cell {cell_index}: stream not available, using screenshot mode")
+        self.stream_retry_at[cell_index] = time.time() + STREAM_RETRY_INTERVAL
+        return False
+
+    def _retry_streams(self, indexes):
+        # Ячейки, перешедшие на скриншоты, время от времени снова ищут поток на открытой странице
+        now = time.time()
+        for i in indexes:
+            retry_at = self.stream_retry_at.get(i)
+            if retry_at is None or now < retry_at:
+                continue
+            cam = self.cams[i]
+            if not cam or not self.drivers[i] or self.driver_urls[i] != cam["link"] or self.stream_sources.get(cam["link"]):
+                self.stream_retry_at.pop(i, None)
+                continue
+            self.start_stream(i, self.drivers[i], cam["link"], timeout=STREAM_RETRY_TIMEOUT)
+
+    def _load_player(self, cell_index, url):
+        driver = self.drivers[cell_index]
+        self.navigate_driver(cell_index, url)
+        driver.refresh()
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ModalBodyPlayer")))
+        if self.capture_mode == CAPTURE_STREAM:
+            self.start_stream(cell_index, driver, url)
+
+    def load_grid(self, cams):
+        """Загрузить камеры сетки в драйверы (cams — камера или None по ячейкам)"""
+        self.cams = (list(cams) + [None] * GRID_SIZE)[:GRID_SIZE]
+        current_grid = [cam["link"] if cam else None for cam in self.cams]
+        # HTTP-камеры обслуживаются пулом соединений, браузер для них не загружаем
+        http_links = self.sync_sources()
+        if self.capture_mode == CAPTURE_COMPOSITE:
+            self.composite_cells = self.load_composite(current_grid, http_links)
+        for i in range(GRID_SIZE):
+            if self.load_aborted:
+                logger.info(f"[{time.strftime('%H:%M:%S')}] Grid load aborted at cell {i}")
+                break
+            try:
+                url = current_grid[i]
+                if url in http_links or i in self.composite_cells:
+                    url = None
+                if url and not self.drivers[i]:
+                    self.drivers[i] = self._create_driver()
+                if self.cdp and self.drivers[i] and not self.cdp.is_attached(i):
+                    self.cdp.attach(i, self.drivers[i])
+                if not self.drivers[i]:
+                    if url:
+                        logger.warning(f"[{time.strftime('%H:%M:%S')}] Skipping load for cell {i}: driver not initialized")
+                    continue
+                if url:
+                    self._load_player(i, url)
+                else:
+                    self.navigate_driver(i, 'about:blank')
+            except Exception as e:
+                error_msg = f"[{time.strftime('%H:%M:%S')}] Error loading for cell {i}: {str(e)}"
+                logger.error(error_msg)
+
+    def reload_cells(self, changed):
+        """Перезагрузить отдельные ячейки после изменения камеры (changed — {индекс: камера})"""
+        for i, cam in changed.items():
+            self.cams[i] = cam
+        if self.capture_mode == CAPTURE_COMPOSITE:
+            # Страница-сетка пересобирается целиком
+            self.load_grid(self.cams)
+            return
+        for i, cam in changed.items():
+            try:
+                if cam_source(cam) == SOURCE_HTTP:
+                    # HTTP-камера: освобождаем браузер ячейки, кадры идут через пул
+                    if self.drivers[i]:
+                        self.navigate_driver(i, 'about:blank')
+                    continue
+                if not self.drivers[i]:
+                    self.drivers[i] = self._create_driver()
+                if self.drivers[i]:
+                    self._load_player(i, cam["link"])
+            except Exception as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Error reloading driver for cell {i}: {str(e)}")
+        self.sync_sources()
+
+    def load_composite(self, current_grid, http_links):
+        # Один браузер на все плееры группы; ячейки без адреса плеера остаются на своих драйверах
+        if not self.composite:
+            driver = self._create_driver()
+            if not driver:
+                return set()
+            self.composite = CompositeCapture(driver)
+        links = [link if link and link not in http_links else None for link in current_grid]
+        try:
+            return self.composite.load(links)
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error loading composite page: {str(e)}")
+            return set()
+
+    def _crop_player_frame(self, pil_image):
+        # Обрезка слева и справа
+        width, height = pil_image.size
+        crop_fraction = 17 / 235
+        left_crop = int(width * crop_fraction)
+        right_crop = int(width * crop_fraction)
+        return pil_image.crop((left_crop, 0, width - right_crop, height))
+
+    def store_frame(self, cam, jpeg_bytes, frame_time):
+        """Кадр в буфер перемотки, архив и HTTP-публикацию; False — кадр уже был (тот же момент времени)"""
+        if not self.replay.add(cam["link"], jpeg_bytes=jpeg_bytes, timestamp=frame_time):
+            return False
+        if self.publish_frames:
+            if cam.get("record"):
+                self.recorder.add(cam["link"], jpeg_bytes, frame_time)
+            self.frame_hub.publish(cam["link"], jpeg_bytes, frame_time)
+        self.metrics["frames"] += 1
+        return True
+
+    def _publish(self, cell_index, frame_image, jpeg_bytes=None, frame_time=None):
+        # JPEG кодируется один раз, готовый (HTTP, поток) не перекодируется
+        cam = self.cams[cell_index]
+        try:
+            if jpeg_bytes is None:
+                jpeg_bytes = self.replay.encode(frame_image)
+            frame_time = frame_time or time.time()
+            if self.store_frame(cam, jpeg_bytes, frame_time):
+                self.last_frames[cell_index] = (jpeg_bytes, frame_time)
+                # Движение считается только по новым кадрам
+                self.motion.update(cam, frame_image, frame_time)
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error buffering frame for cell {cell_index}: {str(e)}")
+        return FRAME_NEW, frame_image, self.motion.is_active(cam["link"])
+
+    def _capture_composite(self, indexes):
+        # Один скриншот за цикл для всех ячеек страницы-сетки
+        if not self.composite_cells.intersection(indexes):
+            return None
+        try:
+            return self.composite.capture()
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error capturing composite page: {str(e)}")
+            return None
+
+    def _decode_source_frame(self, cell_index, frame_bytes, frame_time, kind):
+        if not frame_bytes:
+            return FRAME_NOCONNECT, None, False
+        try:
+            pil_image = Image.open(io.BytesIO(frame_bytes)).convert("RGB")
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error decoding {kind} frame for cell {cell_index}: {str(e)}")
+            return (FRAME_NOCONNECT if kind == "HTTP" else FRAME_UNCHANGED), None, False
+        return self._publish(cell_index, pil_image, frame_bytes, frame_time)
+
+    def _capture_stream_cell(self, cell_index, decoder):
+        if not decoder.is_alive():
+            # Декодер остановился — возвращаемся к скриншотам страницы плеера
+            link = self.cams[cell_index]["link"]
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Cell {cell_index}: stream decoder stopped, falling back to screenshot mode")
+            self.stream_sources.stop(link)
+            self.stream_retry_at[cell_index] = time.time() + STREAM_RETRY_INTERVAL
+            if self.drivers[cell_index]:
+                try:
+                    self.navigate_driver(cell_index, link)
+                except Exception as e:
+                    logger.error(f"[{time.strftime('%H:%M:%S')}] Error reloading page for cell {cell_index}: {str(e)}")
+            return FRAME_NOCONNECT, None, False
+        frame_bytes, frame_time = decoder.latest()
+        return self._decode_source_frame(cell_index, frame_bytes, frame_time, "stream")
+
+    def _screenshot_cells(self, indexes):
+        # Ячейки, кадр которых снимается скриншотом страницы плеера
+        selected = []
+        for i in indexes:
+            cam = self.cams[i]
+            if cam_source(cam) != SOURCE_UFANET or i in self.composite_cells:
+                continue
+            if self.stream_sources.get(cam["link"]) or not self.drivers[i]:
+                continue
+            if self.driver_urls[i] in (None, 'about:blank'):
+                continue
+            selected.append(i)
+        return selected
+
+    def _capture_cell(self, cell_index, composite_tiles, screenshot_cells, cdp_frames):
+        cam = self.cams[cell_index]
+        if cam_source(cam) == SOURCE_HTTP:
+            frame_bytes, frame_time = self.http_sources.latest(cam["link"])
+            return self._decode_source_frame(cell_index, frame_bytes, frame_time, "HTTP")
+        if cam and cell_index in self.composite_cells:
+            tile = composite_tiles[cell_index] if composite_tiles else None
+            if tile is None:
+                return FRAME_NOCONNECT, None, False
+            return self._publish(cell_index, self._crop_player_frame(Image.fromarray(tile)))
+        decoder = self.stream_sources.get(cam["link"]) if cam else None
+        if decoder:
+            return self._capture_stream_cell(cell_index, decoder)
+        if not cam or not self.drivers[cell_index]:
+            return (FRAME_NOCAM if not cam else FRAME_NOCONNECT), None, False
+        loaded_url = self.driver_urls[cell_index]
+        if loaded_url == 'about:blank':
+            return FRAME_NOCAM, None, False
+        if loaded_url is None:
+            # Страница не загружена (ошибка при переходе)
+            return FRAME_NOCONNECT, None, False
+        if cell_index not in screenshot_cells:
+            # Спокойная камера: до следующего захвата остаётся прежний кадр
+            return FRAME_UNCHANGED, None, False
+        try:
+            screenshot_bytes = cdp_frames.get(cell_index) or self._grab_player_png(cell_index, self.drivers[cell_index])
+            if not screenshot_bytes:
+                logger.warning(f"[{time.strftime('%H:%M:%S')}] Cell {cell_index}: No screenshot bytes")
+                return FRAME_UNCHANGED, None, False
+            pil_image = Image.open(io.BytesIO(screenshot_bytes))
+            return self._publish(cell_index, self._crop_player_frame(pil_image))
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error updating frame for cell {cell_index}: {str(e)}")
+            self.metrics["errors"] += 1
+            return FRAME_NOCONNECT, None, False
+
+    def capture(self, indexes, force=(), sizes=None):
+        """Один цикл захвата ячеек indexes: {индекс: (статус, кадр PIL или None, есть ли движение)}.
+        force — ячейки, снимаемые вне расписания активности (например, окно просмотра);
+        sizes — {индекс: (ширина, высота)}: кадр возвращается уже масштабированным под ячейку"""
+        started = time.time()
+        indexes = list(indexes)
+        if self.capture_mode == CAPTURE_STREAM:
+            self._retry_streams(indexes)
+        composite_tiles = self._capture_composite(indexes)
+        # Скриншоты по расписанию активности
+        screenshot_cells = self.scheduler.select(self._screenshot_cells(indexes), self.period / 1000, force=force)
+        # Скриншоты всех выбранных ячеек одним конвейером команд CDP
+        cdp_frames = {}
+        if self.cdp:
+            for i in screenshot_cells:
+                self.cdp.ensure_attached(i, self.drivers[i])
+            cdp_frames = self.cdp.capture_all(screenshot_cells)
+        results = {}
+        for i in indexes:
+            status, frame_image, motion = self._capture_cell(i, composite_tiles, screenshot_cells, cdp_frames)
+            if status == FRAME_NEW and sizes and sizes.get(i):
+                frame_image = display_tile(frame_image, sizes[i])
+            results[i] = (status, frame_image, motion)
+        self.metrics["cycles"] += 1
+        self.metrics["last_cycle_seconds"] = round(time.time() - started, 3)
+        return results
+
+    def metrics_snapshot(self):
+        snapshot = dict(self.metrics)
+        snapshot["uptime_seconds"] = round(time.time() - snapshot.pop("started"), 1)
+        snapshot["period_seconds"] = self.period / 1000
+        snapshot["cells"] = [cam["link"] if cam else None for cam in self.cams]
+        snapshot["drivers"] = sum(1 for driver in self.drivers if driver)
+        snapshot["motion"] = [link for link, active in self.motion.active.items() if active]
+        return snapshot
+
+    def close(self):
+        self.http_sources.stop_all()
+        self.stream_sources.stop_all()
+        if self.composite:
+            self.composite.close()
+        if self.cdp:
+            self.cdp.close()
+        if self.recorder:
+            self.recorder.stop()
+        if self.frame_server:
+            self.frame_server.stop()
+        for driver in self.drivers:
+            if driver:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    error_msg = f"[{time.strftime('%H:%M:%S')}] Error quitting driver: {str(e)}"
+                    logger.error(error_msg)
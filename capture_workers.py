@@ -0,0 +1,281 @@
+import logging
+import multiprocessing
+import threading
+import time
+from PIL import Image
+
+from capture_engine import CaptureEngine, GRID_SIZE, FRAME_NEW, FRAME_NOCONNECT
+from frame_store import SharedFrameStore
+from motion import motion_logger
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+REPLY_TIMEOUT = 60   # сек, ожидание загрузки ячеек обработчиком (загрузка страниц плееров бывает долгой)
+CAPTURE_TIMEOUT = 5  # сек, ожидание кадров: зависший обработчик не держит окно дольше
+
+
+def worker_main(config, period_ms, conn, store_spec, abort_event):
+    """Процесс-обработчик: свои драйверы и источники; захват, обрезка, детекция движения
+    и масштабирование под ячейку выполняются здесь, готовые кадры пишутся в общую память"""
+    logging.basicConfig(filename='app.log', level=logging.ERROR)
+    store_name, tile_width, tile_height = store_spec
+    store = SharedFrameStore(GRID_SIZE, tile_width, tile_height, name=store_name)
+    engine = CaptureEngine(config, period_ms=period_ms, publish_frames=False)
+
+    def watch_abort():
+        # Прерывание загрузки окном (отмена упреждающего запуска): загрузка сетки
+        # заканчивается после текущей ячейки, не дожидаясь остальных
+        abort_event.wait()
+        engine.load_aborted = True
+
+    threading.Thread(target=watch_abort, daemon=True).start()
+    try:
+        while True:
+            try:
+                sequence, command, args = conn.recv()
+            except EOFError:
+                break
+            if command == "stop":
+                break
+            reply = None
+            try:
+                if command == "load":
+                    engine.load_grid(*args)
+                elif command == "reload":
+                    engine.reload_cells(*args)
+                elif command == "period":
+                    engine.set_period(*args)
+                elif command == "store":
+                    # Слоты общей памяти перевыделены окном под новый размер ячеек
+                    store_name, tile_width, tile_height = args[0]
+                    store.close()
+                    store = SharedFrameStore(GRID_SIZE, tile_width, tile_height, name=store_name)
+                elif command == "capture":
+                    reply = {}
+                    for index, (status, frame_image, motion) in engine.capture(*args).items():
+                        tile = frame = None
+                        if status == FRAME_NEW:
+                            if store.fits(frame_image.size):
+                                # В канал уходит только номер кадра в общей памяти
+                                tile = store.write(index, frame_image)
+                            else:
+                                # Кадр окна просмотра или ячейки крупнее слота — передаётся целиком
+                                frame_image = frame_image.convert("RGB")
+                                tile = (frame_image.size, frame_image.tobytes())
+                            # JPEG для буфера перемотки и архива в процессе окна (уже закодирован)
+                            frame = engine.last_frames.pop(index, None)
+                        reply[index] = (status, tile, motion, frame)
+            except Exception as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Capture worker error in '{command}': {str(e)}")
+            conn.send((sequence, reply))
+    finally:
+        engine.close()
+        store.close()
+
+
+class ShardedCapture(CaptureEngine):
+    """Захват в нескольких процессах: ячейки распределяются по обработчикам ("capture_workers"),
+    каждый владеет своими драйверами и обработкой кадров; окно только выводит готовые кадры.
+    Буфер перемотки, архив и HTTP-публикация остаются в процессе окна"""
+
+    def __init__(self, config, workers, period_ms=None, cams_provider=None, listen_socket=None, serve=True):
+        self.worker_count = min(max(workers, 1), GRID_SIZE)
+        super().__init__(config, period_ms=period_ms, cams_provider=cams_provider, listen_socket=listen_socket, serve=serve)
+
+    def _init_sources(self):
+        # spawn на всех ОС: fork процесса с потоками (HTTP, запись) небезопасен
+        self.context = multiprocessing.get_context("spawn")
+        # Буфер перемотки обработчика только отсекает повторные кадры
+        self.worker_config = dict(self.config, replay_seconds=5, replay_memory_mb=4, frame_server_port=0)
+        # Общая память под кадры: объём фиксирован сеткой и наибольшим размером ячейки
+        self.store = SharedFrameStore(
+            GRID_SIZE, self.config.get("tile_width", 960), self.config.get("tile_height", 540)
+        )
+        self.abort_event = self.context.Event()
+        if self.load_aborted:  # прерывание до запуска обработчиков
+            self.abort_event.set()
+        self.workers = [None] * self.worker_count
+        self.sequence = 0
+        self.motion_cells = set()
+        self.drivers = []
+        for k in range(self.worker_count):
+            self._start_worker(k)
+
+    @property
+    def load_aborted(self):
+        return getattr(self, "_load_aborted", False)
+
+    @load_aborted.setter
+    def load_aborted(self, value):
+        # Прерывание передаётся обработчикам: они заняты загрузкой и команды не читают
+        self._load_aborted = value
+        abort_event = getattr(self, "abort_event", None)
+        if abort_event is not None:
+            if value:
+                abort_event.set()
+            else:
+                abort_event.clear()
+
+    def owner(self, cell_index):
+        return cell_index % self.worker_count
+
+    def _start_worker(self, k):
+        parent_conn, child_conn = self.context.Pipe()
+        store_spec = (self.store.name, self.store.max_width, self.store.max_height)
+        process = self.context.Process(
+            target=worker_main,
+            args=(self.worker_config, self.period, child_conn, store_spec, self.abort_event),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.workers[k] = (process, parent_conn)
+
+    def _restart_worker(self, k):
+        logger.error(f"[{time.strftime('%H:%M:%S')}] Capture worker {k} stopped, restarting")
+        process, conn = self.workers[k]
+        if process.is_alive():
+            process.terminate()
+        conn.close()
+        self._start_worker(k)
+        # Номер 0 не совпадает ни с одним запросом — ответ на загрузку будет отброшен
+        self.workers[k][1].send((0, "load", (self._shard_cams(k),)))
+
+    def _shard_cams(self, k):
+        return [cam if cam and self.owner(i) == k else None for i, cam in enumerate(self.cams)]
+
+    def _receive(self, k, deadline):
+        process, conn = self.workers[k]
+        try:
+            # Ответы на прерванные по таймауту запросы пропускаются
+            while conn.poll(max(deadline - time.time(), 0)):
+                sequence, reply = conn.recv()
+                if sequence == self.sequence:
+                    return reply
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Capture worker {k} did not reply in time")
+        except (EOFError, OSError):
+            self._restart_worker(k)
+        return None
+
+    def _request_all(self, requests, timeout=CAPTURE_TIMEOUT):
+        """Разослать команды обработчикам ({номер: (команда, аргументы)}) и собрать ответы
+        (общий срок timeout на всех: обработчики работают параллельно)"""
+        self.sequence += 1
+        sent = []
+        for k, (command, args) in requests.items():
+            try:
+                self.workers[k][1].send((self.sequence, command, args))
+                sent.append(k)
+            except (EOFError, OSError):
+                self._restart_worker(k)
+        # Обработчики работают параллельно, ответы собираются после рассылки
+        deadline = time.time() + timeout
+        return {k: self._receive(k, deadline) for k in sent}
+
+    def set_period(self, period_ms):
+        self.period = period_ms
+        self._request_all({k: ("period", (period_ms,)) for k in range(self.worker_count)})
+
+    def set_tile_size(self, size):
+        """Слоты общей памяти по фактическому размеру ячеек (вызывается при загрузке сетки):
+        начальный размер из "tile_width"/"tile_height" задаётся до появления окна"""
+        width, height = size
+        if width <= 1 or height <= 1 or (width, height) == (self.store.max_width, self.store.max_height):
+            return
+        old_store, self.store = self.store, SharedFrameStore(GRID_SIZE, width, height)
+        # Перезапущенный при рассылке обработчик сразу получает новый блок (_start_worker)
+        self._request_all({k: ("store", ((self.store.name, width, height),)) for k in range(self.worker_count)})
+        old_store.close()
+
+    def load_grid(self, cams):
+        self.cams = (list(cams) + [None] * GRID_SIZE)[:GRID_SIZE]
+        self.motion_cells.clear()
+        if self.load_aborted:
+            return
+        self._request_all({k: ("load", (self._shard_cams(k),)) for k in range(self.worker_count)}, timeout=REPLY_TIMEOUT)
+
+    def reload_cells(self, changed):
+        requests = {}
+        for i, cam in changed.items():
+            self.cams[i] = cam
+            requests.setdefault(self.owner(i), ("reload", ({},)))[1][0][i] = cam
+        self._request_all(requests, timeout=REPLY_TIMEOUT)
+
+    def capture(self, indexes, force=(), sizes=None):
+        started = time.time()
+        requests = {}
+        for i in indexes:
+            request = requests.setdefault(self.owner(i), ("capture", ([], [], {})))
+            request[1][0].append(i)
+            if i in force:
+                request[1][1].append(i)
+            if sizes and sizes.get(i):
+                # Кадр сетки масштабируется обработчиком точно под ячейку: окно его только выводит.
+                # Ячейка крупнее слота общей памяти получает кадр через канал, без искажения пропорций
+                request[1][2][i] = sizes[i]
+        replies = self._request_all(requests)
+        results = {}
+        for k, (_, args) in requests.items():
+            reply = replies.get(k) or {}
+            for i in args[0]:
+                if i not in reply:
+                    results[i] = (FRAME_NOCONNECT, None, False)
+                    continue
+                status, tile, motion, frame = reply[i]
+                frame_image = None
+                if status == FRAME_NEW:
+                    # Кадр уже масштабирован обработчиком и читается из общей памяти без копирования
+                    if isinstance(tile, int):
+                        frame_image = self.store.image(i)
+                    else:
+                        frame_image = Image.frombuffer("RGB", tile[0], tile[1], "raw", "RGB", 0, 1)
+                    if frame and self.cams[i]:
+                        try:
+                            self.store_frame(self.cams[i], *frame)
+                        except Exception as e:
+                            logger.error(f"[{time.strftime('%H:%M:%S')}] Error buffering frame for cell {i}: {str(e)}")
+                # События движения обработчиков записываются в журнал этого процесса
+                if motion and i not in self.motion_cells:
+                    self.motion_cells.add(i)
+                    if self.cams[i]:
+                        motion_logger.info(f"Motion started: '{self.cams[i]['street']}'")
+                elif not motion and i in self.motion_cells:
+                    self.motion_cells.discard(i)
+                    if self.cams[i]:
+                        motion_logger.info(f"Motion ended: '{self.cams[i]['street']}'")
+                results[i] = (status, frame_image, motion)
+        self.metrics["cycles"] += 1
+        self.metrics["last_cycle_seconds"] = round(time.time() - started, 3)
+        return results
+
+    def metrics_snapshot(self):
+        snapshot = super().metrics_snapshot()
+        snapshot["workers"] = sum(1 for process, _ in self.workers if process.is_alive())
+        snapshot["motion"] = [self.cams[i]["link"] for i in self.motion_cells if self.cams[i]]
+        return snapshot
+
+    def close(self):
+        for process, conn in self.workers:
+            try:
+                conn.send((0, "stop", ()))
+            except (EOFError, OSError):
+                pass
+        for process, conn in self.workers:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self.store.close()
+        self.recorder.stop()
+        if self.frame_server:
+            self.frame_server.stop()
+
+
+def create_capture_engine(config, period_ms=None, cams_provider=None, listen_socket=None, serve=True):
+    """Движок захвата по конфигурации: "capture_workers" > 0 — процессы-обработчики;
+    serve=False — сервер кадров запускается позже (start_frame_server)"""
+    workers = config.get("capture_workers", 0)
+    if workers:
+        return ShardedCapture(config, workers, period_ms=period_ms, cams_provider=cams_provider, listen_socket=listen_socket, serve=serve)
+    return CaptureEngine(config, period_ms=period_ms, cams_provider=cams_provider, listen_socket=listen_socket, serve=serve)
@@ -0,0 +1,175 @@
+import os
+import json
+import sqlite3
+import logging
+import time
+from collections import Counter
+from contextlib import closing
+
+from config_store import ConfigStore, SAVE_DELAY_MS, write_file_atomic
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+CATALOG_KEYS = ("cams", "groups", "login_attempts")  # разделы конфигурации, хранимые в базе
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cams (
+    link TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    street TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cams_street ON cams (street);
+CREATE TABLE IF NOT EXISTS groups (
+    position INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS login_attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT,
+    timestamp TEXT,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS login_attempts_time ON login_attempts (timestamp);
+"""
+
+
+def catalog_rows(config):
+    """Неизменяемый снимок каталога для сравнения со записанным: камеры по ссылке,
+    группы по позиции, попытки входа как мультимножество"""
+    cams = {
+        cam["link"]: (position, tuple(cam.items()))
+        for position, cam in enumerate(config.get("cams", []))
+    }
+    groups = [
+        tuple((key, tuple(value) if isinstance(value, list) else value) for key, value in group.items())
+        for group in config.get("groups", [])
+    ]
+    attempts = Counter(
+        (attempt.get("user"), attempt.get("timestamp"), int(bool(attempt.get("success"))))
+        for attempt in config.get("login_attempts", [])
+    )
+    return cams, groups, attempts
+
+
+class SqliteConfigStore(ConfigStore):
+    """Камеры и группы в SQLite ("catalog_db" в config.json), остальные
+    настройки — в config.json. При записи обновляются только изменившиеся строки;
+    config.json с каталогом при первом открытии переносится в базу"""
+
+    def __init__(self, path, db_path, widget=None, delay_ms=SAVE_DELAY_MS, data=None, on_error=None):
+        self.db_name = db_path
+        # Путь к базе задаётся относительно config.json
+        self.db_path = os.path.join(os.path.dirname(os.path.abspath(path)), db_path)
+        self.written = (({}, [], Counter()), None)  # каталог и настройки последней записи
+        self.connection = None                      # соединение потока записи
+        super().__init__(path, widget=widget, delay_ms=delay_ms, data=data, on_error=on_error)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def load(self, default=None):
+        data = self._read()
+        settings = data if data is not None else dict(default or {})
+        settings["catalog_db"] = self.db_name
+        imported = data is not None and any(key in data for key in CATALOG_KEYS)
+        started = time.time()
+        with closing(self._connect()) as connection:
+            if imported:
+                self._import(connection, settings)
+            else:
+                settings.update(self._read_catalog(connection))
+        self.config = settings
+        logger.info(
+            f"[{time.strftime('%H:%M:%S')}] Catalog {'imported into' if imported else 'loaded from'} {self.db_path}: "
+            f"{len(settings['cams'])} cams, {len(settings['groups'])} groups in {time.time() - started:.3f} s"
+        )
+        rows, text = self._serialize(settings)
+        # После переноса каталог в базе уже записан, а config.json ещё полный
+        self.written = (rows, None if imported else text)
+        if imported:
+            self.save()
+        return settings
+
+    def _read_catalog(self, connection):
+        catalog = {
+            "cams": [json.loads(data) for (data,) in connection.execute("SELECT data FROM cams ORDER BY position")],
+            "groups": [json.loads(data) for (data,) in connection.execute("SELECT data FROM groups ORDER BY position")],
+        }
+        # Попытки входа ведёт журнал входа; оставшиеся в базе переносятся туда окном входа
+        attempts = [
+            {"user": user, "timestamp": timestamp, "success": bool(success)}
+            for user, timestamp, success in connection.execute("SELECT user, timestamp, success FROM login_attempts ORDER BY id")
+        ]
+        if attempts:
+            catalog["login_attempts"] = attempts
+        return catalog
+
+    def _import(self, connection, config):
+        for key in CATALOG_KEYS:
+            config.setdefault(key, [])
+        with connection:
+            connection.execute("DELETE FROM cams")
+            connection.execute("DELETE FROM groups")
+            connection.execute("DELETE FROM login_attempts")
+            self._apply(connection, ({}, [], Counter()), catalog_rows(config))
+
+    def _serialize(self, config):
+        settings = {key: value for key, value in config.items() if key not in CATALOG_KEYS}
+        return catalog_rows(config), json.dumps(settings, ensure_ascii=False, indent=2)
+
+    def _apply(self, connection, previous, current):
+        old_cams, old_groups, old_attempts = previous
+        cams, groups, attempts = current
+        removed = [(link,) for link in old_cams.keys() - cams.keys()]
+        if removed:
+            connection.executemany("DELETE FROM cams WHERE link = ?", removed)
+        changed = []
+        for link, row in cams.items():
+            if old_cams.get(link) != row:
+                cam = dict(row[1])
+                changed.append((link, row[0], cam.get("street", ""), json.dumps(cam, ensure_ascii=False)))
+        if changed:
+            connection.executemany(
+                "INSERT OR REPLACE INTO cams (link, position, street, data) VALUES (?, ?, ?, ?)", changed
+            )
+        changed = []
+        for position, row in enumerate(groups):
+            if position >= len(old_groups) or old_groups[position] != row:
+                group = {key: list(value) if isinstance(value, tuple) else value for key, value in row}
+                changed.append((position, group.get("name"), json.dumps(group, ensure_ascii=False)))
+        if changed:
+            connection.executemany("INSERT OR REPLACE INTO groups (position, name, data) VALUES (?, ?, ?)", changed)
+        if len(groups) < len(old_groups):
+            connection.execute("DELETE FROM groups WHERE position >= ?", (len(groups),))
+        for (user, timestamp, success), count in (old_attempts - attempts).items():
+            connection.execute(
+                "DELETE FROM login_attempts WHERE id IN "
+                "(SELECT id FROM login_attempts WHERE user IS ? AND timestamp IS ? AND success = ? ORDER BY id LIMIT ?)",
+                (user, timestamp, success, count)
+            )
+        added = [key for key, count in (attempts - old_attempts).items() for _ in range(count)]
+        if added:
+            connection.executemany("INSERT INTO login_attempts (user, timestamp, success) VALUES (?, ?, ?)", added)
+
+    def _write(self, data):
+        rows, settings = data
+        try:
+            if self.connection is None:
+                self.connection = self._connect()
+            with self.connection:
+                self._apply(self.connection, self.written[0], rows)
+            if settings != self.written[1]:
+                write_file_atomic(self.path, settings)
+            self.written = (rows, settings)
+            self.last_error = None
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Config saved to {self.path} and {self.db_path}.")
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error saving config: {str(e)}")
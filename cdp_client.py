@@ -0,0 +1,267 @@
+import os
+import json
+import base64
+import struct
+import asyncio
+import logging
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Транспорт захвата (ключ "transport" в config.json)
+TRANSPORT_SELENIUM = "selenium"  # HTTP-протокол chromedriver (по умолчанию)
+TRANSPORT_CDP = "cdp"            # прямой websocket DevTools каждого Chrome
+
+REATTACH_INTERVAL = 10  # сек, не чаще одной попытки переподключения ячейки после обрыва
+
+# Прямоугольник плеера в координатах страницы
+PLAYER_RECT_SCRIPT = """
+(function() {
+    var e = document.querySelector('#ModalBodyPlayer iframe') || document.getElementById('ModalBodyPlayer');
+    if (!e) return null;
+    var r = e.getBoundingClientRect();
+    return [r.left + window.scrollX, r.top + window.scrollY, r.width, r.height];
+})()
+"""
+
+
+class CdpConnection:
+    """Минимальный websocket-клиент (RFC 6455) для одной вкладки Chrome"""
+
+    def __init__(self, ws_url, on_closed=None):
+        self.ws_url = ws_url
+        self.on_closed = on_closed  # вызывается в цикле asyncio, когда соединение закрылось
+        self.reader = None
+        self.writer = None
+        self.next_id = 0
+        self.pending = {}
+        self.read_task = None
+
+    async def connect(self):
+        parts = urlsplit(self.ws_url)
+        self.reader, self.writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        request = (
+            f"GET {parts.path} HTTP/1.1\r\n"
+            f"Host: {parts.hostname}:{parts.port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self.writer.write(request.encode("ascii"))
+        await self.writer.drain()
+        response = await self.reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in response.split(b"\r\n", 1)[0]:
+            raise ConnectionError(f"WebSocket handshake failed: {response[:100]!r}")
+        self.read_task = asyncio.ensure_future(self._read_loop())
+
+    def _send_frame(self, opcode, payload):
+        # Кадры клиента всегда маскируются
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 65536:
+            header.append(0x80 | 126)
+            header += struct.pack(">H", length)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack(">Q", length)
+        mask = os.urandom(4)
+        header += mask
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.writer.write(bytes(header) + masked)
+
+    async def _read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await self.reader.readexactly(8))[0]
+        if second & 0x80:
+            mask = await self.reader.readexactly(4)
+            data = await self.reader.readexactly(length)
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        else:
+            data = await self.reader.readexactly(length)
+        return bool(first & 0x80), opcode, data
+
+    async def _read_loop(self):
+        message = bytearray()
+        try:
+            while True:
+                fin, opcode, data = await self._read_frame()
+                if opcode == 0x8:  # close
+                    break
+                if opcode == 0x9:  # ping
+                    self._send_frame(0xA, data)
+                    continue
+                if opcode in (0x0, 0x1, 0x2):
+                    message += data
+                    if not fin:
+                        continue
+                    payload = json.loads(message.decode("utf-8"))
+                    message = bytearray()
+                    future = self.pending.pop(payload.get("id"), None)
+                    if future and not future.done():
+                        if "error" in payload:
+                            future.set_exception(RuntimeError(payload["error"].get("message", "CDP error")))
+                        else:
+                            future.set_result(payload.get("result", {}))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError) as e:
+            logger.info(f"[{time.strftime('%H:%M:%S')}] CDP connection closed for {self.ws_url}: {str(e)}")
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("CDP connection closed"))
+            self.pending.clear()
+            if self.on_closed:
+                self.on_closed(self)
+
+    async def send(self, method, params=None, timeout=10):
+        """Отправить команду и дождаться ответа; команды разных вызовов идут конвейером"""
+        if self.read_task is None or self.read_task.done():
+            raise ConnectionError("CDP connection is not open")
+        self.next_id += 1
+        future = asyncio.get_event_loop().create_future()
+        self.pending[self.next_id] = future
+        self._send_frame(0x1, json.dumps({"id": self.next_id, "method": method, "params": params or {}}).encode("utf-8"))
+        await self.writer.drain()
+        return await asyncio.wait_for(future, timeout)
+
+    async def close(self):
+        if self.writer:
+            try:
+                self._send_frame(0x8, b"")
+                await self.writer.drain()
+            except Exception:
+                pass
+            self.writer.close()
+        if self.read_task:
+            self.read_task.cancel()
+
+
+def page_ws_url(driver):
+    """Адрес websocket DevTools вкладки, которой управляет драйвер"""
+    address = driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+    if not address:
+        return None
+    with urllib.request.urlopen(f"http://{address}/json", timeout=5) as response:
+        targets = json.loads(response.read().decode("utf-8"))
+    for target in targets:
+        if target.get("type") == "page" and target.get("webSocketDebuggerUrl"):
+            return target["webSocketDebuggerUrl"]
+    return None
+
+
+class CdpTransport:
+    """Постоянные CDP-сессии всех Chrome в одном asyncio-цикле фонового потока"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.connections = {}  # индекс ячейки -> CdpConnection
+        self.rects = {}        # индекс ячейки -> прямоугольник плеера (кеш до навигации)
+        self.retry_at = {}     # индекс ячейки -> время следующей попытки переподключения
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def _run(self, coro, timeout=15):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def attach(self, index, driver):
+        """Подключиться к Chrome драйвера; False — остаёмся на Selenium"""
+        self.detach(index)
+        try:
+            ws_url = page_ws_url(driver)
+            if not ws_url:
+                return False
+            connection = CdpConnection(ws_url, on_closed=lambda closed: self._on_closed(index, closed))
+            self._run(connection.connect())
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] CDP attach failed for cell {index}: {str(e)}")
+            return False
+        self.connections[index] = connection
+        logger.info(f"[{time.strftime('%H:%M:%S')}] CDP attached for cell {index}: {ws_url}")
+        return True
+
+    def is_attached(self, index):
+        return index in self.connections
+
+    def ensure_attached(self, index, driver):
+        """Переподключение ячейки, чьё соединение оборвалось (не чаще REATTACH_INTERVAL)"""
+        if index in self.connections:
+            return True
+        now = time.time()
+        if now < self.retry_at.get(index, 0):
+            return False
+        self.retry_at[index] = now + REATTACH_INTERVAL
+        return self.attach(index, driver)
+
+    def _on_closed(self, index, connection):
+        # Оборванное соединение снимается: ячейка снимается через Selenium до переподключения
+        if self.connections.get(index) is connection:
+            del self.connections[index]
+            self.rects.pop(index, None)
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] CDP connection lost for cell {index}, will reattach")
+
+    def invalidate(self, index):
+        self.rects.pop(index, None)
+
+    def detach(self, index):
+        self.rects.pop(index, None)
+        connection = self.connections.pop(index, None)
+        if connection:
+            try:
+                self._run(connection.close(), timeout=5)
+            except Exception:
+                pass
+
+    async def _capture(self, index):
+        connection = self.connections[index]
+        rect = self.rects.get(index)
+        if rect is None:
+            result = await connection.send("Runtime.evaluate", {"expression": PLAYER_RECT_SCRIPT, "returnByValue": True})
+            rect = result.get("result", {}).get("value")
+            if not rect or rect[2] <= 0 or rect[3] <= 0:
+                raise RuntimeError("player element not found")
+            self.rects[index] = rect
+        x, y, width, height = rect
+        result = await connection.send("Page.captureScreenshot", {
+            "format": "png",
+            "clip": {"x": x, "y": y, "width": width, "height": height, "scale": 1},
+        })
+        return base64.b64decode(result["data"])
+
+    async def _capture_all(self, indexes):
+        results = await asyncio.gather(*(self._capture(i) for i in indexes), return_exceptions=True)
+        frames = {}
+        for index, result in zip(indexes, results):
+            if isinstance(result, Exception):
+                logger.error(f"[{time.strftime('%H:%M:%S')}] CDP capture failed for cell {index}: {str(result)}")
+                self.rects.pop(index, None)
+            else:
+                frames[index] = result
+        return frames
+
+    def capture_all(self, indexes, timeout=15):
+        """Скриншоты плееров всех ячеек за один проход цикла: индекс -> PNG bytes"""
+        indexes = [i for i in indexes if i in self.connections]
+        if not indexes:
+            return {}
+        try:
+            return self._run(self._capture_all(indexes), timeout)
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] CDP capture cycle failed: {str(e)}")
+            return {}
+
+    def close(self):
+        for index in list(self.connections):
+            self.detach(index)
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,111 @@
+import os
+import io
+import html
+import logging
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Режим захвата: одна страница со всеми плеерами группы, один скриншот за цикл
+CAPTURE_COMPOSITE = "composite"
+
+COMPOSITE_ROWS = 3
+COMPOSITE_COLS = 3
+
+
+def build_composite_html(player_urls, rows=COMPOSITE_ROWS, cols=COMPOSITE_COLS):
+    """Страница-сетка из iframe плееров; player_urls — список длиной rows*cols (None — пусто)"""
+    cells = []
+    for i, url in enumerate(player_urls):
+        top = (i // cols) * 100 / rows
+        left = (i % cols) * 100 / cols
+        style = f"top:{top:.4f}%;left:{left:.4f}%;width:{100 / cols:.4f}%;height:{100 / rows:.4f}%"
+        if url:
+            cells.append(f'<iframe src="{html.escape(url)}" style="{style}" allow="autoplay"></iframe>')
+        else:
+            cells.append(f'<div style="{style}"></div>')
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><style>"
+        "html,body{margin:0;padding:0;overflow:hidden;background:#000;width:100vw;height:100vh}"
+        "iframe,div{position:absolute;border:0;margin:0;padding:0}"
+        "</style></head><body>" + "".join(cells) + "</body></html>"
+    )
+
+
+class CompositeCapture:
+    """Один браузер с сеткой плееров текущей группы; кадр режется на ячейки срезами numpy"""
+
+    def __init__(self, driver, rows=COMPOSITE_ROWS, cols=COMPOSITE_COLS):
+        self.driver = driver
+        self.rows = rows
+        self.cols = cols
+        self.player_urls = {}  # ссылка камеры -> адрес плеера из iframe ModalBodyPlayer
+        self.slots = [None] * (rows * cols)
+        # Своя страница у каждого экземпляра: процессы-обработчики не перезаписывают чужие сетки
+        fd, self.page_path = tempfile.mkstemp(prefix="viewcam_composite_", suffix=".html")
+        os.close(fd)
+
+    def resolve_player_url(self, link):
+        """Адрес плеера камеры (src iframe внутри ModalBodyPlayer), кешируется"""
+        if link in self.player_urls:
+            return self.player_urls[link]
+        player_url = None
+        try:
+            self.driver.get(link)
+            element = WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.ID, "ModalBodyPlayer"))
+            )
+            iframe = element.find_element(By.TAG_NAME, "iframe")
+            player_url = iframe.get_attribute("src") or None
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error resolving player for {link}: {str(e)}")
+        if player_url:
+            self.player_urls[link] = player_url
+        return player_url
+
+    def load(self, links):
+        """Собрать страницу для ссылок ячеек; вернуть индексы ячеек, обслуживаемых страницей"""
+        self.slots = [None] * (self.rows * self.cols)
+        for i, link in enumerate(links[:len(self.slots)]):
+            if link:
+                self.slots[i] = self.resolve_player_url(link)
+        with open(self.page_path, "w", encoding="utf-8") as f:
+            f.write(build_composite_html(self.slots, self.rows, self.cols))
+        self.driver.get("file:///" + self.page_path.replace(os.sep, "/").lstrip("/"))
+        served = {i for i, url in enumerate(self.slots) if url}
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Composite page loaded with {len(served)} players")
+        return served
+
+    def capture(self):
+        """Один скриншот страницы -> список тайлов (numpy-срезы без копирования) или None"""
+        png = self.driver.get_screenshot_as_png()
+        frame = np.asarray(Image.open(io.BytesIO(png)).convert("RGB"))
+        height, width, _ = frame.shape
+        tile_height = height // self.rows
+        tile_width = width // self.cols
+        tiles = []
+        for i, url in enumerate(self.slots):
+            if not url:
+                tiles.append(None)
+                continue
+            row, col = divmod(i, self.cols)
+            tiles.append(frame[row * tile_height:(row + 1) * tile_height, col * tile_width:(col + 1) * tile_width])
+        return tiles
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error quitting composite driver: {str(e)}")
+        try:
+            os.remove(self.page_path)
+        except OSError as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error removing composite page {self.page_path}: {str(e)}")
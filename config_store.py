@@ -0,0 +1,167 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import threading
+import time
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+SAVE_DELAY_MS = 500   # изменения за это время записываются одним файлом
+ERROR_POLL_MS = 500   # проверка результата фоновой записи в потоке окна
+
+
+def write_file_atomic(path, text):
+    """Запись через временный файл и атомарную замену: сбой посреди записи не портит файл"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def open_config_store(path="config.json", widget=None, on_error=None):
+    """Хранилище конфигурации: config.json целиком или, если в нём задан "catalog_db",
+    камеры, группы и попытки входа в SQLite, а в config.json — только настройки"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        data = None
+    if data and data.get("catalog_db"):
+        from catalog_store import SqliteConfigStore
+        return SqliteConfigStore(path, data["catalog_db"], widget=widget, data=data, on_error=on_error)
+    return ConfigStore(path, widget=widget, data=data, on_error=on_error)
+
+
+class ConfigStore:
+    """Единственная точка записи config.json. Серия изменений (перемещения в дереве, правки)
+    собирается в один снимок, JSON готовится в потоке окна, а запись идёт в фоне
+    через временный файл и атомарную замену — сбой посреди записи не портит файл.
+    Ошибка записи передаётся on_error(текст) в потоке окна (при закрытии — из flush)"""
+
+    def __init__(self, path="config.json", widget=None, delay_ms=SAVE_DELAY_MS, data=None, on_error=None):
+        self.path = path
+        self._data = data         # уже прочитанный файл: load() не разбирает его повторно
+        self.widget = widget      # Tk-виджет для отложенного снимка (after); None — снимок сразу
+        self.delay_ms = delay_ms
+        self.config = None
+        self.last_error = None
+        self.on_error = on_error
+        self._unreported_error = None  # ошибка записи, ещё не показанная окну
+        self._pending_id = None
+        self._error_check_id = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        # Несохранённые изменения записываются и при выходе через sys.exit
+        atexit.register(self.flush)
+
+    def _read(self):
+        if self._data is not None:
+            data, self._data = self._data, None
+            return data
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.info(f"[{time.strftime('%H:%M:%S')}] {self.path} not found or corrupted: {str(e)}. Creating default config.")
+            return None
+
+    def load(self, default=None):
+        data = self._read()
+        self.config = data if data is not None else (default if default is not None else {})
+        return self.config
+
+    def save(self, config=None):
+        """Запланировать запись; повторные вызовы до записи объединяются"""
+        if config is not None:
+            self.config = config
+        if self.widget is None:
+            self._snapshot()
+            return
+        if self._pending_id is None:
+            self._pending_id = self.widget.after(self.delay_ms, self._snapshot)
+
+    def _snapshot(self, check_error=True):
+        # check_error=False — из flush: окно может быть уже уничтожено (atexit), ошибку
+        # записи flush сообщает сам после ожидания очереди
+        self._pending_id = None
+        if self.config is None:
+            return
+        try:
+            self._queue.put(self._serialize(self.config))
+        except (TypeError, ValueError) as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error serializing config: {str(e)}")
+            return
+        if check_error and self.widget is not None and self.on_error and self._error_check_id is None:
+            self._error_check_id = self.widget.after(ERROR_POLL_MS, self._check_error)
+
+    def _check_error(self):
+        # Окно узнаёт о результате записи, когда очередь опустела
+        self._error_check_id = None
+        if self._queue.unfinished_tasks:
+            self._error_check_id = self.widget.after(ERROR_POLL_MS, self._check_error)
+            return
+        self._report_error()
+
+    def _report_error(self):
+        error, self._unreported_error = self._unreported_error, None
+        if error and self.on_error:
+            try:
+                self.on_error(error)
+            except Exception as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Error reporting config save failure: {str(e)}")
+
+    def flush(self):
+        """Записать отложенные изменения и дождаться окончания записи (закрытие программы)"""
+        if self._pending_id is not None:
+            try:
+                self.widget.after_cancel(self._pending_id)
+            except Exception:
+                pass
+            self._snapshot(check_error=False)
+        if self._error_check_id is not None:
+            try:
+                self.widget.after_cancel(self._error_check_id)
+            except Exception:
+                pass
+            self._error_check_id = None
+        self._queue.join()
+        self._report_error()
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            # Из накопившихся снимков записывается только последний
+            skipped = 0
+            while True:
+                try:
+                    newer = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                skipped += 1
+                data = newer
+            try:
+                self._write(data)
+                if self.last_error is not None:
+                    self._unreported_error = self.last_error
+            finally:
+                for _ in range(skipped + 1):
+                    self._queue.task_done()
+
+    def _serialize(self, config):
+        # Снимок готовится в потоке окна: дальше окно может менять конфигурацию
+        return json.dumps(config, ensure_ascii=False, indent=2)
+
+    def _write(self, data):
+        try:
+            write_file_atomic(self.path, data)
+            self.last_error = None
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Config saved to {self.path}.")
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error saving config: {str(e)}")
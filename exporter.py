@@ -0,0 +1,168 @@
+import io
+import struct
+import logging
+import threading
+import time
+from PIL import Image
+
+from recorder import ArchiveReader
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+AVIF_HASINDEX = 0x10
+AVIIF_KEYFRAME = 0x10
+
+
+def iter_export_frames(link, start, end, replay=None, archive_root=None, step_seconds=0):
+    """Генератор кадров (время, JPEG bytes) за интервал: сначала архив, затем буфер перемотки.
+    step_seconds > 0 — прореживание для таймлапса (не чаще одного кадра за step_seconds)"""
+    last_time = None
+
+    def sources():
+        if archive_root:
+            yield from ArchiveReader(archive_root).iter_frames(link, start, end)
+        if replay:
+            yield from replay.snapshot(link, start, end)
+
+    for frame_time, data in sources():
+        # Кадры буфера, уже попавшие в архив, пропускаем
+        if last_time is not None and frame_time <= last_time:
+            continue
+        if step_seconds and last_time is not None and frame_time - last_time < step_seconds:
+            continue
+        last_time = frame_time
+        yield frame_time, data
+
+
+class MjpegAviWriter:
+    """Потоковая запись AVI (MJPG): кадры пишутся сразу, заголовки дописываются при закрытии"""
+
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps
+        self.file = None
+        self.index = []  # (смещение относительно 'movi', размер) — 8 байт на кадр
+        self.frames = 0
+        self.max_frame = 0
+
+    def _header(self, width, height, frames, max_frame):
+        avih = struct.pack(
+            "<10I16x",
+            int(1000000 / self.fps), max_frame * self.fps, 0, AVIF_HASINDEX,
+            frames, 0, 1, max_frame, width, height
+        )
+        strh = b"vidsMJPG" + struct.pack(
+            "<IHHIIIIIIIIhhhh",
+            0, 0, 0, 0, 1, self.fps, 0, frames, max_frame, 0xFFFFFFFF, 0,
+            0, 0, width, height
+        )
+        strf = struct.pack("<IiiHH4sIiiII", 40, width, height, 1, 24, b"MJPG", width * height * 3, 0, 0, 0, 0)
+        strl = b"strl" + b"strh" + struct.pack("<I", len(strh)) + strh + b"strf" + struct.pack("<I", len(strf)) + strf
+        hdrl = b"hdrl" + b"avih" + struct.pack("<I", len(avih)) + avih + b"LIST" + struct.pack("<I", len(strl)) + strl
+        return b"LIST" + struct.pack("<I", len(hdrl)) + hdrl
+
+    def open(self, width, height):
+        self.width, self.height = width, height
+        self.file = open(self.path, "wb")
+        header = self._header(width, height, 0, 0)
+        self.file.write(b"RIFF" + struct.pack("<I", 0) + b"AVI " + header)
+        self.movi_pos = self.file.tell()
+        self.file.write(b"LIST" + struct.pack("<I", 0) + b"movi")
+
+    def write(self, jpeg_bytes):
+        offset = self.file.tell() - (self.movi_pos + 8)
+        self.file.write(b"00dc" + struct.pack("<I", len(jpeg_bytes)) + jpeg_bytes)
+        if len(jpeg_bytes) % 2:
+            self.file.write(b"\0")
+        self.index.append((offset, len(jpeg_bytes)))
+        self.frames += 1
+        self.max_frame = max(self.max_frame, len(jpeg_bytes))
+
+    def close(self):
+        end_movi = self.file.tell()
+        self.file.write(b"idx1" + struct.pack("<I", len(self.index) * 16))
+        for offset, size in self.index:
+            self.file.write(b"00dc" + struct.pack("<III", AVIIF_KEYFRAME, offset, size))
+        end = self.file.tell()
+        # Размеры RIFF/movi и число кадров известны только сейчас
+        self.file.seek(4)
+        self.file.write(struct.pack("<I", end - 8))
+        self.file.seek(12)
+        self.file.write(self._header(self.width, self.height, self.frames, self.max_frame))
+        self.file.seek(self.movi_pos + 4)
+        self.file.write(struct.pack("<I", end_movi - self.movi_pos - 8))
+        self.file.close()
+
+
+class MjpegRawWriter:
+    """Поток .mjpeg — JPEG-кадры подряд"""
+
+    def __init__(self, path, fps):
+        self.path = path
+        self.frames = 0
+
+    def open(self, width, height):
+        self.file = open(self.path, "wb")
+
+    def write(self, jpeg_bytes):
+        self.file.write(jpeg_bytes)
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+
+class ExportJob:
+    """Экспорт в фоновом потоке; UI опрашивает progress/done/error через after()"""
+
+    def __init__(self, link, start, end, path, fps=10, step_seconds=0, replay=None, archive_root=None):
+        self.link = link
+        self.start_time = start
+        self.end_time = end
+        self.path = path
+        self.fps = fps
+        self.step_seconds = step_seconds
+        self.replay = replay
+        self.archive_root = archive_root
+        self.progress = 0.0
+        self.frames_written = 0
+        self.done = False
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        writer_class = MjpegRawWriter if self.path.lower().endswith((".mjpeg", ".mjpg")) else MjpegAviWriter
+        writer = writer_class(self.path, self.fps)
+        opened = False
+        try:
+            frames = iter_export_frames(self.link, self.start_time, self.end_time, self.replay, self.archive_root, self.step_seconds)
+            duration = max(self.end_time - self.start_time, 1)
+            for frame_time, data in frames:
+                if self._cancel.is_set():
+                    break
+                if not opened:
+                    # Размер кадра — из заголовка первого JPEG (без декодирования изображения)
+                    writer.open(*Image.open(io.BytesIO(data)).size)
+                    opened = True
+                writer.write(data)
+                self.frames_written += 1
+                self.progress = min((frame_time - self.start_time) / duration, 1.0)
+            if opened:
+                writer.close()
+            else:
+                self.error = "Нет кадров за выбранный период"
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Export finished: {self.path}, {self.frames_written} frames")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Export failed for {self.path}: {str(e)}")
+        finally:
+            self.progress = 1.0
+            self.done = True
@@ -0,0 +1,118 @@
+import io
+import os
+import queue
+import logging
+import threading
+import time
+from PIL import Image
+
+from recorder import cam_id
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+FRAME_CACHE_DIR = "frame_cache"   # каталог кэша рядом с config.json ("frame_cache_dir")
+CACHE_TILE = (640, 360)     # наибольший размер кадра в кэше
+CACHE_QUALITY = 70          # качество JPEG
+CACHE_INTERVAL = 30         # сек, не чаще одной записи кадра камеры
+CACHE_SUFFIX = ".jpg"
+CACHE_QUEUE = 32            # кадров в очереди записи, при переполнении кадр пропускается
+
+
+class FrameCache:
+    """Последний кадр каждой камеры на диске: показывается сразу при запуске и смене группы,
+    пока драйвер не дал живой кадр. Уменьшенные JPEG, объём ограничен — при превышении
+    удаляются кадры, записанные раньше всех. Кодирование и запись идут в фоновом потоке"""
+
+    def __init__(self, root=FRAME_CACHE_DIR, max_bytes=32 * 1024 * 1024, interval=CACHE_INTERVAL):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.last_put = {}   # ссылка -> время последней записи
+        self.files = {}      # имя файла -> (размер, время записи)
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=CACHE_QUEUE)
+        try:
+            os.makedirs(root, exist_ok=True)
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+                        stat = entry.stat()
+                        self.files[entry.name] = (stat.st_size, stat.st_mtime)
+                        self.total_bytes += stat.st_size
+        except OSError as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error opening frame cache {root}: {str(e)}")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def get(self, link):
+        """(изображение PIL, время кадра) или None"""
+        name = cam_id(link) + CACHE_SUFFIX
+        with self._lock:
+            entry = self.files.get(name)
+        if entry is None:
+            return None
+        try:
+            with open(os.path.join(self.root, name), "rb") as f:
+                image = Image.open(io.BytesIO(f.read()))
+                image.load()
+            return image, entry[1]
+        except (OSError, ValueError) as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error reading cached frame: {str(e)}")
+            return None
+
+    def put(self, link, image, frame_time=None):
+        """Поставить кадр камеры в очередь записи (не чаще interval секунд на камеру).
+        В очередь идёт копия: кадр может быть представлением общей памяти обработчика"""
+        now = frame_time or time.time()
+        if now - self.last_put.get(link, 0) < self.interval:
+            return
+        self.last_put[link] = now
+        try:
+            self._queue.put_nowait((link, image.copy(), now))
+        except queue.Full:
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Frame cache queue full, frame skipped for {link}")
+
+    def _run(self):
+        while True:
+            self._write(*self._queue.get())
+
+    def _write(self, link, image, now):
+        name = cam_id(link) + CACHE_SUFFIX
+        path = os.path.join(self.root, name)
+        try:
+            tile = image.convert("RGB")
+            tile.thumbnail(CACHE_TILE)
+            buffer = io.BytesIO()
+            tile.save(buffer, format="JPEG", quality=CACHE_QUALITY)
+            data = buffer.getvalue()
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            os.utime(path, (now, now))
+        except (OSError, ValueError) as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error caching frame: {str(e)}")
+            return
+        with self._lock:
+            previous = self.files.get(name)
+            self.total_bytes += len(data) - (previous[0] if previous else 0)
+            self.files[name] = (len(data), now)
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # Удаляются самые старые кадры, пока объём не станет меньше 90% предела
+        with self._lock:
+            oldest = sorted(self.files.items(), key=lambda item: item[1][1])
+        for name, (size, _) in oldest:
+            if self.total_bytes <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Error evicting cached frame: {str(e)}")
+                continue
+            with self._lock:
+                del self.files[name]
+                self.total_bytes -= size
@@ -0,0 +1,157 @@
+import json
+import logging
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from instance_lock import DEFAULT_ENGINE_PORT, ENGINE_HOST
+from recorder import cam_id
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+BOUNDARY = "viewcamframe"
+
+
+class FrameHub:
+    """Последний JPEG по каждой камере; кадр кодируется один раз и отдаётся всем клиентам"""
+
+    def __init__(self):
+        self.frames = {}  # id камеры -> (время, JPEG bytes, номер кадра)
+        self.condition = threading.Condition()
+
+    def publish(self, link, jpeg_bytes, timestamp):
+        with self.condition:
+            previous = self.frames.get(cam_id(link))
+            sequence = previous[2] + 1 if previous else 1
+            self.frames[cam_id(link)] = (timestamp, jpeg_bytes, sequence)
+            self.condition.notify_all()
+
+    def latest(self, camera_id):
+        with self.condition:
+            return self.frames.get(camera_id)
+
+    def wait_next(self, camera_id, sequence, timeout=10):
+        """Дождаться кадра новее sequence (или None по таймауту)"""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: camera_id in self.frames and self.frames[camera_id][2] > sequence,
+                timeout
+            )
+            frame = self.frames.get(camera_id)
+            return frame if frame and frame[2] > sequence else None
+
+
+class FrameRequestHandler(BaseHTTPRequestHandler):
+    """/cams — список камер (JSON), /cams/<id>/snapshot.jpg — последний кадр,
+    /cams/<id>/stream.mjpg — поток multipart MJPEG, /grid — камеры ячеек сетки (JSON),
+    /metrics — счётчики захвата (JSON)"""
+
+    server_version = "viewcam"
+
+    def log_message(self, format, *args):
+        logger.info(f"[{time.strftime('%H:%M:%S')}] HTTP {self.address_string()} {format % args}")
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+        if parts == ["cams"]:
+            self._send_cams()
+        elif parts == ["grid"] and self.server.grid_provider:
+            self._send_grid()
+        elif parts == ["metrics"] and self.server.metrics_provider:
+            self._send_json(self.server.metrics_provider())
+        elif len(parts) == 3 and parts[0] == "cams" and parts[2] == "snapshot.jpg":
+            self._send_snapshot(parts[1])
+        elif len(parts) == 3 and parts[0] == "cams" and parts[2] == "stream.mjpg":
+            self._send_stream(parts[1])
+        else:
+            self._send(404, "text/plain; charset=utf-8", b"Not found")
+
+    def _describe(self, cam):
+        camera_id = cam_id(cam["link"])
+        return {
+            "id": camera_id,
+            "street": cam.get("street"),
+            "link": cam.get("link"),
+            "live": self.server.hub.latest(camera_id) is not None,
+            "snapshot": f"/cams/{camera_id}/snapshot.jpg",
+            "stream": f"/cams/{camera_id}/stream.mjpg",
+        }
+
+    def _send_cams(self):
+        self._send_json([self._describe(cam) for cam in list(self.server.cams_provider())])
+
+    def _send_grid(self):
+        self._send_json([self._describe(cam) if cam else None for cam in list(self.server.grid_provider())])
+
+    def _send_json(self, data):
+        self._send(200, "application/json; charset=utf-8", json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def _send_snapshot(self, camera_id):
+        frame = self.server.hub.latest(camera_id)
+        if not frame:
+            self._send(404, "text/plain; charset=utf-8", b"No frame")
+            return
+        self._send(200, "image/jpeg", frame[1])
+
+    def _send_stream(self, camera_id):
+        hub = self.server.hub
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sequence = 0
+        try:
+            while not self.server.stopping:
+                frame = hub.wait_next(camera_id, sequence)
+                if not frame:
+                    continue
+                _, data, sequence = frame
+                self.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(data)}\r\n\r\n".encode("ascii")
+                )
+                self.wfile.write(data)
+                self.wfile.write(b"\r\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+
+class FrameServer:
+    """Локальный HTTP-сервер, переиздающий захваченные кадры без дополнительных захватов"""
+
+    def __init__(self, hub, cams_provider, host=ENGINE_HOST, port=DEFAULT_ENGINE_PORT, metrics_provider=None,
+                 grid_provider=None, sock=None):
+        # sock — уже занятый и слушающий сокет блокировки движка (instance_lock)
+        self.httpd = ThreadingHTTPServer((host, port), FrameRequestHandler, bind_and_activate=sock is None)
+        if sock is not None:
+            self.httpd.socket.close()
+            self.httpd.socket = sock
+            self.httpd.server_address = sock.getsockname()
+        self.httpd.daemon_threads = True
+        self.httpd.hub = hub
+        self.httpd.cams_provider = cams_provider
+        self.httpd.metrics_provider = metrics_provider
+        self.httpd.grid_provider = grid_provider
+        self.httpd.stopping = False
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        host, port = self.httpd.server_address[:2]
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Frame server listening on http://{host}:{port}/cams")
+
+    def stop(self):
+        self.httpd.stopping = True
+        self.httpd.shutdown()
+        self.httpd.server_close()
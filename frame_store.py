@@ -0,0 +1,97 @@
+import logging
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from PIL import Image
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+CHANNELS = 4          # RGBA: PIL отображает такой буфер без копирования (альфа всегда 255)
+HEADER_FIELDS = 3     # номер кадра, ширина, высота — на каждый из двух буферов ячейки
+
+
+def attach_shared_memory(name):
+    """Подключение к существующему блоку без передачи владения (блок удаляет только создатель)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: обработчики запускаются создателем блока и используют его трекер ресурсов,
+        # повторная регистрация имени блок не удаляет
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameStore:
+    """Кадры ячеек в общей памяти: на ячейку два буфера фиксированного размера (двойная буферизация)
+    и номер кадра. Обработчик пишет в неактивный буфер, окно читает активный как numpy-представление.
+    Объём задаётся один раз: ячейки x 2 x max_width x max_height x 4 байта"""
+
+    def __init__(self, cells, max_width, max_height, name=None):
+        self.cells = cells
+        self.max_width = max_width
+        self.max_height = max_height
+        self.slot_bytes = max_width * max_height * CHANNELS
+        header_bytes = cells * 2 * HEADER_FIELDS * 8
+        size = header_bytes + cells * 2 * self.slot_bytes
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.name = self.shm.name
+        self.headers = np.ndarray((cells, 2, HEADER_FIELDS), dtype=np.uint64, buffer=self.shm.buf)
+        self.pixels = np.ndarray(
+            (cells, 2, max_height, max_width, CHANNELS), dtype=np.uint8,
+            buffer=self.shm.buf, offset=header_bytes
+        )
+        if self.owner:
+            self.headers.fill(0)
+            self.pixels.fill(255)
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Shared frame store: {size // (1024 * 1024)} MB for {cells} cells {max_width}x{max_height}")
+
+    def fits(self, size):
+        return size[0] <= self.max_width and size[1] <= self.max_height
+
+    def _latest(self, cell):
+        return int(np.argmax(self.headers[cell, :, 0]))
+
+    def write(self, cell, pil_image):
+        """Записать кадр RGB ячейки в неактивный буфер; вернуть номер кадра"""
+        width, height = pil_image.size
+        buffer = 1 - self._latest(cell)
+        sequence = int(self.headers[cell, :, 0].max()) + 1
+        # Пишутся только каналы RGB, альфа-канал заполнен при создании
+        np.copyto(self.pixels[cell, buffer, :height, :width, :3], np.asarray(pil_image.convert("RGB")))
+        self.headers[cell, buffer, 1] = width
+        self.headers[cell, buffer, 2] = height
+        # Номер кадра пишется последним: буфер становится активным после записи пикселей
+        self.headers[cell, buffer, 0] = sequence
+        return sequence
+
+    def view(self, cell):
+        """(номер кадра, numpy-представление HxWx4 активного буфера) без копирования"""
+        buffer = self._latest(cell)
+        sequence, width, height = (int(v) for v in self.headers[cell, buffer])
+        if not sequence:
+            return 0, None
+        return sequence, self.pixels[cell, buffer, :height, :width]
+
+    def image(self, cell):
+        """Кадр ячейки как изображение PIL поверх общей памяти (действительно до следующих двух записей)"""
+        buffer = self._latest(cell)
+        sequence, width, height = (int(v) for v in self.headers[cell, buffer])
+        if not sequence:
+            return None
+        # Строки слота длиннее кадра: шаг строки — полная ширина слота
+        rows = self.pixels[cell, buffer, :height]
+        return Image.frombuffer("RGBA", (width, height), rows, "raw", "RGBA", self.max_width * CHANNELS, 1)
+
+    def close(self):
+        # Представления numpy держат буфер: освобождаются до закрытия блока
+        self.headers = self.pixels = None
+        try:
+            if self.owner:
+                self.shm.unlink()
+            self.shm.close()
+        except (BufferError, FileNotFoundError) as e:
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Error closing shared frame store: {str(e)}")
@@ -0,0 +1,87 @@
+import os
+import json
+import signal
+import logging
+import threading
+import time
+
+from capture_engine import GRID_SIZE, FRAME_NEW, grid_cams
+from capture_workers import create_capture_engine
+from recorder import cam_id
+from config_store import open_config_store
+from instance_lock import frame_server_enabled
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+METRICS_LOG_SECONDS = 60  # период записи счётчиков в журнал
+
+
+class HeadlessService:
+    """Фоновый режим без Tk и авторизации: цикл захвата по текущей группе config.json,
+    кадры и счётчики — через HTTP-сервер кадров и/или в каталог снимков"""
+
+    def __init__(self, config_path="config.json", port=None, snapshot_dir=None, listen_socket=None):
+        self.config_path = config_path
+        self.listen_socket = listen_socket
+        self.port = port
+        self.snapshot_dir = snapshot_dir
+        self.stop_event = threading.Event()
+        self.engine = None
+
+    def load_config(self):
+        # Каталог камер может храниться в SQLite ("catalog_db"), читается тем же хранилищем, что и в окне
+        config = open_config_store(self.config_path).load()
+        if self.port is not None:
+            config["frame_server_port"] = self.port
+        return config
+
+    def _on_signal(self, signum, frame):
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Signal {signum} received, stopping capture")
+        self.stop_event.set()
+
+    def _write_file(self, name, data):
+        # Запись через временный файл: читатель каталога не видит недописанный снимок
+        path = os.path.join(self.snapshot_dir, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def _write_snapshots(self, results):
+        for index, (status, _, _) in results.items():
+            cam = self.engine.cams[index]
+            if status != FRAME_NEW:
+                continue
+            frame = self.engine.frame_hub.latest(cam_id(cam["link"]))
+            if frame:
+                self._write_file(f"{cam_id(cam['link'])}.jpg", frame[1])
+        self._write_file("metrics.json", json.dumps(self.engine.metrics_snapshot(), ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._on_signal)
+        signal.signal(signal.SIGTERM, self._on_signal)
+        config = self.load_config()
+        if not frame_server_enabled(config) and not self.snapshot_dir:
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Headless mode without frame server port and snapshot dir: frames are only recorded")
+        if self.snapshot_dir:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+        self.engine = create_capture_engine(config, listen_socket=self.listen_socket)
+        try:
+            self.engine.load_grid(grid_cams(config))
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Headless capture started: {sum(1 for cam in self.engine.cams if cam)} cameras")
+            last_metrics_log = time.time()
+            while not self.stop_event.is_set():
+                started = time.time()
+                results = self.engine.capture(range(GRID_SIZE))
+                if self.snapshot_dir:
+                    try:
+                        self._write_snapshots(results)
+                    except OSError as e:
+                        logger.error(f"[{time.strftime('%H:%M:%S')}] Error writing snapshots: {str(e)}")
+                if started - last_metrics_log >= METRICS_LOG_SECONDS:
+                    logger.info(f"[{time.strftime('%H:%M:%S')}] Capture metrics: {self.engine.metrics_snapshot()}")
+                    last_metrics_log = started
+                self.stop_event.wait(max(self.engine.period / 1000 - (time.time() - started), 0))
+        finally:
+            self.engine.close()
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Headless capture stopped")
@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+import http.client
+from urllib.parse import urlsplit
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Типы источников камеры (поле "source" в записи config["cams"])
+SOURCE_UFANET = "ufanet"  # страница плеера ufanet в headless Chrome (по умолчанию)
+SOURCE_HTTP = "http"      # прямой JPEG-снимок или MJPEG-поток по HTTP
+
+SOURCE_TYPES = [SOURCE_UFANET, SOURCE_HTTP]
+
+
+def cam_source(cam):
+    """Тип источника камеры, для старых записей без поля source — ufanet"""
+    if not cam:
+        return None
+    return cam.get("source", SOURCE_UFANET)
+
+
+class HttpConnectionPool:
+    """Пул keep-alive соединений, сгруппированных по (схема, хост, порт)"""
+
+    def __init__(self, max_idle_per_host=4, timeout=10):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _key(self, parts):
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return (parts.scheme, parts.hostname, port)
+
+    def acquire(self, url):
+        """Вернуть (key, conn, path) — свободное соединение из пула или новое"""
+        parts = urlsplit(url)
+        key = self._key(parts)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return key, idle.pop(), path
+        conn_class = http.client.HTTPSConnection if key[0] == "https" else http.client.HTTPConnection
+        return key, conn_class(key[1], key[2], timeout=self.timeout), path
+
+    def release(self, key, conn, reusable=True):
+        """Вернуть соединение в пул (или закрыть, если оно больше не пригодно)"""
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._idle.clear()
+
+
+class HttpCameraSource:
+    """Фоновое получение кадров одной HTTP-камеры (JPEG-снимок или MJPEG)"""
+
+    def __init__(self, pool, url, interval=1.0):
+        self.pool = pool
+        self.url = url
+        self.interval = interval
+        self.frame_bytes = None
+        self.frame_time = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def latest(self):
+        """Последний полученный кадр (bytes JPEG, время получения) или (None, None)"""
+        with self._lock:
+            return self.frame_bytes, self.frame_time
+
+    def _store(self, data):
+        with self._lock:
+            self.frame_bytes = data
+            self.frame_time = time.time()
+            self.error = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            key, conn, path = self.pool.acquire(self.url)
+            reusable = False
+            try:
+                conn.request("GET", path, headers={"Connection": "keep-alive"})
+                response = conn.getresponse()
+                if response.status != 200:
+                    response.read()
+                    raise IOError(f"HTTP {response.status}")
+                content_type = response.getheader("Content-Type", "")
+                if content_type.startswith("multipart/"):
+                    # MJPEG: соединение занято потоком до остановки источника
+                    self._read_mjpeg(response, content_type)
+                else:
+                    self._store(response.read())
+                    reusable = not response.will_close
+            except Exception as e:
+                with self._lock:
+                    self.error = str(e)
+                logger.error(f"[{time.strftime('%H:%M:%S')}] HTTP source error for {self.url}: {str(e)}")
+            finally:
+                self.pool.release(key, conn, reusable)
+            self._stop.wait(self.interval)
+
+    def _read_mjpeg(self, response, content_type):
+        boundary = None
+        for part in content_type.split(";"):
+            part = part.strip()
+            if part.startswith("boundary="):
+                boundary = part[len("boundary="):].strip('"')
+        if boundary and not boundary.startswith("--"):
+            boundary = "--" + boundary
+        boundary = boundary.encode("latin-1") if boundary else b"--"
+        at_part = False  # граница уже прочитана (после части без Content-Length)
+        while not self._stop.is_set():
+            if not at_part:
+                line = response.readline()
+                if not line:
+                    return
+                if not line.strip().startswith(boundary):
+                    continue
+            at_part = False
+            # Заголовки части до пустой строки
+            length = None
+            while True:
+                header = response.readline()
+                if not header or header in (b"\r\n", b"\n"):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value.strip())
+            if length is not None:
+                data = response.read(length)
+            else:
+                # Без Content-Length: читаем строки до следующей границы
+                buf = bytearray()
+                while not self._stop.is_set():
+                    line = response.readline()
+                    if not line:
+                        return
+                    if line.strip().startswith(boundary):
+                        at_part = True
+                        break
+                    buf += line
+                data = bytes(buf).rstrip(b"\r\n")
+            if data:
+                self._store(data)
+
+
+class HttpSourceManager:
+    """Набор HTTP-источников для текущей группы с общим пулом соединений"""
+
+    def __init__(self, interval=1.0):
+        self.pool = HttpConnectionPool()
+        self.interval = interval
+        self.sources = {}
+
+    def sync(self, urls):
+        """Запустить источники для urls и остановить лишние"""
+        urls = set(u for u in urls if u)
+        for url in list(self.sources):
+            if url not in urls:
+                self.sources.pop(url).stop()
+        for url in urls:
+            if url not in self.sources:
+                source = HttpCameraSource(self.pool, url, self.interval)
+                source.start()
+                self.sources[url] = source
+                logger.info(f"[{time.strftime('%H:%M:%S')}] HTTP source started for {url}")
+
+    def set_interval(self, interval):
+        self.interval = interval
+        for source in self.sources.values():
+            source.interval = interval
+
+    def latest(self, url):
+        source = self.sources.get(url)
+        if not source:
+            return None, None
+        return source.latest()
+
+    def stop_all(self):
+        for source in self.sources.values():
+            source.stop()
+        self.sources.clear()
+        self.pool.close_all()
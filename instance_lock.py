@@ -0,0 +1,65 @@
+import json
+import socket
+import logging
+import time
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Порт блокировки движка занят всегда; сервер кадров (окна просмотра, /metrics) работает на нём,
+# пока не выключен ключом "frame_server": false — тогда порт служит только блокировкой
+DEFAULT_ENGINE_PORT = 8765  # порт, если "frame_server_port" не задан
+ENGINE_HOST = "127.0.0.1"
+
+
+def read_config(path="config.json"):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def engine_address(config):
+    """Адрес сервера кадров движка: он же блокировка единственного экземпляра"""
+    return config.get("frame_server_host", ENGINE_HOST), config.get("frame_server_port") or DEFAULT_ENGINE_PORT
+
+
+def frame_server_enabled(config):
+    return bool(config.get("frame_server", True))
+
+
+def connect_host(host):
+    # Сервер на всех интерфейсах доступен второму окну через петлевой адрес
+    return ENGINE_HOST if host in ("", "0.0.0.0") else host
+
+
+def acquire_engine_socket(host, port):
+    """Занять порт движка (на всех ОС, без мьютексов Windows). Сокет сразу слушает —
+    второй запуск отличает работающий движок от порта, занятого чужой программой;
+    None — порт уже занят"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+        # Windows: SO_REUSEADDR позволил бы второму процессу занять тот же порт
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+    else:
+        # POSIX: второй слушающий сокет всё равно не создаётся, а порт не ждёт TIME_WAIT
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((host, port))
+        sock.listen(16)
+    except OSError as e:
+        sock.close()
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Engine port {host}:{port} is busy: {str(e)}")
+        return None
+    logger.info(f"[{time.strftime('%H:%M:%S')}] Engine lock acquired on {host}:{port}")
+    return sock
+
+
+def engine_listening(host, port, timeout=2):
+    """Слушает ли кто-то порт движка (работающий экземпляр, возможно ещё на экране входа)"""
+    try:
+        with socket.create_connection((connect_host(host), port), timeout=timeout):
+            return True
+    except OSError:
+        return False
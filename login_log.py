@@ -0,0 +1,117 @@
+import os
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+LOGIN_LOG_DIR = "logins"    # каталог журнала рядом с config.json ("login_log_dir")
+RETENTION_DAYS = 7          # сколько дней хранятся попытки входа
+SEGMENT_PREFIX = "login-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class LoginLog:
+    """Журнал попыток входа: только дозапись строк JSON в файл текущих суток.
+    Старые записи удаляются целыми файлами-сутками, config.json при входе не переписывается"""
+
+    def __init__(self, directory=LOGIN_LOG_DIR, retention_days=RETENTION_DAYS):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.pruned_day = None    # сутки последней очистки: следующая — при смене суток
+
+    def segment_path(self, day):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{day.isoformat()}{SEGMENT_SUFFIX}")
+
+    def segments(self):
+        """(сутки, путь) файлов журнала по возрастанию даты"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        result = []
+        for name in names:
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    day = datetime.strptime(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)], "%Y-%m-%d").date()
+                except ValueError:
+                    continue
+                result.append((day, os.path.join(self.directory, name)))
+        return sorted(result)
+
+    def append(self, user, success, timestamp=None):
+        timestamp = timestamp or datetime.now().isoformat()
+        day = datetime.fromisoformat(timestamp).date()
+        if day != self.pruned_day:
+            # Новые сутки — новый файл, заодно удаляются устаревшие
+            self.prune()
+        self._write(day, [{"user": user, "timestamp": timestamp, "success": success}])
+
+    def _write(self, day, entries):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.segment_path(day), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error writing login log: {str(e)}")
+
+    def prune(self):
+        """Удалить файлы журнала старше срока хранения"""
+        today = datetime.now().date()
+        self.pruned_day = today
+        cutoff = today - timedelta(days=self.retention_days)
+        removed = 0
+        for day, path in self.segments():
+            if day >= cutoff:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Error removing login log {path}: {str(e)}")
+        if removed:
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Removed {removed} old login log segments.")
+
+    def entries(self, since=None):
+        """Записи журнала начиная с даты since (по умолчанию — весь срок хранения)"""
+        result = []
+        for day, path in self.segments():
+            if since and day < since.date():
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            result.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue  # строка, оборванная при сбое
+            except OSError as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Error reading login log {path}: {str(e)}")
+        return result
+
+    def import_attempts(self, attempts):
+        """Перенос списка "login_attempts" из config.json в журнал (по файлу на сутки);
+        возвращает число перенесённых попыток"""
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        by_day = {}
+        moved = 0
+        for attempt in attempts:
+            try:
+                moment = datetime.fromisoformat(attempt["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if moment > cutoff:
+                entry = {"user": attempt.get("user"), "timestamp": attempt["timestamp"], "success": attempt.get("success", False)}
+                by_day.setdefault(moment.date(), []).append(entry)
+                moved += 1
+        for day, entries in sorted(by_day.items()):
+            self._write(day, entries)
+        logger.info(
+            f"[{time.strftime('%H:%M:%S')}] Moved {moved} login attempts from config to login log "
+            f"({len(attempts) - moved} older than {self.retention_days} days dropped)."
+        )
+        return moved
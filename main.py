@@ -1,54 +1,66 @@
+from startup_timing import mark_phase  # первым: отсчёт этапов запуска
+
 import sys
-import os
 import logging
 import time
-import json
-import re
-import tkinter as tk
-from tkinter import ttk, messagebox, Toplevel, Label, Entry, Button
-from tkinter.font import Font
-from PIL import Image, ImageTk
-import io
-import numpy as np
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-from main_app import MainApp
-
-# Добавлено для проверки мьютекса (запрет запуска второй копии)
-import ctypes
-from ctypes import wintypes
-
-# Настройка логирования (используем существующий logger)
-logging.basicConfig(filename='app.log', level=logging.INFO, force=True)
-logger = logging.getLogger(__name__)
+import argparse
+import multiprocessing
 
-# Функции для Windows API
-kernel32 = ctypes.windll.kernel32
-CreateMutex = kernel32.CreateMutexW
-CreateMutex.argtypes = [wintypes.LPCVOID, wintypes.BOOL, wintypes.LPCWSTR]
-CreateMutex.restype = wintypes.HANDLE
+from instance_lock import read_config, engine_address, acquire_engine_socket, engine_listening, frame_server_enabled
 
-GetLastError = kernel32.GetLastError
-GetLastError.argtypes = []
-GetLastError.restype = wintypes.DWORD
+logger = logging.getLogger(__name__)
 
-ERROR_ALREADY_EXISTS = 183
 
 if __name__ == "__main__":
-    # Проверка на запуск второй копии
-    mutex_name = "OrenburgCameraViewerMutex"  # Уникальное имя мьютекса
-    handle = CreateMutex(None, False, mutex_name)
-    if GetLastError() == ERROR_ALREADY_EXISTS:
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Attempt to launch second instance detected. Exiting.")
-        print("Application is already running.")
-        sys.exit(0)
+    # Процессы-обработчики захвата (capture_workers) в собранном exe
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Просмотр камер ufanet")
+    parser.add_argument("--headless", action="store_true", help="фоновый режим захвата без окна и авторизации")
+    parser.add_argument("--config", default="config.json", help="файл конфигурации (для --headless)")
+    parser.add_argument("--port", type=int, help="порт HTTP-сервера кадров (для --headless)")
+    parser.add_argument("--snapshot-dir", help="каталог для последних кадров и metrics.json (для --headless)")
+    args = parser.parse_args()
+
+    if args.headless:
+        # Tk не импортируется: режим работает на сервере без дисплея
+        from headless import HeadlessService
     else:
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Mutex created successfully. Launching application.")
+        from main_app import MainApp
+
+    # Настройка логирования (после импорта main_app, который задаёт свой уровень)
+    logging.basicConfig(filename='app.log', level=logging.INFO, force=True)
+    mark_phase("imports")
+
+    # Единственный движок захвата на машину: блокировка — занятый порт сервера кадров
+    config = read_config(args.config if args.headless else "config.json")
+    host, port = engine_address(config)
+    if args.headless and args.port:
+        port = args.port
+    engine_socket = acquire_engine_socket(host, port)
+    if engine_socket is None and not engine_listening(host, port):
+        # Порт занят чужой программой: работаем без блокировки и без окна просмотра,
+        # сервер кадров на занятом порту не запустится (ошибка только в журнале)
+        logger.warning(f"[{time.strftime('%H:%M:%S')}] Engine port {port} is used by another program. "
+                       f"Starting without the instance lock.")
+        print(f"Port {port} is used by another program: starting without the instance lock.")
+    elif engine_socket is None:
+        if args.headless or not frame_server_enabled(config):
+            # Без сервера кадров окну просмотра подключаться не к чему
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Capture engine is already running. Exiting.")
+            print("Capture engine is already running.")
+            sys.exit(0)
+        # Второй запуск: окно просмотра кадров работающего движка вместо ещё 9 браузеров
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Capture engine is already running. Launching viewer.")
+        from viewer import ViewerApp
+        viewer = ViewerApp(host, port, period_ms=config.get("period", 1) * 1000)
+        viewer.mainloop()
+        sys.exit(0)
+
+    if args.headless:
+        logging.getLogger().addHandler(logging.StreamHandler())
+        HeadlessService(args.config, port=args.port, snapshot_dir=args.snapshot_dir, listen_socket=engine_socket).run()
+        sys.exit(0)
 
-    app = MainApp()
-    app.mainloop()
\ No newline at end of file
+    mark_phase("engine lock")
+    app = MainApp(engine_socket=engine_socket)
+    app.mainloop()
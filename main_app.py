@@ -1,46 +1,75 @@
 import sys
 import os
 import logging
+import threading
 import time
 import json
-import numpy as np
+from types import SimpleNamespace
 import re
 import io
 import tkinter as tk
 from tkinter import ttk, Button
 from tkinter.font import Font
 from tkinter import ttk, messagebox, Toplevel, Label, Entry, Button
-from PIL import Image, ImageTk
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 
-from ui_components import CellFrame, CameraDialog, clean_config_data, open_ufanet_map, compact_grid, save_config, ui_main_render, resource_path
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from auth import IntroWindow, ChangePasswordWindow  # Добавлен импорт для IntroWindow
+from auth import IntroWindow, ChangePasswordWindow, resource_path  # Добавлен импорт для IntroWindow
+from camera_registry import CAM_ITEM, GROUP_ITEM
+from config_store import open_config_store
+from startup_timing import mark_phase
 
 
 # Настройка logging в файл
 logging.basicConfig(filename='app.log', level=logging.ERROR, force=True)
 logger = logging.getLogger(__name__)
 
+TREE_EXPAND_LIMIT = 300  # камер в дереве, при большем числе группы раскрываются по требованию
+MODULES_POLL_MS = 100    # проверка фоновой загрузки модулей окна
+THREAD_POLL_MS = 100     # проверка окончания упреждающего запуска и закрытия драйверов
+
+
+def load_ui_modules():
+    """Импорт модулей главного окна и захвата (PIL, selenium, numpy) — в фоновом потоке,
+    пока открыт экран входа; возвращает пространство имён с нужными окну объектами"""
+    from PIL import Image, ImageTk
+    from ui_components import CellFrame, save_config, ui_main_render
+    from capture_engine import FRAME_NEW, FRAME_NOCAM, FRAME_NOCONNECT, display_tile
+    from capture_workers import create_capture_engine
+    from frame_cache import FrameCache, FRAME_CACHE_DIR
+    return SimpleNamespace(
+        Image=Image, ImageTk=ImageTk,
+        CellFrame=CellFrame, save_config=save_config, ui_main_render=ui_main_render,
+        FRAME_NEW=FRAME_NEW, FRAME_NOCAM=FRAME_NOCAM, FRAME_NOCONNECT=FRAME_NOCONNECT, display_tile=display_tile,
+        create_capture_engine=create_capture_engine,
+        FrameCache=FrameCache, FRAME_CACHE_DIR=FRAME_CACHE_DIR,
+    )
+
+
 class MainApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, engine_socket=None):
         super().__init__()
+        # Сокет блокировки движка: на нём сервер кадров принимает вторые окна программы
+        self.engine_socket = engine_socket
 
         # Установка иконки окна
         self.iconbitmap(resource_path("resource/eye.ico"))
-        
-        # Загрузка оригинальных изображений заглушек
-        self.original_nocam_image = Image.open(resource_path("resource/nocam.png"))
-        self.original_noconnect_image = Image.open(resource_path("resource/noconnect.png"))
-        # Инициальные PhotoImage (без ресайза или с дефолтным, но update_frames обработает)
-        self.nocam_photo = ImageTk.PhotoImage(self.original_nocam_image)
-        self.noconnect_photo = ImageTk.PhotoImage(self.original_noconnect_image)
+
+        # Модули окна и захвата загружаются в фоне: экран входа показывается сразу после Tk
+        self.ui_ready = False
+        self.modules_error = None
+        self.modules = None  # load_ui_modules(), после загрузки
+        self.modules_thread = threading.Thread(target=self._load_modules, daemon=True)
+        self.modules_thread.start()
+        # Упреждающий запуск драйверов текущей группы, пока вводится пароль
+        self.engine = None
+        self.warmup_thread = None
+        self.warmup_cancelled = threading.Event()
+        self.logged_in = False
+        self.capture_ready = False  # движок принадлежит окну: упреждающая загрузка закончена
 
         self.config = None  # Инициализируем config, будет установлен в IntroWindow
+        # Все записи config.json идут через одно хранилище: объединяются и пишутся в фоне
+        # (при "catalog_db" камеры, группы и попытки входа — в SQLite)
+        self.config_store = open_config_store("config.json", widget=self, on_error=self._on_config_error)
         
         # Добавлено для ролей: переменная для хранения роли (по умолчанию None)
         self.user_role = None  # Добавлено для ролей
@@ -52,19 +81,121 @@ class MainApp(tk.Tk):
         self.intro_window.deiconify()
         self.intro_window.focus_set()
         self.intro_window.password_entry.focus_set()
+        # Вход не состоялся (отмена, исчерпаны попытки) — упреждающий запуск сворачивается
+        self.intro_window.bind("<Destroy>", self._on_intro_destroy)
+        mark_phase("login window")
 
-        ui_main_render(self)
-        
-    def save_config(self):
-        import logging
-        logger = logging.getLogger(__name__)
+        self.after(MODULES_POLL_MS, self._poll_modules)
+
+    def _load_modules(self):
         try:
-            with open("config.json", "w", encoding="utf-8") as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
-            logger.info(f"[{time.strftime('%H:%M:%S')}] Config saved to config.json.")
+            self.modules = load_ui_modules()
+            mark_phase("modules loaded")
+        except Exception as e:
+            self.modules_error = e
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error loading application modules: {str(e)}")
+
+    def _poll_modules(self):
+        if self.modules_thread.is_alive():
+            self.after(MODULES_POLL_MS, self._poll_modules)
+            return
+        self.finish_startup()
+
+    def finish_startup(self):
+        """Построение главного окна (скрытого): как только загружены модули или, если пароль
+        введён раньше, при входе — тогда ожидается окончание загрузки"""
+        if self.ui_ready:
+            return
+        self.modules_thread.join()
+        if self.modules_error:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить модули программы: {self.modules_error}")
+            self.config_store.flush()
+            self.destroy()
+            sys.exit(1)
+        # Загрузка оригинальных изображений заглушек
+        self.original_nocam_image = self.modules.Image.open(resource_path("resource/nocam.png"))
+        self.original_noconnect_image = self.modules.Image.open(resource_path("resource/noconnect.png"))
+        self.modules.ui_main_render(self)
+        # Последние кадры камер на диске — показываются сразу, пока драйверы открывают камеры
+        self.frame_cache = self.modules.FrameCache(
+            self.config.get("frame_cache_dir", self.modules.FRAME_CACHE_DIR),
+            max_bytes=int(self.config.get("frame_cache_mb", 32)) * 1024 * 1024
+        )
+        self.ui_ready = True
+        mark_phase("main window built")
+        if not self.logged_in and self.config.get("speculative_warmup", True):
+            self.start_warmup()
+
+    def start_warmup(self):
+        """Драйверы создаются и открывают камеры текущей группы в фоне, пока открыт экран входа;
+        сервер кадров запускается только после входа"""
+        if self.warmup_cancelled.is_set():
+            return  # окно входа уже закрыто
+        current_group = self.registry.current_group()
+        cams = self.registry.grid_cams(current_group) if current_group else None
+        self.warmup_thread = threading.Thread(target=self._warmup, args=(cams,), daemon=True)
+        self.warmup_thread.start()
+
+    def _warmup(self, cams):
+        try:
+            self.engine = self.modules.create_capture_engine(
+                self.config, period_ms=self.period, cams_provider=lambda: self.cams, serve=False
+            )
+            mark_phase("drivers started")
+            if cams and not self.warmup_cancelled.is_set():
+                self.engine.load_grid(cams)
+                mark_phase("drivers warmed up")
         except Exception as e:
-            logger.error(f"[{time.strftime('%H:%M:%S')}] Error saving config: {str(e)}")
-            messagebox.showerror("Ошибка", "Не удалось сохранить конфигурацию")
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error warming up drivers: {str(e)}")
+
+    def stop_warmup(self, on_stopped=None):
+        """Загрузка прерывается после текущей ячейки; ожидание потока и закрытие браузеров
+        идут в фоне, окно не блокируется. on_stopped вызывается в потоке окна по окончании"""
+        self.warmup_cancelled.set()
+        if self.engine:
+            self.engine.load_aborted = True
+        warmup_thread, self.warmup_thread = self.warmup_thread, None
+
+        def teardown():
+            if warmup_thread:
+                warmup_thread.join()
+            if self.engine:
+                self.engine.close()
+                self.engine = None
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Speculative warm-up stopped")
+
+        thread = threading.Thread(target=teardown, daemon=True)
+        thread.start()
+        self.after_thread(thread, on_stopped)
+
+    def after_thread(self, thread, callback):
+        """Вызвать callback в потоке окна, когда поток thread завершится (опрос через after)"""
+        if thread and thread.is_alive():
+            self.after(THREAD_POLL_MS, self.after_thread, thread, callback)
+        elif callback:
+            callback()
+
+    def _on_intro_destroy(self, event):
+        if event.widget is not self.intro_window or self.logged_in:
+            return
+        self.config_store.flush()
+        # Главное окно скрыто — без входа программа завершается, а не остаётся в фоне
+        try:
+            self.stop_warmup(on_stopped=self._destroy_app)
+        except tk.TclError:
+            pass  # главное окно уже закрывается
+
+    def _destroy_app(self):
+        try:
+            self.destroy()
+        except tk.TclError:
+            pass  # главное окно уже закрыто
+        
+    def save_config(self):
+        self.config_store.save(self.config)
+
+    def _on_config_error(self, error):
+        messagebox.showerror("Ошибка", f"Не удалось сохранить конфигурацию: {error}")
 
     def _open_password_window(self):
         import logging
@@ -96,10 +227,12 @@ class MainApp(tk.Tk):
         logger.info(f"[{time.strftime('%H:%M:%S')}] ChangePasswordWindow closed, success={change_window.success}")                
         
     def setup_app(self):
+        self.finish_startup()
+        mark_phase("login")
         self.cells = []
         for i in range(3):
             for j in range(3):
-                cell = CellFrame(self.camera_frame, i * 3 + j)
+                cell = self.modules.CellFrame(self.camera_frame, i * 3 + j)
                 cell.grid(row=i, column=j, sticky="nsew")
                 cell.config(width=self.cell_width, height=self.cell_height)
                 self.cells.append(cell)
@@ -107,34 +240,17 @@ class MainApp(tk.Tk):
                 self.camera_frame.columnconfigure(j, weight=1)
         
         # Инициализация ячеек
-        current_group = next((g for g in self.groups if g.get("current", False)), self.groups[0] if self.groups else {})
-        current_grid = current_group.get("grid", [None] * 9)
-        for i in range(9):
-            link = current_grid[i] if i < len(current_grid) else None
-            if link:
-                for cam in self.cams:
-                    if cam["link"] == link:
-                        self.cells[i].cam = cam
-                        break
-            else:
-                self.cells[i].cam = None
+        current_group = self.registry.current_group() or (self.groups[0] if self.groups else None)
+        for i, cam in enumerate(self.registry.grid_cams(current_group)):
+            self.cells[i].cam = cam
             self.cells[i].update_display()
+            self._show_cached_frame(self.cells[i])
         
-        self.driver_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chromedriver.exe")
-        self.options = Options()
-        self.options.add_argument('--headless=new')
-        self.options.add_argument('--disable-gpu')
-        self.options.add_argument('--window-size=1920,1080')
-        self.options.add_argument('--no-sandbox')
-        self.options.add_argument('--disable-dev-shm-usage')
-        
-        self.initialize_drivers()
-        
-        self.start_load_group_to_drivers()
-        
-        self.update_frames()
-        
+        self.logged_in = True
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Драйверы уже запущены во время ввода пароля: окончание загрузки ожидается без
+        # блокировки окна, до него ячейки показывают кадры из кэша
+        self.after_thread(self.warmup_thread, self.start_capture)
         
         # прячем окно авторизации показываем основное окно
         self.intro_window.withdraw()
@@ -151,6 +267,29 @@ class MainApp(tk.Tk):
         else:  # Добавлено для ролей
             logger.info(f"[{time.strftime('%H:%M:%S')}] Admin role detected: showing all controls")  # Добавлено для ролей
         
+    def start_capture(self):
+        # Захват кадров (драйверы, источники, буферы) — без Tk, окно только отображает результаты;
+        # при "capture_workers" > 0 захват и обработка идут в отдельных процессах
+        if self.warmup_cancelled.is_set():
+            return  # окно закрыто во время упреждающей загрузки
+        self.warmup_thread = None
+        if self.engine is None:
+            self.engine = self.modules.create_capture_engine(
+                self.config, period_ms=self.period, cams_provider=lambda: self.cams, serve=False
+            )
+        self.engine.set_period(self.period)
+        self.engine.start_frame_server(self.engine_socket)
+        self.engine.set_tile_size(self._grid_tile_size())
+        self.capture_ready = True
+        
+        if self.engine.cams != [cell.cam for cell in self.cells]:
+            self.start_load_group_to_drivers()
+        mark_phase("capture started")
+        
+        if self.update_frames_id:
+            self.after_cancel(self.update_frames_id)
+        self.update_frames()
+
     def on_resize(self, event):
             # Debounce: отменяем предыдущий вызов и планируем новый
             if self.resize_id:
@@ -207,7 +346,7 @@ class MainApp(tk.Tk):
             logger.info(f"[{time.strftime('%H:%M:%S')}] Tooltip hidden")
 
     def open_modal(self, cell_index):
-        if self.cells[cell_index].cam is None:
+        if self.cells[cell_index].cam is None or not self.capture_ready:
             # logger.info(f"[{time.strftime('%H:%M:%S')}] Double-click on empty cell {cell_index}")
             return
         if self.modal_window:
@@ -235,6 +374,17 @@ class MainApp(tk.Tk):
         modal_frame.pack(expand=True, fill=tk.BOTH)
         self.modal_name_label = Label(modal_frame, text=cam["street"], font=Font(family="Arial", size=11), height=1)
         self.modal_name_label.pack(fill=tk.X)
+        # Перемотка назад по буферу кадров (0 — живое изображение)
+        self.modal_replay_offset = 0
+        self.modal_replay_scale = tk.Scale(
+            modal_frame,
+            from_=-self.engine.replay.max_seconds,
+            to=0,
+            orient=tk.HORIZONTAL,
+            showvalue=False,
+            command=self.on_replay_scrub
+        )
+        self.modal_replay_scale.pack(side=tk.BOTTOM, fill=tk.X)
         self.modal_image_label = Label(modal_frame)
         self.modal_image_label.pack(expand=True, fill=tk.BOTH)
         self.modal_image_label.bind("<Double-Button-1>", self.close_modal)
@@ -242,13 +392,14 @@ class MainApp(tk.Tk):
         self.modal_window = modal
         modal.update()
         modal_width = modal.winfo_width()
-        modal_height = modal.winfo_height() - self.modal_name_label.winfo_reqheight()
+        modal_height = modal.winfo_height() - self.modal_name_label.winfo_reqheight() - self.modal_replay_scale.winfo_reqheight()
         self.modal_image_size = (modal_width, modal_height)
-        # Initial image
-        if self.original_pil_images[cell_index]:
-            resized_modal = self.original_pil_images[cell_index].resize((modal_width, modal_height), Image.LANCZOS)
-            self.modal_photo = ImageTk.PhotoImage(resized_modal)
-            self.modal_image_label.config(image=self.modal_photo)
+        # Первый кадр — снимок ячейки в полном размере: в сетке хранится кадр, уменьшенный до ячейки
+        status, frame_image, motion = self.engine.capture([cell_index], force={cell_index})[cell_index]
+        if status == self.modules.FRAME_NEW:
+            self._show_live_frame(self.cells[cell_index], frame_image, motion)
+        elif self.original_pil_images[cell_index]:
+            self._show_modal_image(self.original_pil_images[cell_index])
 
     def close_modal(self, event=None):
         if self.modal_window:
@@ -258,6 +409,8 @@ class MainApp(tk.Tk):
             self.modal_name_label = None
             self.modal_image_label = None
             self.modal_photo = None
+            self.modal_replay_scale = None
+            self.modal_replay_offset = 0
             self.modal_image_size = None
             self.modal_cell_index = None
             self.full_update = True
@@ -265,6 +418,29 @@ class MainApp(tk.Tk):
                 self.after_cancel(self.update_frames_id)
             self.update_frames_id = self.after(self.period, self.update_frames)
 
+    def on_replay_scrub(self, value):
+        self.modal_replay_offset = -int(float(value))
+        self.show_replay_frame()
+
+    def show_replay_frame(self):
+        # Кадр из буфера на modal_replay_offset секунд раньше текущего момента
+        if not self.modal_window or self.modal_cell_index is None:
+            return
+        cam = self.cells[self.modal_cell_index].cam
+        if not cam:
+            return
+        if self.modal_replay_offset == 0:
+            self.modal_name_label.config(text=cam["street"])
+            if self.original_pil_images[self.modal_cell_index]:
+                self._show_modal_image(self.original_pil_images[self.modal_cell_index])
+            return
+        frame = self.engine.replay.frame_at(cam["link"], time.time() - self.modal_replay_offset)
+        if not frame:
+            return
+        frame_time, pil_image = frame
+        self.modal_name_label.config(text=f"{cam['street']} — {time.strftime('%H:%M:%S', time.localtime(frame_time))} (-{self.modal_replay_offset} с)")
+        self._show_modal_image(pil_image)
+
     def on_cell_click(self, cell_index):
         if not self.cells[cell_index].cam:
             logger.info(f"[{time.strftime('%H:%M:%S')}] Clicked on empty cell {cell_index}")
@@ -272,103 +448,174 @@ class MainApp(tk.Tk):
         cam = self.cells[cell_index].cam
         cam_street = cam["street"]
         logger.info(f"[{time.strftime('%H:%M:%S')}] Clicked on cell {cell_index}: selecting camera '{cam_street}'")
-        current_group = next((g for g in self.groups if g.get("current", False)), None)
+        current_group = self.registry.current_group()
         if not current_group:
             logger.warning(f"[{time.strftime('%H:%M:%S')}] No current group found for cell click")
             messagebox.showwarning("Ошибка", "Нет текущей группы для выбора камеры")
             return
         group_name = current_group.get("name", "Группа")
-        # Найти группу в дереве
-        group_iid = None
-        for iid in self.tree.get_children():
-            if self.tree.item(iid)["text"] == group_name:
-                group_iid = iid
-                break
-        if not group_iid:
+        # Группа и камера в дереве — по индексу элементов, без перебора
+        if not self.registry.group_item(current_group):
             logger.warning(f"[{time.strftime('%H:%M:%S')}] Group '{group_name}' not found in tree")
             messagebox.showwarning("Ошибка", f"Группа '{group_name}' не найдена в дереве")
             return
-        # Найти камеру в группе
-        for child_iid in self.tree.get_children(group_iid):
-            if self.tree.item(child_iid)["text"] == cam_street:
-                self.tree.selection_set(child_iid)
-                self.tree.focus(child_iid)
-                self.on_tree_select(None)  # Обновить состояние кнопок и selected_camera
-                return
+        child_iid = self.registry.cam_item(current_group, cam["link"])
+        if child_iid:
+            self.tree.selection_set(child_iid)
+            self.tree.focus(child_iid)
+            self.on_tree_select(None)  # Обновить состояние кнопок и selected_camera
+            return
         logger.warning(f"[{time.strftime('%H:%M:%S')}] Camera '{cam_street}' not found in group '{group_name}'")
         messagebox.showwarning("Ошибка", f"Камера '{cam_street}' не найдена в группе '{group_name}'")
 
-    def initialize_drivers(self):
-        self.drivers = []
-        for _ in range(9):
-            try:
-                service = Service(self.driver_path)
-                driver = webdriver.Chrome(service=service, options=self.options)
-                driver.implicitly_wait(5)
-                self.drivers.append(driver)
-            except Exception as e:
-                error_msg = f"[{time.strftime('%H:%M:%S')}] Error creating driver: {str(e)}"
-                logger.error(error_msg)
-                self.drivers.append(None)
-
     def set_frame_rate(self, period_ms):
         if self.update_frames_id:
             self.after_cancel(self.update_frames_id)
         self.period = period_ms
+        if self.engine:
+            self.engine.set_period(self.period)
         self.update_frames_id = self.after(self.period, self.update_frames)
 
     def start_load_group_to_drivers(self):
-        current_group = next((g for g in self.groups if g.get("current", False)), None)
-        if not current_group:
+        current_group = self.registry.current_group()
+        # До окончания упреждающей загрузки сетка сверяется с ячейками в start_capture
+        if not current_group or not self.capture_ready:
             return
-        current_grid = current_group.get("grid", [None] * 9)
-        for i in range(9):
-            try:
-                if not self.drivers or len(self.drivers) <= i or not self.drivers[i]:
-                    logger.warning(f"[{time.strftime('%H:%M:%S')}] Skipping load for cell {i}: driver not initialized")
-                    continue
-                url = current_grid[i] if i < len(current_grid) else None
-                driver = self.drivers[i]
-                if url:
-                    driver.get(url)
-                    driver.refresh()
-                    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ModalBodyPlayer")))
-                else:
-                    driver.get('about:blank')
-            except Exception as e:
-                error_msg = f"[{time.strftime('%H:%M:%S')}] Error loading for cell {i}: {str(e)}"
-                logger.error(error_msg)
-                #messagebox.showerror("Ошибка загрузки", error_msg)
+        self.engine.set_tile_size(self._grid_tile_size())
+        self.engine.load_grid([cell.cam for cell in self.cells])
 
     def expand_tree(self):
         for item in self.tree.get_children():
+            self._load_group_items(self.registry.item(item)[1])
             self.tree.item(item, open=True)
 
     def update_camera_list(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Синхронизация дерева с группами: перемещаются, добавляются и удаляются только
+        изменившиеся элементы (iid постоянны, выделение сохраняется); камеры свёрнутой
+        группы вставляются при её раскрытии"""
+        expand = len(self.cams) <= TREE_EXPAND_LIMIT
+        group_iids = []
         for group in self.groups:
-            group_name = group.get("name", "Группа")
-            group_iid = self.tree.insert(
-                "", 
-                "end", 
-                text=group_name, 
-                image=self.checked_photo if group.get("current", False) else self.unchecked_photo
+            iid = self.registry.group_item(group)
+            if iid is None or not self.tree.exists(iid) or self.registry.item(iid)[1] is not group:
+                iid = self.tree.insert("", "end")
+                self.registry.bind_group_item(iid, group)
+                # Небольшой список раскрывается целиком, большой — только текущая группа
+                if expand or group.get("current", False):
+                    self.registry.loaded.add(id(group))
+                    self.tree.item(iid, open=True)
+            if group.get("current", False):
+                # Камеры текущей группы выбираются щелчком по ячейке — всегда в дереве
+                self.registry.loaded.add(id(group))
+            self._render_tree_item(
+                iid, group.get("name", "Группа"),
+                self.checked_photo if group.get("current", False) else self.unchecked_photo
             )
-            for link in group.get("grid", []):
-                if link:
-                    cam = next((c for c in self.cams if c["link"] == link), None)
-                    if cam:
-                        self.tree.insert(group_iid, "end", text=cam["street"])
-        self.expand_tree()
-        # Устанавливаем фокус на текущую группу
-        current_group = next((g for g in self.groups if g.get("current", False)), None)
-        if current_group:
-            for iid in self.tree.get_children():
-                if self.tree.item(iid)["text"] == current_group["name"]:
-                    self.tree.selection_set(iid)
-                    self.tree.focus(iid)
-                    break
+            self._sync_group_items(group, iid)
+            group_iids.append(iid)
+        self._sync_tree_children("", group_iids)
+        # Выделение остаётся на прежнем элементе; если он удалён — фокус на текущую группу
+        if not self.tree.selection():
+            current_iid = self.registry.group_item(self.registry.current_group())
+            if current_iid:
+                self.tree.selection_set(current_iid)
+                self.tree.focus(current_iid)
+        # Найденные камеры пересчитываются по изменённому списку
+        if self.search_var.get().strip():
+            self.on_search_changed()
+
+    def _render_tree_item(self, iid, text, image=""):
+        state = (text, str(image))
+        if self.registry.rendered.get(iid) != state:
+            self.tree.item(iid, text=text, image=image)
+            self.registry.rendered[iid] = state
+
+    def _sync_group_items(self, group, group_iid):
+        links = []
+        for link in group.get("grid", []):
+            if link and link not in links and self.registry.cam(link):
+                links.append(link)
+        if not self.registry.is_loaded(group):
+            # Свёрнутая группа: пустой элемент-заглушка даёт значок раскрытия
+            children = self.tree.get_children(group_iid)
+            if links and not children:
+                self.tree.insert(group_iid, "end", text="")
+            elif not links and children:
+                self.tree.delete(*children)
+            return
+        cam_iids = []
+        for link in links:
+            cam = self.registry.cam(link)
+            iid = self.registry.cam_item(group, link)
+            _, bound_cam, bound_group = self.registry.item(iid)
+            if iid is None or not self.tree.exists(iid) or bound_cam is not cam or bound_group is not group:
+                iid = self.tree.insert(group_iid, "end")
+                self.registry.bind_cam_item(iid, cam, group)
+            self._render_tree_item(iid, cam["street"])
+            cam_iids.append(iid)
+        self._sync_tree_children(group_iid, cam_iids)
+
+    def _sync_tree_children(self, parent, iids):
+        # Удаляются только исчезнувшие элементы, перемещения — только при изменении порядка
+        keep = set(iids)
+        removed = [iid for iid in self.tree.get_children(parent) if iid not in keep]
+        for iid in removed:
+            for child in self.tree.get_children(iid):
+                self.registry.unbind_item(child)
+            self.registry.unbind_item(iid)
+        if removed:
+            self.tree.delete(*removed)
+        if self.tree.get_children(parent) != tuple(iids):
+            for index, iid in enumerate(iids):
+                self.tree.move(iid, parent, index)
+
+    def _load_group_items(self, group):
+        if group is None or self.registry.is_loaded(group):
+            return
+        self.registry.loaded.add(id(group))
+        self._sync_group_items(group, self.registry.group_item(group))
+
+    def on_tree_open(self, event):
+        # Камеры группы вставляются при первом раскрытии
+        kind, group, _ = self.registry.item(self.tree.focus())
+        if kind == GROUP_ITEM:
+            self._load_group_items(group)
+
+    def on_search_changed(self):
+        self.search_found = self.registry.search(self.search_var.get())
+        self.search_results.delete(0, tk.END)
+        if not self.search_var.get().strip():
+            self.search_results.pack_forget()
+            return
+        for cam in self.search_found:
+            groups = self.registry.groups_with_link(cam["link"])
+            self.search_results.insert(tk.END, f"{cam['street']} — {groups[0]['name']}" if groups else cam["street"])
+        if not self.search_found:
+            self.search_results.insert(tk.END, "Ничего не найдено")
+        if not self.search_results.winfo_ismapped():
+            self.search_results.pack(fill=tk.X, padx=3, pady=(3, 0), before=self.tree)
+
+    def on_search_select(self, event, first=False):
+        selection = (0,) if first else self.search_results.curselection()
+        if not selection or selection[0] >= len(self.search_found):
+            return
+        self.select_camera_in_tree(self.search_found[selection[0]])
+
+    def select_camera_in_tree(self, cam):
+        """Выделить камеру в дереве: в текущей группе, если она там есть, иначе в первой группе с ней"""
+        groups = self.registry.groups_with_link(cam["link"])
+        if not groups:
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Camera '{cam['street']}' is not in any group")
+            return
+        current_group = self.registry.current_group()
+        group = current_group if any(g is current_group for g in groups) else groups[0]
+        self._load_group_items(group)
+        self.tree.item(self.registry.group_item(group), open=True)
+        iid = self.registry.cam_item(group, cam["link"])
+        if iid:
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+            self.tree.see(iid)
 
     def move_top(self):
         selection = self.tree.selection()
@@ -377,23 +624,25 @@ class MainApp(tk.Tk):
         item = selection[0]
         parent = self.tree.parent(item)
         if parent == "":  # Группа
-            group_name = self.tree.item(item)["text"]
-            group_index = next((i for i, g in enumerate(self.groups) if g.get("name") == group_name), -1)
+            group = self.registry.item(item)[1]
+            group_name = group.get("name") if group else None
+            group_index = self.registry.group_index(group)
             if group_index == -1 or group_index == 0:
                 return
             logger.info(f"[{time.strftime('%H:%M:%S')}] Moving group '{group_name}' to top")
             group = self.groups.pop(group_index)
             self.groups.insert(0, group)
-            save_config(self)
+            self.registry.reindex_positions()
+            self.modules.save_config(self)
             self.update_camera_list()
-            new_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_iid = self.registry.group_item(group)
             if new_iid:
                 self.tree.selection_set(new_iid)
                 self.tree.focus(new_iid)
         else:  # Камера
             group_iid = parent
-            group_name = self.tree.item(group_iid)["text"]
-            group = next((g for g in self.groups if g.get("name") == group_name), None)
+            group = self.registry.item(item)[2]
+            group_name = group.get("name") if group else None
             if not group:
                 logger.error(f"[{time.strftime('%H:%M:%S')}] Group '{group_name}' not found in move_top")
                 return
@@ -417,9 +666,9 @@ class MainApp(tk.Tk):
             is_current = group.get("current", False)
             if is_current:
                 self.load_current_group_to_cells()
-            save_config(self)
+            self.modules.save_config(self)
             self.update_camera_list()
-            new_group_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_group_iid = self.registry.group_item(group)
             if new_group_iid and self.tree.exists(new_group_iid):
                 new_children = self.tree.get_children(new_group_iid)
                 if new_children:
@@ -436,23 +685,25 @@ class MainApp(tk.Tk):
         item = selection[0]
         parent = self.tree.parent(item)
         if parent == "":  # Группа
-            group_name = self.tree.item(item)["text"]
-            group_index = next((i for i, g in enumerate(self.groups) if g.get("name") == group_name), -1)
+            group = self.registry.item(item)[1]
+            group_name = group.get("name") if group else None
+            group_index = self.registry.group_index(group)
             if group_index == -1 or group_index == len(self.groups) - 1:
                 return
             logger.info(f"[{time.strftime('%H:%M:%S')}] Moving group '{group_name}' to bottom")
             group = self.groups.pop(group_index)
             self.groups.append(group)
-            save_config(self)
+            self.registry.reindex_positions()
+            self.modules.save_config(self)
             self.update_camera_list()
-            new_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_iid = self.registry.group_item(group)
             if new_iid:
                 self.tree.selection_set(new_iid)
                 self.tree.focus(new_iid)
         else:  # Камера
             group_iid = parent
-            group_name = self.tree.item(group_iid)["text"]
-            group = next((g for g in self.groups if g.get("name") == group_name), None)
+            group = self.registry.item(item)[2]
+            group_name = group.get("name") if group else None
             if not group:
                 logger.error(f"[{time.strftime('%H:%M:%S')}] Group '{group_name}' not found in move_bottom")
                 return
@@ -473,9 +724,9 @@ class MainApp(tk.Tk):
             is_current = group.get("current", False)
             if is_current:
                 self.load_current_group_to_cells()
-            save_config(self)
+            self.modules.save_config(self)
             self.update_camera_list()
-            new_group_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_group_iid = self.registry.group_item(group)
             if new_group_iid and self.tree.exists(new_group_iid):
                 new_children = self.tree.get_children(new_group_iid)
                 if new_children:
@@ -492,21 +743,23 @@ class MainApp(tk.Tk):
         item = selection[0]
         parent = self.tree.parent(item)
         if parent == "":  # Группа
-            group_name = self.tree.item(item)["text"]
-            group_index = next((i for i, g in enumerate(self.groups) if g.get("name") == group_name), -1)
+            group = self.registry.item(item)[1]
+            group_name = group.get("name") if group else None
+            group_index = self.registry.group_index(group)
             if group_index <= 0:
                 return
             self.groups[group_index], self.groups[group_index - 1] = self.groups[group_index - 1], self.groups[group_index]
-            save_config(self)
+            self.registry.reindex_positions()
+            self.modules.save_config(self)
             self.update_camera_list()
-            new_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_iid = self.registry.group_item(group)
             if new_iid:
                 self.tree.selection_set(new_iid)
                 self.tree.focus(new_iid)
         else:  # Камера
             group_iid = parent
-            group_name = self.tree.item(group_iid)["text"]
-            group = next((g for g in self.groups if g.get("name") == group_name), None)
+            group = self.registry.item(item)[2]
+            group_name = group.get("name") if group else None
             if not group:
                 logger.error(f"[{time.strftime('%H:%M:%S')}] Group '{group_name}' not found in move_up")
                 return
@@ -529,10 +782,10 @@ class MainApp(tk.Tk):
             is_current = group.get("current", False)
             if is_current:
                 self.load_current_group_to_cells()  # Обновляем cells и drivers по новому grid перед сохранением
-            save_config(self)  # Теперь сохраняем — grid не перезапишется старым
+            self.modules.save_config(self)  # Теперь сохраняем — grid не перезапишется старым
             self.update_camera_list()
             # Проверяем, что группа всё ещё существует
-            new_group_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_group_iid = self.registry.group_item(group)
             if new_group_iid and self.tree.exists(new_group_iid):
                 new_children = self.tree.get_children(new_group_iid)
                 if cam_index - 1 < len(new_children):
@@ -549,21 +802,23 @@ class MainApp(tk.Tk):
         item = selection[0]
         parent = self.tree.parent(item)
         if parent == "":  # Группа
-            group_name = self.tree.item(item)["text"]
-            group_index = next((i for i, g in enumerate(self.groups) if g.get("name") == group_name), -1)
+            group = self.registry.item(item)[1]
+            group_name = group.get("name") if group else None
+            group_index = self.registry.group_index(group)
             if group_index == -1 or group_index >= len(self.groups) - 1:
                 return
             self.groups[group_index], self.groups[group_index + 1] = self.groups[group_index + 1], self.groups[group_index]
-            save_config(self)
+            self.registry.reindex_positions()
+            self.modules.save_config(self)
             self.update_camera_list()
-            new_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_iid = self.registry.group_item(group)
             if new_iid:
                 self.tree.selection_set(new_iid)
                 self.tree.focus(new_iid)
         else:  # Камера
             group_iid = parent
-            group_name = self.tree.item(group_iid)["text"]
-            group = next((g for g in self.groups if g.get("name") == group_name), None)
+            group = self.registry.item(item)[2]
+            group_name = group.get("name") if group else None
             if not group:
                 logger.error(f"[{time.strftime('%H:%M:%S')}] Group '{group_name}' not found in move_down")
                 return
@@ -583,10 +838,10 @@ class MainApp(tk.Tk):
             is_current = group.get("current", False)
             if is_current:
                 self.load_current_group_to_cells()  # Обновляем cells и drivers по новому grid перед сохранением
-            save_config(self)  # Теперь сохраняем — grid не перезапишется старым
+            self.modules.save_config(self)  # Теперь сохраняем — grid не перезапишется старым
             self.update_camera_list()
             # Проверяем, что группа всё ещё существует
-            new_group_iid = next((iid for iid in self.tree.get_children() if self.tree.item(iid)["text"] == group_name), None)
+            new_group_iid = self.registry.group_item(group)
             if new_group_iid and self.tree.exists(new_group_iid):
                 new_children = self.tree.get_children(new_group_iid)
                 if cam_index + 1 < len(new_children):
@@ -617,8 +872,7 @@ class MainApp(tk.Tk):
             item = selection[0]
             parent = self.tree.parent(item)
             if parent == "":  # Группа
-                group_name = self.tree.item(item)["text"]
-                group_index = next((i for i, g in enumerate(self.groups) if g.get("name") == group_name), -1)
+                group_index = self.registry.group_index(self.registry.item(item)[1])
                 top_state = tk.NORMAL if group_index > 0 else tk.DISABLED
                 up_state = tk.NORMAL if group_index > 0 else tk.DISABLED
                 down_state = tk.NORMAL if group_index < len(self.groups) - 1 else tk.DISABLED
@@ -646,8 +900,8 @@ class MainApp(tk.Tk):
                     return
                 children = self.tree.get_children(group_iid)
                 cam_index = children.index(item)
-                group_name = self.tree.item(group_iid)["text"]
-                group = next((g for g in self.groups if g.get("name") == group_name), None)
+                group = self.registry.item(item)[2]
+                group_name = group.get("name") if group else None
                 if not group:
                     logger.error(f"[{time.strftime('%H:%M:%S')}] Group '{group_name}' not found in on_tree_select")
                     self.move_top_button.config(state=tk.DISABLED)
@@ -684,19 +938,18 @@ class MainApp(tk.Tk):
             item = selection[0]
             parent = self.tree.parent(item)
             if parent == "":
-                group_name = self.tree.item(item)["text"]
-                current_group = next((g for g in self.groups if g.get("current", False)), None)
-                if current_group and current_group.get("name") == group_name:
+                group = self.registry.item(item)[1]
+                if group is None or group is self.registry.current_group():
                     return
+                group_name = group.get("name")
                 if messagebox.askyesno("Подтверждение", f"Хотите переключить вывод на '{group_name}'?"):
-                    for group in self.groups:
-                        group["current"] = (group["name"] == group_name)
+                    self.registry.set_current(group)
                     self.load_current_group_to_cells()
-                    save_config(self)
+                    self.modules.save_config(self)
                     self.update_camera_list()
             else:
-                cam_text = self.tree.item(item)["text"]
-                self.selected_camera = next((c for c in self.cams if c["street"] == cam_text), None)
+                kind, cam, _ = self.registry.item(item)
+                self.selected_camera = cam if kind == CAM_ITEM else None
                 if self.selected_camera:
                     self.edit_camera_button.config(state=tk.NORMAL)
                     self.delete_camera_button.config(state=tk.NORMAL)
@@ -705,116 +958,91 @@ class MainApp(tk.Tk):
     def reload_drivers(self):
         self.start_load_group_to_drivers()
 
+    def _cell_target_size(self, cell):
+        # Получаем реальные размеры ячейки
+        target_width = cell.image_label.winfo_width()
+        target_height = cell.image_label.winfo_height()
+        if target_width <= 1 or target_height <= 1:
+            target_width = self.cell_width
+            target_height = self.cell_height - 30  # Вычет на name_label
+        return target_width, target_height
+
+    def _grid_tile_size(self):
+        # Наибольшая ячейка сетки: под неё выделяются слоты общей памяти обработчиков
+        sizes = [self._cell_target_size(cell) for cell in self.cells]
+        return max(width for width, _ in sizes), max(height for _, height in sizes)
+
+    def _show_placeholder(self, cell, pil_image):
+        # Масштабирование заглушек аналогично кадрам
+        resized = pil_image.resize(self._cell_target_size(cell), self.modules.Image.LANCZOS)
+        cell.photo = self.modules.ImageTk.PhotoImage(resized)
+        cell.image_label.config(image=cell.photo)
+        cell.set_motion(False)
+        # Сохраняем оригинал для возможного ресайза в _update_label_size
+        self.original_pil_images[cell.index] = pil_image
+
+    def _show_cached_frame(self, cell):
+        # Последний сохранённый кадр камеры с отметкой возраста — до первого живого кадра
+        cached = self.frame_cache.get(cell.cam["link"]) if cell.cam else None
+        if cached:
+            frame_image, frame_time = cached
+            self._show_frame(cell, frame_image)
+            cell.set_stale(frame_time)
+
+    def _show_modal_image(self, pil_image):
+        modal_width = self.modal_image_size[0] if isinstance(self.modal_image_size, tuple) else self.modal_image_size
+        modal_height = self.modal_image_size[1] if isinstance(self.modal_image_size, tuple) else self.modal_image_size
+        resized_modal = pil_image.resize((modal_width, modal_height), self.modules.Image.LANCZOS)
+        self.modal_photo = self.modules.ImageTk.PhotoImage(resized_modal)
+        self.modal_image_label.config(image=self.modal_photo)
+
+    def _show_frame(self, cell, frame_image, motion=False):
+        # Кадры сетки приходят уже в размере ячейки, масштабируется только кадр окна просмотра
+        resized_small = self.modules.display_tile(frame_image, self._cell_target_size(cell))
+        cell.photo = self.modules.ImageTk.PhotoImage(resized_small)
+        cell.image_label.config(image=cell.photo)
+        
+        # Кадр обработчика — представление общей памяти без копии: окно просмотра и пересчёт
+        # размера читают его в потоке окна до следующего захвата ячейки, кэш кадров копирует сам
+        self.original_pil_images[cell.index] = frame_image
+        cell.set_motion(motion)
+        
+        if self.modal_cell_index == cell.index and self.modal_image_label:
+            if self.modal_replay_offset:
+                self.show_replay_frame()
+            else:
+                self._show_modal_image(frame_image)
+
+    def _show_live_frame(self, cell, frame_image, motion):
+        self._show_frame(cell, frame_image, motion)
+        if cell.stale_time is not None:
+            cell.set_stale(None)
+        if cell.cam:
+            self.frame_cache.put(cell.cam["link"], self.original_pil_images[cell.index])
+
     def update_frames(self):
-        logger = logging.getLogger(__name__)
-        for cell in self.cells:
-            if not self.full_update and cell.index != self.modal_cell_index:
-                continue
-            if not cell.cam or not self.drivers[cell.index]:
-                # Масштабирование заглушек аналогично кадрам
-                pil_image = self.original_nocam_image if not cell.cam else self.original_noconnect_image
-                # Получаем реальные размеры ячейки (аналогично реальным кадрам)
-                target_width = cell.image_label.winfo_width()
-                target_height = cell.image_label.winfo_height()
-                if target_width <= 1 or target_height <= 1:
-                    target_width = self.cell_width
-                    target_height = self.cell_height - 30  # Вычет на name_label
-                resized = pil_image.resize((target_width, target_height), Image.LANCZOS)
-                cell.photo = ImageTk.PhotoImage(resized)
-                cell.image_label.config(image=cell.photo)
-                # Сохраняем оригинал для возможного ресайза в _update_label_size
-                self.original_pil_images[cell.index] = pil_image
-                continue
-            driver = self.drivers[cell.index]
-            try:
-                if driver.current_url == 'about:blank':
-                    # Масштабирование заглушки для blank
-                    pil_image = self.original_nocam_image
-                    target_width = cell.image_label.winfo_width()
-                    target_height = cell.image_label.winfo_height()
-                    if target_width <= 1 or target_height <= 1:
-                        target_width = self.cell_width
-                        target_height = self.cell_height - 30
-                    resized = pil_image.resize((target_width, target_height), Image.LANCZOS)
-                    cell.photo = ImageTk.PhotoImage(resized)
-                    cell.image_label.config(image=cell.photo)
-                    self.original_pil_images[cell.index] = pil_image
-                    continue
-            except Exception as e:
-                logger.error(f"[{time.strftime('%H:%M:%S')}] Error checking url for cell {cell.index}: {str(e)}")
-                # Масштабирование заглушки для ошибки
-                pil_image = self.original_noconnect_image
-                target_width = cell.image_label.winfo_width()
-                target_height = cell.image_label.winfo_height()
-                if target_width <= 1 or target_height <= 1:
-                    target_width = self.cell_width
-                    target_height = self.cell_height - 30
-                resized = pil_image.resize((target_width, target_height), Image.LANCZOS)
-                cell.photo = ImageTk.PhotoImage(resized)
-                cell.image_label.config(image=cell.photo)
-                self.original_pil_images[cell.index] = pil_image
-                continue
-            try:
-                element = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.ID, "ModalBodyPlayer"))
-                )
-                screenshot_bytes = None
-                try:
-                    iframe = element.find_element(By.TAG_NAME, "iframe")
-                    driver.switch_to.frame(iframe)
-                    body = driver.find_element(By.TAG_NAME, "body")
-                    screenshot_bytes = body.screenshot_as_png
-                except:
-                    driver.switch_to.default_content()
-                    screenshot_bytes = element.screenshot_as_png
-                
-                if screenshot_bytes:
-                    pil_image = Image.open(io.BytesIO(screenshot_bytes))
-                    img_array = np.array(pil_image)
-                    height, width, _ = img_array.shape
-                    
-                    # Обрезка слева и справа
-                    crop_fraction = 17 / 235
-                    left_crop = int(width * crop_fraction)
-                    right_crop = int(width * crop_fraction)
-                    cropped_image = pil_image.crop((left_crop, 0, width - right_crop, height))
-                    
-                    # Получаем реальные размеры ячейки
-                    target_width = cell.image_label.winfo_width()
-                    target_height = cell.image_label.winfo_height()
-                    if target_width <= 1 or target_height <= 1:
-                        target_width = self.cell_width
-                        target_height = self.cell_height - 30  # Вычет на name_label
-                    
-                    # Растяжение до размера ячейки с искажением
-                    resized_small = cropped_image.resize((target_width, target_height), Image.LANCZOS)
-                    cell.photo = ImageTk.PhotoImage(resized_small)
-                    cell.image_label.config(image=cell.photo)
-                    
-                    self.original_pil_images[cell.index] = cropped_image.copy()
-                    
-                    if self.modal_cell_index == cell.index and self.modal_image_label:
-                        modal_width = self.modal_image_size[0] if isinstance(self.modal_image_size, tuple) else self.modal_image_size
-                        modal_height = self.modal_image_size[1] if isinstance(self.modal_image_size, tuple) else self.modal_image_size
-                        resized_modal = cropped_image.resize((modal_width, modal_height), Image.LANCZOS)
-                        self.modal_photo = ImageTk.PhotoImage(resized_modal)
-                        self.modal_image_label.config(image=self.modal_photo)
+        if not self.capture_ready:
+            self.update_frames_id = None
+            return  # цикл запускается в start_capture
+        indexes = [cell.index for cell in self.cells if self.full_update or cell.index == self.modal_cell_index]
+        # Окно просмотра снимается всегда, остальные ячейки — по расписанию активности
+        results = self.engine.capture(
+            indexes,
+            force={self.modal_cell_index} if self.modal_cell_index is not None else (),
+            sizes={i: self._cell_target_size(self.cells[i]) for i in indexes if i != self.modal_cell_index}
+        )
+        for index, (status, frame_image, motion) in results.items():
+            cell = self.cells[index]
+            if status == self.modules.FRAME_NEW:
+                self._show_live_frame(cell, frame_image, motion)
+            elif status == self.modules.FRAME_NOCAM:
+                self._show_placeholder(cell, self.original_nocam_image)
+            elif status == self.modules.FRAME_NOCONNECT:
+                if cell.stale_time is not None:
+                    # Камера ещё не отвечает — остаётся кадр из кэша, обновляется его возраст
+                    cell.set_stale(cell.stale_time)
                 else:
-                    logger.warning(f"[{time.strftime('%H:%M:%S')}] Cell {cell.index}: No screenshot bytes")
-                driver.switch_to.default_content()
-            except Exception as e:
-                logger.error(f"[{time.strftime('%H:%M:%S')}] Error updating frame for cell {cell.index}: {str(e)}")
-                # Масштабирование заглушки для исключения
-                pil_image = self.original_noconnect_image
-                target_width = cell.image_label.winfo_width()
-                target_height = cell.image_label.winfo_height()
-                if target_width <= 1 or target_height <= 1:
-                    target_width = self.cell_width
-                    target_height = self.cell_height - 30
-                resized = pil_image.resize((target_width, target_height), Image.LANCZOS)
-                cell.photo = ImageTk.PhotoImage(resized)
-                cell.image_label.config(image=cell.photo)
-                self.original_pil_images[cell.index] = pil_image
+                    self._show_placeholder(cell, self.original_noconnect_image)
         self.update_frames_id = self.after(self.period, self.update_frames)
 
 
@@ -827,39 +1055,34 @@ class MainApp(tk.Tk):
         if label_width > 1 and label_height > 1 and cell.photo and cell.index < len(self.original_pil_images) and self.original_pil_images[cell.index] is not None:
             # Используем сохранённое обрезанное изображение для пересчёта
             pil_image = self.original_pil_images[cell.index]
-            resized = pil_image.resize((label_width, label_height), Image.LANCZOS)
-            cell.photo = ImageTk.PhotoImage(resized)
+            resized = pil_image.resize((label_width, label_height), self.modules.Image.LANCZOS)
+            cell.photo = self.modules.ImageTk.PhotoImage(resized)
             cell.image_label.config(image=cell.photo)
             logger.info(f"[{time.strftime('%H:%M:%S')}] Cell {cell.index}: Resized to match label {label_width}x{label_height}")
 
 
     def load_current_group_to_cells(self):
-        current_group = next((g for g in self.groups if g.get("current", False)), None)
+        current_group = self.registry.current_group()
         if current_group:
-            current_grid = current_group.get("grid", [None] * 9)
-            for i in range(9):
-                self.cells[i].cam = None  # Очищаем ячейку
+            for i, cam in enumerate(self.registry.grid_cams(current_group)):
+                self.cells[i].cam = cam
                 self.original_pil_images[i] = None
-                link = current_grid[i] if i < len(current_grid) else None
-                if link:
-                    for cam in self.cams:
-                        if cam["link"] == link:
-                            self.cells[i].cam = cam
-                            break
                 self.cells[i].update_display()
+                self._show_cached_frame(self.cells[i])
             self.start_load_group_to_drivers()
 
     def on_close(self):
         self.close_modal()
         if self.update_frames_id:
             self.after_cancel(self.update_frames_id)
-        for driver in self.drivers:
-            if driver:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    error_msg = f"[{time.strftime('%H:%M:%S')}] Error quitting driver: {str(e)}"
-                    logger.error(error_msg)
+        if not self.capture_ready:
+            # Драйверы ещё загружаются: прерываются и закрываются в фоне, окно — по окончании
+            self.withdraw()
+            self.config_store.flush()
+            self.stop_warmup(on_stopped=self._destroy_app)
+            return
+        self.engine.close()
+        self.config_store.flush()
         self.destroy()      
 
      
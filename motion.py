@@ -0,0 +1,131 @@
+import logging
+import time
+from collections import deque
+import numpy as np
+from PIL import Image
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Отдельный журнал событий движения (app.log пишется только с уровня ERROR)
+motion_logger = logging.getLogger("motion_events")
+MOTION_LOG = "motion.log"  # файл журнала, если не задан ключ "motion_log"
+
+# Размер уменьшенного кадра для анализа
+MOTION_WIDTH = 80
+MOTION_HEIGHT = 45
+
+PIXEL_THRESHOLD = 25       # изменение яркости пикселя, считающееся движением
+BACKGROUND_RATE = 0.05     # скорость обновления модели фона
+HOLD_SECONDS = 3           # подсветка держится после последнего движения
+ACTIVITY_DECAY = 0.5       # сглаживание оценки активности между кадрами
+
+
+def sensitivity_to_area(sensitivity):
+    """Доля изменившихся пикселей для срабатывания: 100 -> 0.1%, 0 -> 10%"""
+    sensitivity = min(max(sensitivity, 0), 100)
+    return (101 - sensitivity) / 1000
+
+
+def build_mask(regions, width=MOTION_WIDTH, height=MOTION_HEIGHT):
+    """Маска анализа: True — пиксель учитывается; regions — исключаемые [x0, y0, x1, y1] в долях кадра"""
+    mask = np.ones((height, width), dtype=bool)
+    for x0, y0, x1, y1 in regions or []:
+        mask[int(y0 * height):int(np.ceil(y1 * height)), int(x0 * width):int(np.ceil(x1 * width))] = False
+    return mask
+
+
+class MotionDetector:
+    """Разность кадра с фоновой моделью (скользящее среднее) на уменьшенном сером кадре"""
+
+    def __init__(self, sensitivity=50, mask_regions=None):
+        self.area_threshold = sensitivity_to_area(sensitivity)
+        self.mask = build_mask(mask_regions)
+        self.mask_count = max(int(self.mask.sum()), 1)
+        self.background = None
+        self.score = 0.0
+        self.last_motion = 0.0
+
+    def update(self, pil_image, now):
+        small = pil_image.convert("L").resize((MOTION_WIDTH, MOTION_HEIGHT), Image.BILINEAR, reducing_gap=3.0)
+        frame = np.asarray(small, dtype=np.float32)
+        if self.background is None:
+            self.background = frame.copy()
+            return False
+        changed = (np.abs(frame - self.background) > PIXEL_THRESHOLD) & self.mask
+        self.score = np.count_nonzero(changed) / self.mask_count
+        # Фон обновляется на месте, без новых массивов
+        self.background *= 1 - BACKGROUND_RATE
+        self.background += BACKGROUND_RATE * frame
+        if self.score >= self.area_threshold:
+            self.last_motion = now
+        return now - self.last_motion < HOLD_SECONDS
+
+
+def setup_motion_log(path=MOTION_LOG):
+    """Файл журнала событий движения. Открывается один раз и только в процессе окна или
+    фонового режима: обработчики захвата (capture_workers) в него не пишут"""
+    if not path or motion_logger.handlers:
+        return
+    try:
+        handler = logging.FileHandler(path, encoding="utf-8")
+    except OSError as e:
+        logger.error(f"[{time.strftime('%H:%M:%S')}] Error opening motion log {path}: {str(e)}")
+        return
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    motion_logger.addHandler(handler)
+    motion_logger.setLevel(logging.INFO)
+    motion_logger.propagate = False
+
+
+class MotionMonitor:
+    """Детекторы по камерам, журнал событий и оценка активности"""
+
+    def __init__(self):
+        self.detectors = {}  # ссылка -> (параметры камеры, MotionDetector)
+        self.active = {}     # ссылка -> идёт ли движение
+        self.activity_scores = {}  # ссылка -> сглаженная активность 0..1 (для планировщика захвата)
+        self.events = deque(maxlen=1000)
+
+    def _detector(self, cam):
+        params = (cam.get("motion_sensitivity", 50), str(cam.get("motion_mask")))
+        entry = self.detectors.get(cam["link"])
+        if not entry or entry[0] != params:
+            entry = (params, MotionDetector(cam.get("motion_sensitivity", 50), cam.get("motion_mask")))
+            self.detectors[cam["link"]] = entry
+        return entry[1]
+
+    def update(self, cam, pil_image, now=None):
+        """Обработать новый кадр камеры; вернуть True, если в ячейке есть движение"""
+        now = now or time.time()
+        detector = self._detector(cam)
+        active = detector.update(pil_image, now)
+        level = 1.0 if active else min(detector.score / detector.area_threshold, 1.0)
+        previous = self.activity_scores.get(cam["link"], 0.0)
+        self.activity_scores[cam["link"]] = ACTIVITY_DECAY * previous + (1 - ACTIVITY_DECAY) * level
+        was_active = self.active.get(cam["link"], False)
+        if active and not was_active:
+            self.events.append((now, cam["link"], detector.score))
+            motion_logger.info(f"Motion started: '{cam['street']}' score={detector.score:.3f}")
+        elif was_active and not active:
+            motion_logger.info(f"Motion ended: '{cam['street']}'")
+        self.active[cam["link"]] = active
+        return active
+
+    def is_active(self, link):
+        return self.active.get(link, False)
+
+    def activity(self, link):
+        """Активность камеры 0..1: 1 — движение сейчас или недавно"""
+        if self.active.get(link):
+            return 1.0
+        return self.activity_scores.get(link, 0.0)
+
+    def forget(self, links):
+        """Удалить детекторы камер, которых нет в списке"""
+        links = set(links)
+        for link in list(self.detectors):
+            if link not in links:
+                self.detectors.pop(link, None)
+                self.active.pop(link, None)
+                self.activity_scores.pop(link, None)
@@ -0,0 +1,280 @@
+import os
+import mmap
+import queue
+import bisect
+import struct
+import hashlib
+import logging
+import threading
+import time
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Запись индекса: время кадра (float64), смещение в сегменте (uint64), длина JPEG (uint32)
+INDEX_RECORD = struct.Struct("<dQI")
+
+SEGMENT_EXT = ".seg"
+INDEX_EXT = ".idx"
+RETENTION_INTERVAL = 600  # сек, проверка срока хранения и без смены сегментов
+
+
+def cam_id(link):
+    """Короткий идентификатор камеры по ссылке (ссылки содержат недопустимые для путей символы)"""
+    return hashlib.sha1(link.encode("utf-8")).hexdigest()[:16]
+
+
+def camera_dir(root, link):
+    """Каталог архива камеры"""
+    return os.path.join(root, cam_id(link))
+
+
+def segment_name(start_time):
+    # Миллисекунды с ведущими нулями: лексикографический порядок совпадает с хронологическим
+    return f"{int(start_time * 1000):015d}"
+
+
+def list_segments(cam_dir):
+    """Сегменты камеры по возрастанию: [(время начала, путь без расширения)]"""
+    try:
+        names = os.listdir(cam_dir)
+    except FileNotFoundError:
+        return []
+    segments = []
+    for name in names:
+        if name.endswith(INDEX_EXT):
+            base = name[:-len(INDEX_EXT)]
+            if base.isdigit():
+                segments.append((int(base) / 1000, os.path.join(cam_dir, base)))
+    segments.sort()
+    return segments
+
+
+class SegmentIndex:
+    """Индекс сегмента, отображённый в память; поиск по времени двоичный, без чтения файла целиком"""
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.file = open(base_path + INDEX_EXT, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // INDEX_RECORD.size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def record(self, position):
+        return INDEX_RECORD.unpack_from(self.map, position * INDEX_RECORD.size)
+
+    def time_at(self, position):
+        return self.record(position)[0]
+
+    def find(self, timestamp):
+        """Позиция последней записи со временем <= timestamp (или -1)"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.time_at(middle) <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def close(self):
+        if self.map:
+            self.map.close()
+        self.file.close()
+
+
+class ArchiveReader:
+    """Чтение архива: поиск кадра по времени и потоковый обход интервала"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _segments(self, link):
+        return list_segments(camera_dir(self.root, link))
+
+    def span(self, link):
+        """(время первого, время последнего) кадра камеры в архиве или None"""
+        segments = self._segments(link)
+        first = last = None
+        for _, base in segments:
+            index = SegmentIndex(base)
+            try:
+                if index.count:
+                    first = index.time_at(0) if first is None else first
+                    last = index.time_at(index.count - 1)
+            finally:
+                index.close()
+        return (first, last) if first is not None else None
+
+    def frame_at(self, link, timestamp):
+        """Последний кадр не позже timestamp: (время, JPEG bytes) или None"""
+        segments = self._segments(link)
+        starts = [start for start, _ in segments]
+        position = bisect.bisect_right(starts, timestamp) - 1
+        while position >= 0:
+            base = segments[position][1]
+            index = SegmentIndex(base)
+            try:
+                record_pos = index.find(timestamp)
+                if record_pos >= 0:
+                    frame_time, offset, length = index.record(record_pos)
+                    with open(base + SEGMENT_EXT, "rb") as f:
+                        f.seek(offset)
+                        return frame_time, f.read(length)
+            finally:
+                index.close()
+            position -= 1
+        return None
+
+    def iter_frames(self, link, start, end):
+        """Генератор (время, JPEG bytes) за интервал; в памяти только текущий кадр"""
+        segments = self._segments(link)
+        starts = [s for s, _ in segments]
+        first = max(bisect.bisect_right(starts, start) - 1, 0)
+        for segment_start, base in segments[first:]:
+            if segment_start > end:
+                break
+            index = SegmentIndex(base)
+            try:
+                position = max(index.find(start), 0)
+                with open(base + SEGMENT_EXT, "rb") as f:
+                    while position < index.count:
+                        frame_time, offset, length = index.record(position)
+                        position += 1
+                        if frame_time < start:
+                            continue
+                        if frame_time > end:
+                            return
+                        f.seek(offset)
+                        yield frame_time, f.read(length)
+            finally:
+                index.close()
+
+
+class ArchiveRecorder:
+    """Фоновая запись кадров в сегменты по камерам с удалением старых по возрасту и объёму"""
+
+    def __init__(self, root="archive", segment_seconds=600, segment_bytes=64 * 1024 * 1024,
+                 retention_seconds=7 * 24 * 3600, retention_bytes=20 * 1024 ** 3):
+        self.root = root
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.retention_seconds = retention_seconds
+        self.retention_bytes = retention_bytes
+        self.open_segments = {}  # ссылка -> [время начала, файл сегмента, файл индекса, размер]
+        self.segments = []       # закрытые сегменты по возрастанию: (время начала, путь без расширения, байт)
+        self.archive_bytes = 0   # объём закрытых сегментов
+        self._queue = queue.Queue(maxsize=1000)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, link, jpeg_bytes, timestamp):
+        """Поставить кадр в очередь записи (без блокировки UI; при переполнении кадр теряется)"""
+        try:
+            self._queue.put_nowait((link, jpeg_bytes, timestamp))
+        except queue.Full:
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] Recorder queue full, frame dropped for {link}")
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        self._scan_archive()
+        self._enforce_retention()
+        retention_at = time.time() + RETENTION_INTERVAL
+        while True:
+            try:
+                item = self._queue.get(timeout=max(retention_at - time.time(), 0))
+            except queue.Empty:
+                item = ()
+            if time.time() >= retention_at:
+                # По таймеру: без новых кадров сегменты не сменяются, а старые удалять нужно
+                self._enforce_retention()
+                retention_at = time.time() + RETENTION_INTERVAL
+            if item is None:
+                break
+            if not item:
+                continue
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Error recording frame for {item[0]}: {str(e)}")
+        for link in list(self.open_segments):
+            self._close_segment(link)
+
+    def _write(self, link, jpeg_bytes, timestamp):
+        segment = self.open_segments.get(link)
+        if segment and (timestamp - segment[0] >= self.segment_seconds or segment[3] + len(jpeg_bytes) > self.segment_bytes):
+            self._close_segment(link)
+            self._enforce_retention()
+            segment = None
+        if not segment:
+            cam_dir = camera_dir(self.root, link)
+            os.makedirs(cam_dir, exist_ok=True)
+            base = os.path.join(cam_dir, segment_name(timestamp))
+            segment = [timestamp, open(base + SEGMENT_EXT, "ab"), open(base + INDEX_EXT, "ab"), 0]
+            segment[3] = segment[1].tell()
+            self.open_segments[link] = segment
+        _, data_file, index_file, size = segment
+        data_file.write(jpeg_bytes)
+        index_file.write(INDEX_RECORD.pack(timestamp, size, len(jpeg_bytes)))
+        # Индекс сбрасывается на диск после данных — запись индекса не ссылается на недописанный кадр
+        data_file.flush()
+        index_file.flush()
+        segment[3] = size + len(jpeg_bytes)
+
+    def _close_segment(self, link):
+        segment = self.open_segments.pop(link, None)
+        if segment:
+            segment[1].close()
+            segment[2].close()
+            self._add_segment(segment[0], segment[1].name[:-len(SEGMENT_EXT)])
+
+    def _scan_archive(self):
+        # Каталог архива читается один раз при запуске, дальше список сегментов ведётся в памяти
+        try:
+            cam_dirs = [os.path.join(self.root, name) for name in os.listdir(self.root)]
+        except FileNotFoundError:
+            return
+        for cam_dir in cam_dirs:
+            for start, base in list_segments(cam_dir):
+                self._add_segment(start, base)
+
+    def _add_segment(self, start, base):
+        size = 0
+        for ext in (SEGMENT_EXT, INDEX_EXT):
+            try:
+                size += os.path.getsize(base + ext)
+            except OSError:
+                pass
+        bisect.insort(self.segments, (start, base, size))
+        self.archive_bytes += size
+
+    def _enforce_retention(self):
+        cutoff = time.time() - self.retention_seconds
+        # Открытые сегменты не удаляются, но занимают место в пределе объёма
+        total = self.archive_bytes + sum(s[3] + s[2].tell() for s in self.open_segments.values())
+        kept = []
+        for position, (start, base, size) in enumerate(self.segments):
+            if start >= cutoff and total <= self.retention_bytes:
+                kept.extend(self.segments[position:])
+                break
+            removed = True
+            for ext in (SEGMENT_EXT, INDEX_EXT):
+                try:
+                    os.remove(base + ext)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # Windows: сегмент открыт читателем архива — удаляется при следующей смене сегмента
+                    removed = False
+                    logger.warning(f"[{time.strftime('%H:%M:%S')}] Archive segment {base} not removed: {str(e)}")
+            total -= size
+            if not removed:
+                # Остаётся на диске до следующей проверки, но более новые сегменты ради него не удаляются
+                kept.append((start, base, size))
+                continue
+            self.archive_bytes -= size
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Archive segment removed by retention: {base}")
+        self.segments = kept
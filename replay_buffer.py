@@ -0,0 +1,86 @@
+import io
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from PIL import Image
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class ReplayBuffer:
+    """Кольцевой буфер последних кадров по камерам: JPEG bytes + время, с общим лимитом памяти"""
+
+    def __init__(self, max_seconds=60, max_bytes=64 * 1024 * 1024, quality=80):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.frames = {}  # ссылка камеры -> deque[(timestamp, jpeg_bytes)]
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+    def encode(self, pil_image):
+        buffer = io.BytesIO()
+        pil_image.convert("RGB").save(buffer, format="JPEG", quality=self.quality)
+        return buffer.getvalue()
+
+    def add(self, link, pil_image=None, jpeg_bytes=None, timestamp=None):
+        """Добавить кадр; готовые JPEG bytes (HTTP/поток) сохраняются без перекодирования.
+        Возвращает False для уже сохранённого кадра (то же время)"""
+        if jpeg_bytes is None:
+            jpeg_bytes = self.encode(pil_image)
+        timestamp = timestamp or time.time()
+        with self._lock:
+            frames = self.frames.setdefault(link, deque())
+            if frames and frames[-1][0] >= timestamp:
+                return False
+            frames.append((timestamp, jpeg_bytes))
+            self.total_bytes += len(jpeg_bytes)
+            self._trim(timestamp)
+        return True
+
+    def _trim(self, now):
+        # Старше окна перемотки — удаляем у всех камер
+        cutoff = now - self.max_seconds
+        for frames in self.frames.values():
+            while frames and frames[0][0] < cutoff:
+                self.total_bytes -= len(frames.popleft()[1])
+        # Сверх лимита памяти — удаляем самые старые кадры среди всех камер
+        while self.total_bytes > self.max_bytes:
+            oldest = min((f for f in self.frames.values() if f), key=lambda f: f[0][0], default=None)
+            if oldest is None:
+                break
+            self.total_bytes -= len(oldest.popleft()[1])
+
+    def drop(self, link):
+        with self._lock:
+            frames = self.frames.pop(link, None)
+            if frames:
+                self.total_bytes -= sum(len(data) for _, data in frames)
+
+    def span(self, link):
+        """(время первого, время последнего) кадра камеры или None"""
+        with self._lock:
+            frames = self.frames.get(link)
+            if not frames:
+                return None
+            return frames[0][0], frames[-1][0]
+
+    def frame_at(self, link, timestamp):
+        """Последний кадр не позже timestamp: (время, PIL.Image) или None"""
+        with self._lock:
+            frames = self.frames.get(link)
+            if not frames:
+                return None
+            times = [t for t, _ in frames]
+            index = bisect.bisect_right(times, timestamp) - 1
+            frame_time, data = frames[max(index, 0)]
+        return frame_time, Image.open(io.BytesIO(data))
+
+    def snapshot(self, link, start=None, end=None):
+        """Копия списка (время, JPEG bytes) камеры в интервале — для экспорта"""
+        with self._lock:
+            frames = list(self.frames.get(link, ()))
+        return [(t, data) for t, data in frames if (start is None or t >= start) and (end is None or t <= end)]
@@ -0,0 +1,54 @@
+import logging
+import time
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class CaptureScheduler:
+    """Выбор ячеек для захвата в цикле: активные камеры — с основной частотой,
+    спокойные — реже, вплоть до floor_period; общий объём ограничен budget.
+    Без floor_period и budget каждая ячейка снимается в каждом цикле"""
+
+    def __init__(self, activity, floor_period=0, budget=0):
+        self.activity = activity          # функция: индекс ячейки -> активность 0..1
+        self.floor_period = floor_period  # сек, самый редкий захват спокойной камеры, 0 — каждый цикл
+        self.budget = budget              # захватов в секунду, 0 — без ограничения
+        self.last_capture = {}
+
+    def interval(self, index, period):
+        """Интервал захвата ячейки: от period (активность 1) до floor_period (активность 0)"""
+        if not self.floor_period:
+            return 0  # снижение частоты спокойных камер не настроено
+        floor = max(self.floor_period, period)
+        return floor - (floor - period) * self.activity(index)
+
+    def select(self, candidates, period, force=(), now=None):
+        """Ячейки, которые нужно снять в этом цикле (period — основной период в сек)"""
+        now = now or time.time()
+        due = []
+        for index in candidates:
+            if index in force:
+                due.append((float("inf"), index))
+                continue
+            waited = now - self.last_capture.get(index, 0)
+            interval = self.interval(index, period)
+            if waited >= interval:
+                # Приоритет: активность, затем насколько ячейка просрочена
+                due.append((self.activity(index) + waited / max(interval, period, 0.001), index))
+        due.sort(reverse=True)
+        if self.budget:
+            limit = max(int(self.budget * period), 1)
+            if len(due) > limit:
+                due = due[:max(limit, sum(1 for p, _ in due if p == float("inf")))]
+        selected = {index for _, index in due}
+        for index in selected:
+            self.last_capture[index] = now
+        return selected
+
+    def reset(self, index=None):
+        """Сбросить время захвата (ячейка будет снята в ближайшем цикле)"""
+        if index is None:
+            self.last_capture.clear()
+        else:
+            self.last_capture.pop(index, None)
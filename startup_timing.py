@@ -0,0 +1,13 @@
+import time
+import logging
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Отсчёт от импорта модуля: main.py импортирует его первым
+PROCESS_START = time.perf_counter()
+
+
+def mark_phase(name):
+    """Записать в журнал время от запуска до окончания этапа"""
+    logger.info(f"[{time.strftime('%H:%M:%S')}] Startup phase '{name}': {time.perf_counter() - PROCESS_START:.3f} s")
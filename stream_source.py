@@ -0,0 +1,197 @@
+import os
+import re
+import shutil
+import logging
+import threading
+import subprocess
+import time
+
+from http_source import HttpCameraSource
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Режимы захвата (ключ "capture_mode" в config.json)
+CAPTURE_SCREENSHOT = "screenshot"  # скриншот страницы плеера (по умолчанию)
+CAPTURE_STREAM = "stream"          # прямое декодирование видеопотока плеера
+
+# Адреса потоков, которые умеет открыть декодер: по расширению файла или сегменту пути
+# ("/mjpeg/", "/video.mjpg"), а не по вхождению "mjpeg" в любом месте адреса страницы
+STREAM_URL_RE = re.compile(r"\.(m3u8|mpd|flv|mp4)(\?|$)|[./]mjpe?g(/|\?|$)", re.IGNORECASE)
+MJPEG_URL_RE = re.compile(r"[./]mjpe?g(/|\?|$)", re.IGNORECASE)
+
+STREAM_RETRY_INTERVAL = 300  # сек, попытка вернуться к потоку после перехода на скриншоты
+STREAM_RETRY_TIMEOUT = 2     # сек, поиск потока на уже загруженной странице плеера
+MAX_FRAME_BYTES = 16 * 1024 * 1024  # незаконченный кадр ffmpeg крупнее этого отбрасывается
+
+# JS для поиска адреса потока внутри iframe плеера
+DISCOVER_SCRIPT = """
+var urls = [];
+var video = document.querySelector('video');
+if (video && video.currentSrc && video.currentSrc.indexOf('blob:') !== 0) urls.push(video.currentSrc);
+var img = document.querySelector('img');
+if (img && img.src) urls.push(img.src);
+performance.getEntriesByType('resource').forEach(function(e) { urls.push(e.name); });
+return urls;
+"""
+
+
+def find_ffmpeg():
+    """ffmpeg.exe рядом с приложением или ffmpeg из PATH"""
+    local_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ffmpeg.exe")
+    if os.path.exists(local_path):
+        return local_path
+    return shutil.which("ffmpeg")
+
+
+def discover_stream_url(driver, timeout=10):
+    """Найти адрес видеопотока, который загружает плеер ufanet, или None"""
+    from selenium.webdriver.common.by import By  # декодеры потоков работают без selenium
+    deadline = time.time() + timeout
+    try:
+        while time.time() < deadline:
+            try:
+                element = driver.find_element(By.ID, "ModalBodyPlayer")
+                iframe = element.find_element(By.TAG_NAME, "iframe")
+                driver.switch_to.frame(iframe)
+                urls = driver.execute_script(DISCOVER_SCRIPT) or []
+            finally:
+                driver.switch_to.default_content()
+            for url in urls:
+                if url.startswith("http") and STREAM_URL_RE.search(url):
+                    return url
+            time.sleep(0.5)
+    except Exception as e:
+        logger.error(f"[{time.strftime('%H:%M:%S')}] Stream discovery failed: {str(e)}")
+    return None
+
+
+class FfmpegStreamDecoder:
+    """Декодирование потока (HLS и т.п.) в JPEG-кадры отдельным процессом ffmpeg"""
+
+    def __init__(self, ffmpeg_path, url, interval=1.0):
+        self.ffmpeg_path = ffmpeg_path
+        self.url = url
+        self.interval = interval
+        self.frame_bytes = None
+        self.frame_time = None
+        self.process = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        fps = 1.0 / max(self.interval, 0.1)
+        cmd = [
+            self.ffmpeg_path, "-loglevel", "error",
+            "-i", self.url,
+            "-an", "-vf", f"fps={fps:.3f}",
+            "-q:v", "5", "-f", "image2pipe", "-vcodec", "mjpeg", "-",
+        ]
+        self.process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def latest(self):
+        with self._lock:
+            return self.frame_bytes, self.frame_time
+
+    def _run(self):
+        buf = bytearray()
+        stdout = self.process.stdout
+        while not self._stop.is_set():
+            chunk = stdout.read1(65536) if hasattr(stdout, "read1") else stdout.read(65536)
+            if not chunk:
+                break
+            buf += chunk
+            # Выделяем законченные JPEG (SOI ... EOI), оставляем только последний
+            while True:
+                start = buf.find(b"\xff\xd8")
+                if start == -1:
+                    # Начала кадра нет: хранится только последний байт (возможная половина SOI)
+                    del buf[:-1]
+                    break
+                del buf[:start]
+                end = buf.find(b"\xff\xd9", 2)
+                if end == -1:
+                    if len(buf) > MAX_FRAME_BYTES:
+                        # Конца кадра нет слишком долго — ищется следующее начало
+                        logger.warning(f"[{time.strftime('%H:%M:%S')}] ffmpeg frame too large, dropped for {self.url}")
+                        del buf[:2]
+                        continue
+                    break
+                with self._lock:
+                    self.frame_bytes = bytes(buf[:end + 2])
+                    self.frame_time = time.time()
+                del buf[:end + 2]
+        if not self._stop.is_set():
+            logger.warning(f"[{time.strftime('%H:%M:%S')}] ffmpeg decoder exited for {self.url}")
+
+
+class MjpegStreamDecoder(HttpCameraSource):
+    """MJPEG-поток плеера читается напрямую по HTTP, без ffmpeg"""
+
+    def is_alive(self):
+        # Источник жив, пока не зафиксирована ошибка без единого кадра
+        return self._thread.is_alive() and not (self.error and self.frame_bytes is None)
+
+
+class StreamSourceManager:
+    """Декодеры потоков по ссылке камеры ufanet (режим capture_mode == "stream")"""
+
+    def __init__(self, pool, interval=1.0):
+        self.pool = pool
+        self.interval = interval
+        self.ffmpeg_path = find_ffmpeg()
+        self.decoders = {}
+
+    def start(self, link, stream_url):
+        """Запустить декодер для камеры; False — нужно остаться в режиме скриншотов"""
+        self.stop(link)
+        try:
+            if MJPEG_URL_RE.search(stream_url):
+                decoder = MjpegStreamDecoder(self.pool, stream_url, self.interval)
+            elif self.ffmpeg_path:
+                decoder = FfmpegStreamDecoder(self.ffmpeg_path, stream_url, self.interval)
+            else:
+                logger.warning(f"[{time.strftime('%H:%M:%S')}] ffmpeg not found, cannot decode {stream_url}")
+                return False
+            decoder.start()
+        except Exception as e:
+            logger.error(f"[{time.strftime('%H:%M:%S')}] Error starting decoder for {stream_url}: {str(e)}")
+            return False
+        self.decoders[link] = decoder
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Stream decoder started for {link}: {stream_url}")
+        return True
+
+    def get(self, link):
+        return self.decoders.get(link)
+
+    def stop(self, link):
+        decoder = self.decoders.pop(link, None)
+        if decoder:
+            decoder.stop()
+
+    def sync(self, links):
+        """Остановить декодеры камер, которых больше нет в текущей группе"""
+        links = set(links)
+        for link in list(self.decoders):
+            if link not in links:
+                self.stop(link)
+
+    def stop_all(self):
+        for link in list(self.decoders):
+            self.stop(link)
@@ -0,0 +1,100 @@
+from camera_registry import CameraRegistry
+
+
+def cam(street, n):
+    return {"street": street, "link": f"http://maps.ufanet.ru/ufa#{n}"}
+
+
+def make_registry():
+    cams = [
+        cam("Проспект Октября 1", 1),
+        cam("Улица Ленина 10", 2),
+        cam("Сквер Ленинградский", 3),
+        cam("Набережная", 4),
+        cam("Улица Пушкина 5", 5),
+    ]
+    groups = [
+        {"name": "Центр", "grid": [cams[0]["link"], cams[1]["link"]] + [None] * 7, "current": True},
+        {"name": "Парки", "grid": [cams[2]["link"], None, cams[1]["link"], "http://maps.ufanet.ru/ufa#99"] + [None] * 5},
+    ]
+    return CameraRegistry(cams, groups)
+
+
+def streets(cams):
+    return [c["street"] for c in cams]
+
+
+def test_search_prefix_hits_first():
+    registry = make_registry()
+    # «ленин» — начало слова у двух камер, регистр не учитывается
+    assert streets(registry.search("ЛЕНИН")) == ["Улица Ленина 10", "Сквер Ленинградский"]
+    assert streets(registry.search("ок")) == ["Проспект Октября 1"]
+
+
+def test_search_substring_hits_after_prefix_hits():
+    registry = make_registry()
+    # «на» — начало слова «Набережная», подстрока в «Ленина» и «Пушкина»
+    assert streets(registry.search("на")) == ["Набережная", "Улица Ленина 10", "Улица Пушкина 5"]
+    # Ссылка ищется по подстроке
+    assert streets(registry.search("ufa#4")) == ["Набережная"]
+
+
+def test_search_limit_and_empty_query():
+    registry = make_registry()
+    assert len(registry.search("улица")) == 2
+    assert len(registry.search("а", limit=3)) == 3
+    assert registry.search("  ") == []
+    assert registry.search("нет такой") == []
+
+
+def test_search_after_reindex():
+    registry = make_registry()
+    assert registry.search("вокзал") == []
+    registry.cams.append(cam("Вокзал", 6))
+    registry.cams.pop(0)
+    registry.reindex()
+    assert streets(registry.search("вокзал")) == ["Вокзал"]
+    assert registry.search("октября") == []
+
+
+def test_reindex_lookup_tables():
+    registry = make_registry()
+    link = "http://maps.ufanet.ru/ufa#7"
+    assert registry.cam(link) is None
+    registry.cams.append(cam("Новая", 7))
+    registry.groups.append({"name": "Новая группа", "grid": [link] + [None] * 8})
+    registry.reindex()
+    assert registry.cam(link)["street"] == "Новая"
+    assert streets(registry.cams_by_street("Новая")) == ["Новая"]
+    assert registry.group("Новая группа") is registry.groups[2]
+    assert registry.group_index(registry.groups[2]) == 2
+    assert registry.current_group() is registry.groups[0]
+
+
+def test_groups_with_link():
+    registry = make_registry()
+    center, parks = registry.groups
+    assert registry.groups_with_link("http://maps.ufanet.ru/ufa#2") == [center, parks]
+    assert registry.groups_with_link("http://maps.ufanet.ru/ufa#3") == [parks]
+    assert registry.groups_with_link("http://maps.ufanet.ru/ufa#4") == []
+
+
+def test_grid_cams():
+    registry = make_registry()
+    center, parks = registry.groups
+    assert streets(registry.grid_cams(center)[:2]) == ["Проспект Октября 1", "Улица Ленина 10"]
+    cells = registry.grid_cams(parks)
+    assert len(cells) == 9
+    # Пустая ячейка и ссылка на удалённую камеру — None
+    assert cells[0]["street"] == "Сквер Ленинградский"
+    assert cells[1] is None and cells[3] is None
+    assert cells[2]["street"] == "Улица Ленина 10"
+    assert registry.grid_cams(None) == [None] * 9
+
+
+def test_set_current():
+    registry = make_registry()
+    center, parks = registry.groups
+    registry.set_current(parks)
+    assert registry.current_group() is parks
+    assert center["current"] is False and parks["current"] is True
@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("PIL.ImageTk")
+
+from ui_components import clean_config_data
+
+
+class FakeStore:
+    """Хранилище конфигурации без файла: запоминает сохранённые снимки"""
+
+    def __init__(self, data=None):
+        self.data = data
+        self.saved = []
+
+    def load(self, default=None):
+        return self.data if self.data is not None else default
+
+    def save(self, config):
+        self.saved.append(config)
+
+
+def cam(n):
+    return {"street": f"Улица {n}", "link": f"http://maps.ufanet.ru/ufa#{n}"}
+
+
+def link(n):
+    return cam(n)["link"]
+
+
+def grid(*numbers):
+    links = [link(n) if n is not None else None for n in numbers]
+    return links + [None] * (9 - len(links))
+
+
+def check(config):
+    app = SimpleNamespace(config=config, config_store=FakeStore())
+    config, report = clean_config_data(app)
+    return config, report, app.config_store.saved
+
+
+def fixes(report):
+    return {key: value for key, value in report.items() if value}
+
+
+def test_clean_config_is_not_saved():
+    config = {
+        "cams": [cam(1), cam(2)],
+        "groups": [{"name": "Дом", "grid": grid(1, 2), "current": True}],
+    }
+    cleaned, report, saved = check(config)
+    assert fixes(report) == {}
+    assert saved == []
+    assert cleaned["groups"][0]["grid"] == grid(1, 2)
+
+
+def test_config_loaded_from_store_when_missing():
+    app = SimpleNamespace(config=None, config_store=FakeStore({"cams": [cam(1)], "groups": [{"name": "Дом", "grid": grid(1), "current": True}]}))
+    config, report = clean_config_data(app)
+    assert config["cams"] == [cam(1)]
+    assert fixes(report) == {}
+
+
+def test_duplicate_cams_removed():
+    config = {
+        "cams": [cam(1), cam(1), cam(2)],
+        "groups": [{"name": "Дом", "grid": grid(1, 2), "current": True}],
+    }
+    cleaned, report, saved = check(config)
+    assert fixes(report) == {"duplicate_cams": [link(1)]}
+    assert cleaned["cams"] == [cam(1), cam(2)]
+    assert saved == [cleaned]
+
+
+def test_invalid_links_removed_and_grid_packed():
+    config = {
+        "cams": [cam(1), cam(2)],
+        "groups": [{"name": "Дом", "grid": grid(1, 99, 2), "current": True}],
+    }
+    cleaned, report, saved = check(config)
+    assert fixes(report) == {"invalid_links": [("Дом", link(99))]}
+    assert cleaned["groups"][0]["grid"] == grid(1, 2)
+    assert saved == [cleaned]
+
+
+def test_duplicate_links_across_groups_removed():
+    config = {
+        "cams": [cam(1), cam(2)],
+        "groups": [
+            {"name": "Дом", "grid": grid(1), "current": True},
+            {"name": "Двор", "grid": grid(2, 1)},
+        ],
+    }
+    cleaned, report, _ = check(config)
+    assert fixes(report) == {"duplicate_links": [("Двор", link(1))]}
+    assert cleaned["groups"][1]["grid"] == grid(2)
+
+
+def test_grid_with_gaps_compacted():
+    config = {
+        "cams": [cam(1), cam(2)],
+        "groups": [{"name": "Дом", "grid": grid(None, 1, None, 2), "current": True}],
+    }
+    cleaned, report, saved = check(config)
+    assert fixes(report) == {"compacted_groups": ["Дом"]}
+    assert cleaned["groups"][0]["grid"] == grid(1, 2)
+    assert saved == [cleaned]
+
+
+def test_empty_current_group_removed_and_first_group_made_current():
+    config = {
+        "cams": [cam(1)],
+        "groups": [
+            {"name": "Пусто", "grid": grid(), "current": True},
+            {"name": "Дом", "grid": grid(1)},
+        ],
+    }
+    cleaned, report, _ = check(config)
+    assert fixes(report) == {"empty_groups": ["Пусто"], "current_group": "Дом"}
+    assert [group["name"] for group in cleaned["groups"]] == ["Дом"]
+    assert cleaned["groups"][0]["current"] is True
+
+
+def test_group_created_when_all_groups_empty():
+    config = {"cams": [], "groups": [{"name": "Пусто", "grid": grid(), "current": True}]}
+    cleaned, report, _ = check(config)
+    assert report["empty_groups"] == ["Пусто"]
+    assert len(report["created_groups"]) == 1
+    assert cleaned["groups"] == [{"name": report["created_groups"][0], "grid": grid(), "current": True}]
+
+
+def test_lost_cams_fill_current_group_then_new_groups():
+    cams = [cam(n) for n in range(1, 12)]
+    config = {
+        "cams": cams,
+        "groups": [
+            {"name": "Двор", "grid": grid(1)},
+            {"name": "Дом", "grid": grid(2), "current": True},
+        ],
+    }
+    cleaned, report, saved = check(config)
+    lost = report["lost_cams"]
+    assert [street for street, _ in lost] == [c["street"] for c in cams[2:]]
+    # Сначала свободные ячейки текущей группы, затем остальных, затем новая группа
+    assert [group for _, group in lost] == ["Дом"] * 8 + ["Двор"]
+    assert cleaned["groups"][1]["grid"] == grid(2, *range(3, 11))
+    assert cleaned["groups"][0]["grid"] == grid(1, 11)
+    assert report["created_groups"] == []
+    assert saved == [cleaned]
+
+
+def test_lost_cams_overflow_into_new_group():
+    cams = [cam(n) for n in range(1, 12)]
+    config = {"cams": cams, "groups": [{"name": "Дом", "grid": grid(1), "current": True}]}
+    cleaned, report, _ = check(config)
+    assert len(report["created_groups"]) == 1
+    new_group = cleaned["groups"][1]
+    assert new_group["name"] == report["created_groups"][0]
+    assert new_group["current"] is False
+    assert new_group["grid"] == grid(10, 11)
+    assert cleaned["groups"][0]["grid"] == grid(*range(1, 10))
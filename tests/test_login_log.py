@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from login_log import LoginLog
+
+
+def at(days_ago, hour=12):
+    moment = datetime.now().replace(hour=hour, minute=0, second=0, microsecond=0) - timedelta(days=days_ago)
+    return moment.isoformat()
+
+
+def touch_segment(log, days_ago):
+    path = log.segment_path((datetime.now() - timedelta(days=days_ago)).date())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}\n")
+    return path
+
+
+def test_append_rotates_daily_segments(tmp_path):
+    log = LoginLog(str(tmp_path))
+    log.append("admin", True, at(1))
+    log.append("user", False, at(0, hour=9))
+    log.append("user", True, at(0, hour=10))
+    days = [day for day, _ in log.segments()]
+    assert days == [(datetime.now() - timedelta(days=1)).date(), datetime.now().date()]
+    assert [(e["user"], e["success"]) for e in log.entries()] == [("admin", True), ("user", False), ("user", True)]
+    # Записи только за последние сутки
+    assert [e["user"] for e in log.entries(since=datetime.now())] == ["user", "user"]
+
+
+def test_prune_removes_segments_older_than_retention(tmp_path):
+    log = LoginLog(str(tmp_path), retention_days=7)
+    old = touch_segment(log, 10)
+    recent = touch_segment(log, 3)
+    log.append("admin", True)
+    remaining = [path for _, path in log.segments()]
+    assert old not in remaining
+    assert recent in remaining
+
+
+def test_prune_runs_once_per_day(tmp_path):
+    log = LoginLog(str(tmp_path), retention_days=7)
+    log.append("admin", True)
+    # Устаревший файл, появившийся после очистки, удаляется только при смене суток
+    old = touch_segment(log, 10)
+    log.append("admin", True)
+    assert old in [path for _, path in log.segments()]
+    log.pruned_day = None
+    log.append("admin", True)
+    assert old not in [path for _, path in log.segments()]
+
+
+def test_import_attempts_returns_moved_count(tmp_path):
+    log = LoginLog(str(tmp_path), retention_days=7)
+    attempts = [
+        {"user": "admin", "timestamp": at(2), "success": True},
+        {"user": "user", "timestamp": at(0)},
+        {"user": "old", "timestamp": at(30), "success": True},
+        {"user": "broken", "timestamp": "вчера"},
+        {"user": "missing"},
+    ]
+    assert log.import_attempts(attempts) == 2
+    assert len(log.segments()) == 2
+    assert [(e["user"], e["success"]) for e in log.entries()] == [("admin", True), ("user", False)]
+    assert log.import_attempts([]) == 0
@@ -0,0 +1,107 @@
+import os
+import time
+
+import recorder
+from recorder import INDEX_EXT, INDEX_RECORD, SEGMENT_EXT, ArchiveReader, ArchiveRecorder, SegmentIndex, camera_dir, list_segments
+
+LINK = "https://cams.example/camera/1"
+FRAME = b"x" * 1000
+
+
+def record(root, timestamps, **kwargs):
+    """Записать кадры (содержимое — время кадра) и дождаться закрытия сегментов"""
+    archive = ArchiveRecorder(root=str(root), **kwargs)
+    for timestamp in timestamps:
+        archive.add(LINK, str(timestamp).encode("ascii"), timestamp)
+    archive.stop()
+
+
+def test_segment_index_find(tmp_path):
+    base = str(tmp_path / "segment")
+    with open(base + INDEX_EXT, "wb") as f:
+        for position, timestamp in enumerate((1.0, 2.0, 3.0)):
+            f.write(INDEX_RECORD.pack(timestamp, position * 10, 10))
+    index = SegmentIndex(base)
+    try:
+        assert index.count == 3
+        assert index.find(0.5) == -1
+        assert index.find(1.0) == 0
+        assert index.find(2.5) == 1
+        assert index.find(10.0) == 2
+    finally:
+        index.close()
+
+
+def test_segment_index_find_empty(tmp_path):
+    base = str(tmp_path / "segment")
+    open(base + INDEX_EXT, "wb").close()
+    index = SegmentIndex(base)
+    try:
+        assert index.find(1.0) == -1
+    finally:
+        index.close()
+
+
+def test_frame_at_across_segments(tmp_path):
+    start = time.time() - 100
+    record(tmp_path, [start + i for i in range(6)], segment_seconds=2)
+    assert len(list_segments(camera_dir(str(tmp_path), LINK))) == 3
+    reader = ArchiveReader(str(tmp_path))
+    assert reader.frame_at(LINK, start - 1) is None
+    # Время внутри сегмента и на его границе: кадр берётся из предыдущего сегмента
+    assert reader.frame_at(LINK, start + 2.5) == (start + 2, str(start + 2).encode("ascii"))
+    assert reader.frame_at(LINK, start + 1.9) == (start + 1, str(start + 1).encode("ascii"))
+    assert reader.frame_at(LINK, start + 100)[0] == start + 5
+    assert reader.span(LINK) == (start, start + 5)
+
+
+def test_iter_frames_across_segments(tmp_path):
+    start = time.time() - 100
+    record(tmp_path, [start + i for i in range(6)], segment_seconds=2)
+    reader = ArchiveReader(str(tmp_path))
+    frames = list(reader.iter_frames(LINK, start + 1, start + 4))
+    assert [frame_time for frame_time, _ in frames] == [start + 1, start + 2, start + 3, start + 4]
+    assert frames[0][1] == str(start + 1).encode("ascii")
+    assert list(reader.iter_frames(LINK, start + 10, start + 20)) == []
+
+
+def test_retention_keeps_newer_segments_when_one_is_locked(tmp_path, monkeypatch):
+    start = time.time() - 100
+    locked = os.path.join(camera_dir(str(tmp_path), LINK), recorder.segment_name(start))
+    remove = os.remove
+
+    def locked_remove(path):
+        if path.startswith(locked):
+            raise PermissionError("segment is open")
+        remove(path)
+
+    monkeypatch.setattr(recorder.os, "remove", locked_remove)
+    # Каждый закрытый сегмент — 1000 байт кадра и 20 байт индекса; предел — два сегмента
+    archive = ArchiveRecorder(root=str(tmp_path), segment_seconds=1, retention_bytes=2500)
+    for i in range(4):
+        archive.add(LINK, FRAME, start + i)
+    archive.stop()
+    bases = [base for _, base in list_segments(camera_dir(str(tmp_path), LINK))]
+    assert bases[0] == locked
+    # Занятый сегмент остаётся, следующий за ним ради предела не удаляется
+    assert len(bases) == 4
+    assert os.path.exists(bases[1] + SEGMENT_EXT)
+
+
+def test_retention_runs_on_timer(tmp_path, monkeypatch):
+    monkeypatch.setattr(recorder, "RETENTION_INTERVAL", 0.1)
+    now = time.time()
+    archive = ArchiveRecorder(root=str(tmp_path), segment_seconds=1, retention_seconds=1)
+    archive.add(LINK, FRAME, now - 0.5)
+    archive.add(LINK, FRAME, now + 0.6)
+    # Новых кадров нет: первый сегмент устаревает и удаляется проверкой по таймеру
+    counts = []
+    deadline = time.time() + 5
+    while time.time() < deadline and counts[-1:] != [1]:
+        count = len(list_segments(camera_dir(str(tmp_path), LINK)))
+        if count == 2 or counts:
+            counts.append(count)
+        time.sleep(0.05)
+    archive.stop()
+    assert counts[0] == 2
+    assert [start for start, _ in list_segments(camera_dir(str(tmp_path), LINK))] == [int((now + 0.6) * 1000) / 1000]
@@ -0,0 +1,44 @@
+from scheduler import CaptureScheduler
+
+
+def make_scheduler(activity=None, **kwargs):
+    levels = activity or {}
+    return CaptureScheduler(activity=lambda i: levels.get(i, 0.0), **kwargs)
+
+
+def test_without_settings_every_cell_every_cycle():
+    scheduler = make_scheduler()
+    assert scheduler.select(range(9), 1.0, now=100.0) == set(range(9))
+    # Следующий цикл чуть раньше периода — ячейки всё равно снимаются
+    assert scheduler.select(range(9), 1.0, now=100.9) == set(range(9))
+
+
+def test_quiet_cells_wait_for_floor_period():
+    scheduler = make_scheduler({0: 1.0, 1: 0.0}, floor_period=8)
+    assert scheduler.select([0, 1], 1.0, now=100.0) == {0, 1}
+    assert scheduler.select([0, 1], 1.0, now=101.0) == {0}
+    assert scheduler.select([0, 1], 1.0, now=108.0) == {0, 1}
+
+
+def test_budget_prefers_active_cells():
+    scheduler = make_scheduler({3: 0.9, 5: 0.5}, budget=2)
+    assert scheduler.select(range(9), 1.0, now=100.0) == {3, 5}
+
+
+def test_budget_keeps_all_forced_cells():
+    scheduler = make_scheduler({3: 0.9}, budget=1)
+    assert scheduler.select(range(9), 1.0, force={0, 7}, now=100.0) == {0, 7}
+
+
+def test_forced_cell_ignores_floor_period():
+    scheduler = make_scheduler(floor_period=8)
+    scheduler.select([4], 1.0, now=100.0)
+    assert scheduler.select([4], 1.0, now=101.0) == set()
+    assert scheduler.select([4], 1.0, force={4}, now=101.0) == {4}
+
+
+def test_reset_makes_cell_due():
+    scheduler = make_scheduler(floor_period=8)
+    scheduler.select([2], 1.0, now=100.0)
+    scheduler.reset(2)
+    assert scheduler.select([2], 1.0, now=101.0) == {2}
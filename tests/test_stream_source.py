@@ -0,0 +1,117 @@
+import io
+import threading
+import time
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from http_source import HttpConnectionPool
+import stream_source
+from stream_source import STREAM_URL_RE, MJPEG_URL_RE, FfmpegStreamDecoder, MjpegStreamDecoder, StreamSourceManager
+
+BOUNDARY = "frame"
+
+
+def jpeg_sample(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 24), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class MjpegHandler(BaseHTTPRequestHandler):
+    """Поток MJPEG из двух кадров, как у камер и плееров"""
+
+    frames = [jpeg_sample((255, 0, 0)), jpeg_sample((0, 0, 255))]
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.end_headers()
+        try:
+            for frame in self.frames * 50:
+                self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(frame)}\r\n\r\n".encode("ascii"))
+                self.wfile.write(frame + b"\r\n")
+                self.wfile.flush()
+                time.sleep(0.02)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mjpeg_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MjpegHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/video.mjpg"
+    server.shutdown()
+    server.server_close()
+
+
+def wait_frame(decoder, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        frame_bytes, frame_time = decoder.latest()
+        if frame_bytes:
+            return frame_bytes, frame_time
+        time.sleep(0.02)
+    return None, None
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://cam.local/live/index.m3u8?token=1", True),
+    ("http://cam.local/video.mjpg", True),
+    ("http://cam.local/mjpeg/stream", True),
+    ("http://cam.local/player.html?mode=mjpeg", False),
+    ("http://cam.local/mjpeg-player/index.html", False),
+])
+def test_stream_url_detection(url, expected):
+    assert bool(STREAM_URL_RE.search(url)) is expected
+
+
+def test_mjpeg_decoder_reads_served_sample(mjpeg_url):
+    decoder = MjpegStreamDecoder(HttpConnectionPool(), mjpeg_url, interval=0.1)
+    decoder.start()
+    try:
+        frame_bytes, frame_time = wait_frame(decoder)
+        assert frame_bytes is not None and frame_time is not None
+        assert Image.open(io.BytesIO(frame_bytes)).size == (32, 24)
+        assert decoder.is_alive()
+    finally:
+        decoder.stop()
+
+
+def test_manager_picks_mjpeg_decoder(mjpeg_url):
+    assert MJPEG_URL_RE.search(mjpeg_url)
+    manager = StreamSourceManager(HttpConnectionPool(), interval=0.1)
+    try:
+        assert manager.start("https://cams.example/camera/1", mjpeg_url)
+        decoder = manager.get("https://cams.example/camera/1")
+        assert isinstance(decoder, MjpegStreamDecoder)
+        assert wait_frame(decoder)[0] is not None
+    finally:
+        manager.stop_all()
+
+
+def run_ffmpeg_output(data):
+    """Разбор вывода ffmpeg без запуска процесса"""
+    decoder = FfmpegStreamDecoder("ffmpeg", "http://cam.local/live/index.m3u8")
+    decoder.process = SimpleNamespace(stdout=io.BytesIO(data))
+    decoder._run()
+    return decoder.latest()[0]
+
+
+def test_ffmpeg_output_keeps_last_complete_frame():
+    first, second = jpeg_sample((255, 0, 0)), jpeg_sample((0, 0, 255))
+    assert run_ffmpeg_output(b"noise" + first + b"\x00" * 10 + second + second[:20]) == second
+
+
+def test_ffmpeg_output_drops_unterminated_frame(monkeypatch):
+    monkeypatch.setattr(stream_source, "MAX_FRAME_BYTES", 1024)
+    frame = jpeg_sample((0, 255, 0))
+    assert run_ffmpeg_output(b"\xff\xd8" + b"\x00" * 200000 + frame) == frame
@@ -8,12 +8,14 @@ import subprocess  # Добавлен для управления процесс
 import logging  # Добавлен для логирования
 import time
 import json
+from datetime import datetime, timedelta
+from tkinter import filedialog
 
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
 import webbrowser  # Добавлен импорт для работы с браузером
 from auth import ChangePasswordWindow
+from http_source import SOURCE_TYPES, SOURCE_UFANET, SOURCE_HTTP, cam_source
+from exporter import ExportJob
+from camera_registry import CameraRegistry
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -29,14 +31,14 @@ def resource_path(relative_path):
 
 
 class CameraDialog(Toplevel):
-    def __init__(self, parent=None, street="", link="", title="Добавить камеру", is_group=False):
+    def __init__(self, parent=None, street="", link="", title="Добавить камеру", is_group=False, source=SOURCE_UFANET, record=False):
         super().__init__(parent)
         self.title(title)
         self.transient(parent)
         self.grab_set()
         
         window_width = 600
-        window_height = 160 if not is_group else 120
+        window_height = 225 if not is_group else 120
         screen_width = self.winfo_screenwidth()
         screen_height = self.winfo_screenheight()
         x = (screen_width - window_width) // 2
@@ -80,15 +82,30 @@ class CameraDialog(Toplevel):
         )
         self.link_paste_button.grid(row=1, column=2, padx=5, pady=5)
         
+        # Тип источника: страница ufanet в браузере или прямой HTTP (JPEG/MJPEG)
+        self.source_label = Label(self.main_frame, text="Источник:", font=self.font)
+        self.source_label.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+        self.source_combobox = ttk.Combobox(self.main_frame, values=SOURCE_TYPES, font=self.font, state="readonly")
+        self.source_combobox.set(source)
+        self.source_combobox.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+        
+        # Запись камеры в архив на диске
+        self.record_var = tk.BooleanVar(value=record)
+        self.record_check = tk.Checkbutton(self.main_frame, text="Запись на диск", variable=self.record_var, font=self.font)
+        self.record_check.grid(row=3, column=1, padx=5, pady=0, sticky="w")
+        
         if is_group:
             self.link_label.grid_remove()
             self.link_entry.grid_remove()
             self.link_paste_button.grid_remove()
+            self.source_label.grid_remove()
+            self.source_combobox.grid_remove()
+            self.record_check.grid_remove()
         
         self.main_frame.columnconfigure(1, weight=1)
         
         self.button_frame = tk.Frame(self.main_frame)
-        self.button_frame.grid(row=2 if not is_group else 1, column=0, columnspan=3, pady=15)
+        self.button_frame.grid(row=4 if not is_group else 1, column=0, columnspan=3, pady=15)
         
         self.save_button = Button(
             self.button_frame,
@@ -120,14 +137,146 @@ class CameraDialog(Toplevel):
             messagebox.showwarning("Ошибка", f"Не удалось вставить текст: {str(e)}")
 
     def accept(self):
-        self.result = (self.street_entry.get(), self.link_entry.get())
+        self.result = (self.street_entry.get(), self.link_entry.get(), self.source_combobox.get(), self.record_var.get())
+        self.destroy()
+
+class ExportDialog(Toplevel):
+    """Экспорт кадров камеры за период в AVI (MJPG) или .mjpeg в фоновом потоке"""
+    def __init__(self, parent, cams, selected_cam=None):
+        super().__init__(parent)
+        self.title("Экспорт видео")
+        self.transient(parent)
+        self.parent = parent
+        self.cams = cams
+        self.job = None
+        
+        window_width = 500
+        window_height = 300
+        screen_width = self.winfo_screenwidth()
+        screen_height = self.winfo_screenheight()
+        x = (screen_width - window_width) // 2
+        y = (screen_height - window_height) // 2
+        self.geometry(f"{window_width}x{window_height}+{x}+{y}")
+        
+        self.font = Font(family="Arial", size=11)
+        
+        self.main_frame = tk.Frame(self)
+        self.main_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+        self.main_frame.columnconfigure(1, weight=1)
+        
+        Label(self.main_frame, text="Камера:", font=self.font).grid(row=0, column=0, padx=5, pady=3, sticky="w")
+        self.cam_combobox = ttk.Combobox(self.main_frame, values=[c["street"] for c in cams], font=self.font, state="readonly")
+        if selected_cam in cams:
+            self.cam_combobox.current(cams.index(selected_cam))
+        elif cams:
+            self.cam_combobox.current(0)
+        self.cam_combobox.grid(row=0, column=1, padx=5, pady=3, sticky="ew")
+        
+        now = datetime.now().replace(microsecond=0)
+        Label(self.main_frame, text="Начало:", font=self.font).grid(row=1, column=0, padx=5, pady=3, sticky="w")
+        self.start_entry = Entry(self.main_frame, font=self.font)
+        self.start_entry.insert(0, (now - timedelta(minutes=10)).isoformat(sep=" "))
+        self.start_entry.grid(row=1, column=1, padx=5, pady=3, sticky="ew")
+        
+        Label(self.main_frame, text="Конец:", font=self.font).grid(row=2, column=0, padx=5, pady=3, sticky="w")
+        self.end_entry = Entry(self.main_frame, font=self.font)
+        self.end_entry.insert(0, now.isoformat(sep=" "))
+        self.end_entry.grid(row=2, column=1, padx=5, pady=3, sticky="ew")
+        
+        Label(self.main_frame, text="Кадр раз в, сек:", font=self.font).grid(row=3, column=0, padx=5, pady=3, sticky="w")
+        self.step_entry = Entry(self.main_frame, font=self.font)
+        self.step_entry.insert(0, "0")
+        self.step_entry.grid(row=3, column=1, padx=5, pady=3, sticky="ew")
+        
+        Label(self.main_frame, text="Кадров в сек:", font=self.font).grid(row=4, column=0, padx=5, pady=3, sticky="w")
+        self.fps_combobox = ttk.Combobox(self.main_frame, values=["1", "5", "10", "25"], font=self.font, state="readonly")
+        self.fps_combobox.set("10")
+        self.fps_combobox.grid(row=4, column=1, padx=5, pady=3, sticky="w")
+        
+        self.progress = ttk.Progressbar(self.main_frame, maximum=100)
+        self.progress.grid(row=5, column=0, columnspan=2, padx=5, pady=8, sticky="ew")
+        self.status_label = Label(self.main_frame, text="", font=self.font)
+        self.status_label.grid(row=6, column=0, columnspan=2, padx=5, sticky="w")
+        
+        self.button_frame = tk.Frame(self.main_frame)
+        self.button_frame.grid(row=7, column=0, columnspan=2, pady=10)
+        self.export_button = Button(self.button_frame, text="Экспорт", font=self.font, command=self.start_export, width=10)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        Button(self.button_frame, text="Закрыть", font=self.font, command=self.on_close, width=10).pack(side=tk.LEFT, padx=5)
+        
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def start_export(self):
+        engine = self.parent.engine
+        if not self.parent.capture_ready or engine is None:
+            # Упреждающий запуск драйверов ещё не закончен: буфера и архива у окна пока нет
+            messagebox.showwarning("Ошибка", "Захват ещё запускается, повторите экспорт через несколько секунд", parent=self)
+            return
+        if not self.cams or self.cam_combobox.current() < 0:
+            messagebox.showwarning("Ошибка", "Выберите камеру", parent=self)
+            return
+        try:
+            start = datetime.fromisoformat(self.start_entry.get().strip()).timestamp()
+            end = datetime.fromisoformat(self.end_entry.get().strip()).timestamp()
+            step = float(self.step_entry.get().strip() or 0)
+        except ValueError:
+            messagebox.showwarning("Ошибка", "Неверный формат времени (ГГГГ-ММ-ДД ЧЧ:ММ:СС) или шага", parent=self)
+            return
+        if end <= start:
+            messagebox.showwarning("Ошибка", "Конец периода должен быть позже начала", parent=self)
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self,
+            defaultextension=".avi",
+            filetypes=[("AVI (MJPG)", "*.avi"), ("MJPEG", "*.mjpeg")]
+        )
+        if not path:
+            return
+        cam = self.cams[self.cam_combobox.current()]
+        self.job = ExportJob(
+            cam["link"], start, end, path,
+            fps=int(self.fps_combobox.get()),
+            step_seconds=step,
+            replay=engine.replay,
+            archive_root=engine.recorder.root
+        )
+        self.job.start()
+        self.export_button.config(state=tk.DISABLED)
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Export started for '{cam['street']}' to {path}")
+        self.poll_progress()
+
+    def poll_progress(self):
+        # Опрос фонового экспорта без блокировки обновления сетки
+        if not self.job or not self.winfo_exists():
+            return
+        self.progress["value"] = self.job.progress * 100
+        self.status_label.config(text=f"Кадров: {self.job.frames_written}")
+        if not self.job.done:
+            self.after(200, self.poll_progress)
+            return
+        self.export_button.config(state=tk.NORMAL)
+        if self.job.error:
+            self.status_label.config(text=f"Ошибка: {self.job.error}")
+        else:
+            self.status_label.config(text=f"Готово, кадров: {self.job.frames_written}")
+        self.job = None
+
+    def on_close(self):
+        if self.job:
+            self.job.cancel()
         self.destroy()
 
+
 class CellFrame(tk.Frame):
     def __init__(self, parent, index):
-        super().__init__(parent)
+        # Рамка постоянной толщины: подсветка движения меняет только цвет, без перекладки сетки
+        super().__init__(parent, highlightthickness=3)
         self.index = index
         self.cam = None
+        self.motion = False
+        self.stale_time = None  # время кадра из кэша, пока не пришёл живой кадр
+        self.idle_color = self.cget("background")
+        self.config(highlightbackground=self.idle_color)
         
         self.name_label = Label(self, text="", font=Font(family="Arial", size=11), height=1)
         self.name_label.pack(fill=tk.X)
@@ -139,7 +288,31 @@ class CellFrame(tk.Frame):
         
         self.update_display()
 
+    def set_motion(self, active):
+        if active != self.motion:
+            self.motion = active
+            self.config(highlightbackground="red" if active else self.idle_color)
+
+    def set_stale(self, frame_time):
+        """Отметка кадра из кэша с его возрастом в подписи; None — кадр живой"""
+        self.stale_time = frame_time
+        if not self.cam:
+            return
+        if frame_time is None:
+            self.name_label.config(text=self.cam["street"])
+            return
+        minutes = max(0, int(time.time() - frame_time) // 60)
+        if minutes < 60:
+            age = f"{minutes} мин"
+        elif minutes < 48 * 60:
+            age = f"{minutes // 60} ч"
+        else:
+            age = f"{minutes // (24 * 60)} дн"
+        self.name_label.config(text=f"{self.cam['street']} — кадр {age} назад")
+
     def update_display(self):
+        self.set_motion(False)
+        self.stale_time = None
         if not self.cam:
             self.name_label.config(text="")
             self.photo = self.winfo_toplevel().nocam_photo
@@ -166,151 +339,146 @@ def open_ufanet_map():
         
         
 # очистка конфига
+def new_group_name(names):
+    name = f"Новая группа {time.strftime('%Y-%m-%d')}"
+    suffix = 2
+    unique = name
+    while unique in names:
+        unique = f"{name} ({suffix})"
+        suffix += 1
+    names.add(unique)
+    return unique
+
+
 def clean_config_data(self):
-    try:
-        with open("config.json", "r", encoding="utf-8") as f:
-            config = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.info(f"[{time.strftime('%H:%M:%S')}] config.json not found or corrupted: {str(e)}. Creating default config.")
-        config = {"cams": [], "groups": [], "period": 1}
-    
-    # 1. Удаление дубликатов камер по ссылке
+    """Проверка и исправление конфигурации за один проход по камерам и группам.
+    Возвращает (config, отчёт); отчёт — списки исправлений по видам, файл
+    записывается только если что-то исправлено"""
+    config = self.config if self.config is not None else self.config_store.load({"cams": [], "groups": [], "period": 1})
+    report = {
+        "duplicate_cams": [],   # ссылки удалённых повторов камер
+        "invalid_links": [],    # (группа, ссылка) — ссылки на несуществующие камеры
+        "duplicate_links": [],  # (группа, ссылка) — камера уже есть в другой группе
+        "compacted_groups": [], # группы, где пустые ячейки перенесены в конец
+        "empty_groups": [],     # удалённые пустые группы
+        "lost_cams": [],        # (камера, группа) — камеры вне групп, добавленные в группы
+        "created_groups": [],
+        "current_group": None,  # группа, ставшая текущей
+    }
+
+    # Камеры: повторы по ссылке удаляются
     cams = config.get("cams", [])
-    seen_links = set()
+    cam_links = set()
     unique_cams = []
     for cam in cams:
         link = cam.get("link")
-        if link and link not in seen_links:
-            seen_links.add(link)
+        if link and link not in cam_links:
+            cam_links.add(link)
             unique_cams.append(cam)
         else:
+            report["duplicate_cams"].append(link)
             logger.info(f"[{time.strftime('%H:%M:%S')}] Removed duplicate camera with link: {link}")
-    config["cams"] = unique_cams
-    if len(unique_cams) < len(cams):
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Duplicates removed from cams list. Remaining: {len(unique_cams)}")
+    if report["duplicate_cams"]:
+        config["cams"] = unique_cams
 
-    # 2. Очистка групп от недействительных ссылок
-    existing_links = {cam["link"] for cam in config["cams"]}
+    # Группы: недействительные и повторные ссылки, упаковка сетки и пустые группы — за один проход
     groups = config.get("groups", [])
-    invalid_links_found = False
+    used_links = set()
+    kept_groups = []
+    counts = {}  # id(группы) -> занятых ячеек
+    current_group = None
     for group in groups:
-        grid = group.get("grid", [None] * 9)
-        new_grid = [link if link in existing_links or link is None else None for link in grid]
-        if new_grid != grid:
-            invalid_links_found = True
-            logger.info(f"[{time.strftime('%H:%M:%S')}] Removed invalid links from group '{group.get('name', 'Группа')}'")
-        group["grid"] = [x for x in new_grid if x is not None] + [None] * (9 - len([x for x in new_grid if x is not None]))
-    if invalid_links_found:
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Invalid links removed from groups.")
-
-    # 3. Удаление дубликатов ссылок по всем группам (глобально)
-    seen_links = set()
-    duplicates_found = False
-    for group in groups:
-        grid = group.get("grid", [None] * 9)
-        new_grid = []
-        for link in grid:
+        group_name = group.get("name", "Группа")
+        grid = group.get("grid")
+        links = []
+        fixed = False
+        for link in grid or []:
             if link is None:
-                new_grid.append(None)
-            elif link not in seen_links:
-                seen_links.add(link)
-                new_grid.append(link)
+                continue
+            if link not in cam_links:
+                report["invalid_links"].append((group_name, link))
+                logger.info(f"[{time.strftime('%H:%M:%S')}] Removed invalid link '{link}' from group '{group_name}'")
+                fixed = True
+            elif link in used_links:
+                report["duplicate_links"].append((group_name, link))
+                logger.info(f"[{time.strftime('%H:%M:%S')}] Removed duplicate link '{link}' from group '{group_name}'")
+                fixed = True
             else:
-                new_grid.append(None)
-                duplicates_found = True
-                logger.info(f"[{time.strftime('%H:%M:%S')}] Removed duplicate link '{link}' from group '{group.get('name', 'Группа')}'")
-        group["grid"] = [x for x in new_grid if x is not None] + [None] * (9 - len([x for x in new_grid if x is not None]))
-    if duplicates_found:
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Global duplicates removed from groups.")
-
-    # 4. Удаление пустых групп
-    initial_group_count = len(groups)
-    groups = [g for g in groups if any(link is not None for link in g["grid"])]
-    if len(groups) < initial_group_count:
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Removed {initial_group_count - len(groups)} empty groups.")
-        if not groups:
-            groups.append({"name": f"Новая группа {time.strftime('%Y-%m-%d')}", "grid": [None] * 9, "current": True})
+                used_links.add(link)
+                links.append(link)
+        new_grid = links + [None] * (9 - len(links))
+        if new_grid != grid:
+            group["grid"] = new_grid
+            if not fixed:
+                report["compacted_groups"].append(group_name)
+        if not links:
+            report["empty_groups"].append(group_name)
+            continue
+        kept_groups.append(group)
+        counts[id(group)] = len(links)
+        if current_group is None and group.get("current", False):
+            current_group = group
+    if report["empty_groups"]:
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Removed {len(report['empty_groups'])} empty groups.")
+    group_names = {g.get("name") for g in kept_groups}
+    if report["empty_groups"]:
+        if not kept_groups:
+            current_group = {"name": new_group_name(group_names), "grid": [None] * 9, "current": True}
+            kept_groups.append(current_group)
+            counts[id(current_group)] = 0
+            report["created_groups"].append(current_group["name"])
             logger.info(f"[{time.strftime('%H:%M:%S')}] Created new empty group as no groups remain.")
-        else:
-            current_group = next((g for g in groups if g.get("current", False)), None)
-            if not current_group:
-                groups[0]["current"] = True
-                logger.info(f"[{time.strftime('%H:%M:%S')}] Set first group as current after empty group removal.")
+        elif current_group is None:
+            current_group = kept_groups[0]
+            current_group["current"] = True
+            report["current_group"] = current_group["name"]
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Set first group as current after empty group removal.")
 
-    # 5. Добавление потерянных камер в группы
-    all_used_links = set()
-    for group in groups:
-        for link in group.get("grid", []):
-            if link:
-                all_used_links.add(link)
-    
-    lost_cams = [cam for cam in config["cams"] if cam["link"] not in all_used_links]
+    # Камеры вне групп: в свободные ячейки текущей группы, затем остальных, затем в новые группы
+    lost_cams = [cam for cam in unique_cams if cam["link"] not in used_links]
     if lost_cams:
         logger.info(f"[{time.strftime('%H:%M:%S')}] Found {len(lost_cams)} lost cameras. Adding to groups.")
+        targets = ([current_group] if current_group else []) + [g for g in kept_groups if g is not current_group]
+        position = 0
         for cam in lost_cams:
-            link = cam["link"]
-            added = False
-            added_group_name = None
-            current_group = next((g for g in groups if g.get("current", False)), None)
-            
-            if not groups:
-                new_group_name = f"Новая группа {time.strftime('%Y-%m-%d')}"
-                new_group = {
-                    "name": new_group_name,
-                    "grid": [link] + [None] * 8,
-                    "current": True
-                }
-                groups.append(new_group)
-                added = True
-                added_group_name = new_group_name
-                logger.info(f"[{time.strftime('%H:%M:%S')}] Created first group '{new_group_name}' for lost camera: {cam['street']}")
-            else:
-                if current_group:
-                    grid = current_group.get("grid", [None] * 9)
-                    if None in grid:
-                        free_index = grid.index(None)
-                        grid[free_index] = link
-                        current_group["grid"] = [x for x in grid if x is not None] + [None] * (9 - len([x for x in grid if x is not None]))
-                        added = True
-                        added_group_name = current_group["name"]
-                        logger.info(f"[{time.strftime('%H:%M:%S')}] Added lost camera '{cam['street']}' to current group '{added_group_name}'")
-                
-                if not added:
-                    for group in groups:
-                        if group == current_group:
-                            continue
-                        grid = group.get("grid", [None] * 9)
-                        if None in grid:
-                            free_index = grid.index(None)
-                            grid[free_index] = link
-                            group["grid"] = [x for x in grid if x is not None] + [None] * (9 - len([x for x in grid if x is not None]))
-                            added = True
-                            added_group_name = group["name"]
-                            logger.info(f"[{time.strftime('%H:%M:%S')}] Added lost camera '{cam['street']}' to group '{added_group_name}'")
-                            break
-                
-                if not added:
-                    new_group_name = f"Новая группа {time.strftime('%Y-%m-%d')}"
-                    new_group = {
-                        "name": new_group_name,
-                        "grid": [link] + [None] * 8,
-                        "current": False
-                    }
-                    groups.append(new_group)
-                    added = True
-                    added_group_name = new_group_name
-                    logger.info(f"[{time.strftime('%H:%M:%S')}] Created new group '{new_group_name}' for lost camera: {cam['street']}")
-    
-    config["groups"] = groups
-    # Сохранение очищенной конфигурации
-    try:
-        with open("config.json", "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Cleaned config saved to config.json.")
-    except Exception as e:
-        logger.error(f"[{time.strftime('%H:%M:%S')}] Error saving cleaned config: {str(e)}")
-    
-    return config
+            while position < len(targets) and counts[id(targets[position])] >= 9:
+                position += 1
+            if position == len(targets):
+                group = {"name": new_group_name(group_names), "grid": [None] * 9, "current": not kept_groups}
+                kept_groups.append(group)
+                targets.append(group)
+                counts[id(group)] = 0
+                report["created_groups"].append(group["name"])
+                logger.info(f"[{time.strftime('%H:%M:%S')}] Created new group '{group['name']}' for lost cameras")
+            group = targets[position]
+            group["grid"][counts[id(group)]] = cam["link"]
+            counts[id(group)] += 1
+            report["lost_cams"].append((cam["street"], group["name"]))
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Added lost camera '{cam['street']}' to group '{group['name']}'")
+    if report["empty_groups"] or report["created_groups"]:
+        # По числу групп не сравнить: единственная пустая группа заменяется новой
+        config["groups"] = kept_groups
+
+    # Файл записывается только при исправлениях
+    fixes = sum(len(v) for v in report.values() if isinstance(v, list)) + (report["current_group"] is not None)
+    if fixes:
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Config check: {fixes} fixes, saving.")
+        self.config_store.save(config)
+    else:
+        logger.info(f"[{time.strftime('%H:%M:%S')}] Config check: no changes.")
+    return config, report
+
+
+# проверка ссылки камеры по типу источника
+def check_cam_link(link, source):
+    if source == SOURCE_HTTP:
+        if not (link.startswith("http://") or link.startswith("https://")):
+            messagebox.showwarning("Ошибка", "Ссылка HTTP-камеры должна начинаться с 'http://' или 'https://'")
+            return False
+    elif not link.startswith("http://maps.ufanet.ru/"):
+        messagebox.showwarning("Ошибка", "Ссылка должна начинаться с 'http://maps.ufanet.ru/'")
+        return False
+    return True
 
 
 # упаковка грида
@@ -320,20 +488,15 @@ def compact_grid(self, grid):
 
 # сохранение грида
 def save_config(self):
-    current_group = next((g for g in self.groups if g.get("current", False)), None)
+    current_group = self.registry.current_group()
     if current_group:
         current_grid = [cell.cam["link"] if cell.cam else None for cell in self.cells]
         current_group["grid"] = compact_grid(self, current_grid)
     self.config["groups"] = self.groups
     self.config["cams"] = self.cams
     self.config["period"] = self.period // 1000
-    try:
-        with open("config.json", "w", encoding="utf-8") as f:
-            json.dump(self.config, f, ensure_ascii=False, indent=2)
-        logger.info(f"[{time.strftime('%H:%M:%S')}] Config saved to config.json.")
-    except Exception as e:
-        logger.error(f"[{time.strftime('%H:%M:%S')}] Error saving config: {str(e)}")
-        messagebox.showerror("Ошибка", "Не удалось сохранить конфигурацию")
+    # Запись отложенная и фоновая: серия перемещений в дереве даёт одну запись файла
+    self.config_store.save(self.config)
     
 # отрисовка формы
 def ui_main_render(self):
@@ -378,16 +541,17 @@ def ui_main_render(self):
     self.arrow_bottom_photo = ImageTk.PhotoImage(arrow_bottom_img)
     
     # Загрузка и очистка конфигурации
-    self.config = clean_config_data(self)
+    self.config, self.config_report = clean_config_data(self)
     self.cams = self.config.get("cams", [])
     self.groups = self.config.get("groups", [])
+    # Индексы камер, групп и элементов дерева (поиск без перебора списков)
+    self.registry = CameraRegistry(self.cams, self.groups)
     self.period = self.config.get("period", 1) * 1000
     if self.period not in [1000, 2000, 4000]:
         logger.warning(f"[{time.strftime('%H:%M:%S')}] Invalid period {self.period // 1000} sec in config. Setting to 1 sec.")
         self.period = 1000
     self.original_period = self.period
     self.selected_camera = None
-    self.drivers = []
     self.update_frames_id = None
     self.is_editing_structure = False
     self.tooltip = None
@@ -402,6 +566,8 @@ def ui_main_render(self):
     self.modal_name_label = None
     self.modal_image_label = None
     self.modal_photo = None
+    self.modal_replay_scale = None
+    self.modal_replay_offset = 0
     self.modal_image_size = None
     self.modal_cell_index = None
     self.original_pil_images = [None] * 9
@@ -412,10 +578,26 @@ def ui_main_render(self):
     left_frame = tk.Frame(self, width=300)
     left_frame.pack(side=tk.LEFT, fill=tk.Y)
     
+    # Поиск камеры по названию или ссылке
+    search_frame = tk.Frame(left_frame)
+    search_frame.pack(fill=tk.X, padx=3, pady=(3, 0))
+    Label(search_frame, text="Поиск:", font=Font(family="Arial", size=11)).pack(side=tk.LEFT)
+    self.search_var = tk.StringVar()
+    self.search_entry = Entry(search_frame, textvariable=self.search_var, font=Font(family="Arial", size=11))
+    self.search_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(5, 0))
+    self.search_entry.bind("<Return>", lambda event: self.on_search_select(None, first=True))
+    self.search_entry.bind("<Escape>", lambda event: self.search_var.set(""))
+    self.search_var.trace_add("write", lambda *args: self.on_search_changed())
+    # Список найденных камер показывается, пока строка поиска не пуста
+    self.search_results = tk.Listbox(left_frame, height=8, font=Font(family="Arial", size=10), exportselection=False)
+    self.search_results.bind("<<ListboxSelect>>", self.on_search_select)
+    self.search_found = []
+    
     self.tree = ttk.Treeview(left_frame, show="tree")
     self.tree.pack(expand=True, fill=tk.BOTH, padx=3, pady=3)
     self.update_camera_list()
     self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+    self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
     
     self.tree_buttons_frame = tk.Frame(left_frame)
     self.tree_buttons_frame.pack(fill=tk.X, padx=3, pady=3)
@@ -536,6 +718,15 @@ def ui_main_render(self):
     )
     self.open_map_button.pack(side=tk.LEFT, padx=5, pady=3)
     
+    self.export_button = Button(
+        controls_frame,
+        text="Экспорт",
+        font=Font(family="Arial", size=11),
+        command=lambda: ExportDialog(self, self.cams, self.selected_camera),
+        width=8
+    )
+    self.export_button.pack(side=tk.LEFT, padx=5, pady=3)
+    
     self.open_set_button = Button(
         controls_frame,
         text="Пароли",
@@ -609,27 +800,29 @@ def add_camera(self):
     if self.update_frames_id is None:
         self.update_frames_id = self.after(self.period, self.update_frames)
     if dialog.result:
-        street, link = dialog.result
-        if not link.startswith("http://maps.ufanet.ru/"):
-            messagebox.showwarning("Ошибка", "Ссылка должна начинаться с 'http://maps.ufanet.ru/'")
+        street, link, source, record = dialog.result
+        if not check_cam_link(link, source):
             return
         if not street or not link:
             messagebox.showwarning("Ошибка", "Название и ссылка не могут быть пустыми")
             return
-        if any(cam["link"] == link for cam in self.cams):
+        if self.registry.cam(link):
             messagebox.showwarning("Ошибка", "Камера с такой ссылкой уже существует")
             return
         # Проверка, не используется ли link в группах
-        for group in self.groups:
-            if link in group.get("grid", []):
-                messagebox.showwarning("Ошибка", f"Ссылка '{link}' уже используется в группе '{group['name']}'")
-                return
+        for group in self.registry.groups_with_link(link):
+            messagebox.showwarning("Ошибка", f"Ссылка '{link}' уже используется в группе '{group['name']}'")
+            return
         new_cam = {"street": street, "link": link}
+        if source != SOURCE_UFANET:
+            new_cam["source"] = source
+        if record:
+            new_cam["record"] = True
         self.cams.append(new_cam)
         added = False
         added_group_name = None
         is_current = False
-        current_group = next((g for g in self.groups if g.get("current", False)), None)
+        current_group = self.registry.current_group()
         if not self.groups:
             new_group_name = f"Новая группа {time.strftime('%Y-%m-%d')}"
             new_group = {
@@ -660,7 +853,7 @@ def add_camera(self):
                     if None in grid:
                         free_index = grid.index(None)
                         grid[free_index] = link
-                        group["grid"] = self.compact_grid(grid)
+                        group["grid"] = compact_grid(self, grid)
                         added = True
                         added_group_name = group["name"]
                         break
@@ -675,6 +868,7 @@ def add_camera(self):
                 added = True
                 added_group_name = new_group_name
         if added:
+            self.registry.reindex()
             if is_current:
                 current_grid = current_group.get("grid", [None] * 9)
                 for i in range(9):
@@ -686,8 +880,7 @@ def add_camera(self):
                 self.start_load_group_to_drivers()
             else:
                 if messagebox.askyesno("Информация", f"Камера добавлена в группу '{added_group_name}'. Хотите переключиться на эту группу?"):
-                    for group in self.groups:
-                        group["current"] = (group["name"] == added_group_name)
+                    self.registry.set_current(self.registry.group(added_group_name))
                     self.load_current_group_to_cells()
                     save_config(self)
                     self.update_camera_list()
@@ -704,50 +897,59 @@ def edit_camera(self):
     if self.update_frames_id:
         self.after_cancel(self.update_frames_id)
     self.set_frame_rate(5000)
-    dialog = CameraDialog(self, street=self.selected_camera["street"], link=self.selected_camera["link"], title="Изменить камеру")
+    dialog = CameraDialog(self, street=self.selected_camera["street"], link=self.selected_camera["link"], title="Изменить камеру", source=cam_source(self.selected_camera), record=self.selected_camera.get("record", False))
     dialog.wait_window()
     self.set_frame_rate(self.original_period)  # Восстанавливаем исходный period
     if self.update_frames_id is None:
         self.update_frames_id = self.after(self.period, self.update_frames)
     if dialog.result:
-        new_street, new_link = dialog.result
+        new_street, new_link, new_source, new_record = dialog.result
         if not new_street or not new_link:
             messagebox.showwarning("Ошибка", "Название и ссылка не могут быть пустыми")
             return
-        if any(cam["link"] == new_link and cam != self.selected_camera for cam in self.cams):
+        if not check_cam_link(new_link, new_source):
+            return
+        existing = self.registry.cam(new_link)
+        if existing is not None and existing is not self.selected_camera:
             messagebox.showwarning("Ошибка", "Камера с такой ссылкой уже существует")
             return
         # Проверка, не используется ли новый link в группах
-        for group in self.groups:
-            if new_link in group.get("grid", []) and new_link != self.selected_camera["link"]:
+        if new_link != self.selected_camera["link"]:
+            for group in self.registry.groups_with_link(new_link):
                 messagebox.showwarning("Ошибка", f"Ссылка '{new_link}' уже используется в группе '{group['name']}'")
                 return
         old_link = self.selected_camera["link"]
         self.selected_camera["street"] = new_street
         self.selected_camera["link"] = new_link
-        for group in self.groups:
+        if new_source == SOURCE_UFANET:
+            self.selected_camera.pop("source", None)
+        else:
+            self.selected_camera["source"] = new_source
+        if new_record:
+            self.selected_camera["record"] = True
+        else:
+            self.selected_camera.pop("record", None)
+        # Ссылка меняется только в группах, где камера используется
+        for group in self.registry.groups_with_link(old_link):
             grid = group.get("grid", [])
             for i in range(len(grid)):
                 if grid[i] == old_link:
                     grid[i] = new_link
             group["grid"] = compact_grid(self, grid)
+        self.registry.reindex()
         save_config(self)
         self.update_camera_list()
-        current_group = next((g for g in self.groups if g.get("current", False)), None)
+        current_group = self.registry.current_group()
         if current_group:
             current_grid = current_group.get("grid", [None] * 9)
+            changed = {}
             for i in range(9):
                 if i < len(current_grid) and current_grid[i] == new_link:
                     self.cells[i].cam = self.selected_camera
                     self.cells[i].update_display()
-                    driver = self.drivers[i]
-                    if driver:
-                        driver.get(new_link)
-                        driver.refresh()
-                        try:
-                            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ModalBodyPlayer")))
-                        except Exception as e:
-                            logger.error(f"[{time.strftime('%H:%M:%S')}] Error reloading driver for cell {i}: {str(e)}")
+                    changed[i] = self.selected_camera
+            if changed and self.capture_ready:
+                self.engine.reload_cells(changed)
                             
 # удаление камеры
 def delete_camera(self):
@@ -758,11 +960,11 @@ def delete_camera(self):
     if not messagebox.askyesno("Подтверждение", f"Удалить камеру '{cam_name}'?"):
         return
     logger.info(f"[{time.strftime('%H:%M:%S')}] Deleting camera '{cam_name}' with link '{link}'")
-    # Удаляем из cams
-    self.cams = [cam for cam in self.cams if cam["link"] != link]
-    # Удаляем из групп и проверяем на пустоту
+    # Удаляем из cams (список общий с реестром и конфигурацией — изменяется на месте)
+    self.cams[:] = [cam for cam in self.cams if cam["link"] != link]
+    # Удаляем из групп, где камера используется, и проверяем на пустоту
     groups_to_remove = []
-    for group in self.groups:
+    for group in list(self.registry.groups_with_link(link)):
         grid = group.get("grid", [])
         new_grid = [l for l in grid if l != link]
         group["grid"] = compact_grid(self, new_grid)
@@ -770,10 +972,11 @@ def delete_camera(self):
         if all(g is None for g in group["grid"]) and len(self.groups) > 1:
             groups_to_remove.append(group)
     if groups_to_remove:
-        self.groups = [g for g in self.groups if g not in groups_to_remove]
+        self.groups[:] = [g for g in self.groups if not any(g is r for r in groups_to_remove)]
         logger.info(f"[{time.strftime('%H:%M:%S')}] Removed {len(groups_to_remove)} empty groups after camera deletion")
     elif len(self.groups) == 1 and all(g is None for g in self.groups[0]["grid"]):
         logger.info(f"[{time.strftime('%H:%M:%S')}] Last group '{self.groups[0]['name']}' kept empty after camera deletion")
+    self.registry.reindex()
     self.selected_camera = None
     self.edit_camera_button.config(state=tk.DISABLED)
     self.delete_camera_button.config(state=tk.DISABLED)
@@ -787,14 +990,14 @@ def edit_group(self):
     if self.update_frames_id:
         self.after_cancel(self.update_frames_id)
     self.set_frame_rate(5000)
-    dialog = CameraDialog(self, street=next((g for g in self.groups if g.get("current", False)), {}).get("name", ""), title="Изменить группу", is_group=True)
+    dialog = CameraDialog(self, street=(self.registry.current_group() or {}).get("name", ""), title="Изменить группу", is_group=True)
     dialog.wait_window()
     self.set_frame_rate(self.original_period)  # Восстанавливаем исходный period
     if self.update_frames_id is None:
         self.update_frames_id = self.after(self.period, self.update_frames)
     if dialog.result:
-        new_name, _ = dialog.result
-        current_group = next((g for g in self.groups if g.get("current", False)), None)
+        new_name = dialog.result[0]
+        current_group = self.registry.current_group()
         if not current_group:
             messagebox.showwarning("Ошибка", "Нет текущей группы для редактирования")
             return
@@ -803,9 +1006,11 @@ def edit_group(self):
         if not new_name:
             messagebox.showwarning("Ошибка", "Название группы не может быть пустым")
             return
-        if any(group["name"] == new_name for group in self.groups if group != current_group):
+        other = self.registry.group(new_name)
+        if other is not None and other is not current_group:
             messagebox.showwarning("Ошибка", "Группа с таким названием уже существует")
             return
         current_group["name"] = new_name
+        self.registry.reindex()
         save_config(self)
         self.update_camera_list()
\ No newline at end of file
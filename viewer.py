@@ -0,0 +1,133 @@
+import io
+import json
+import logging
+import threading
+import time
+import urllib.request
+import tkinter as tk
+from PIL import Image, ImageTk
+
+from ui_components import CellFrame, resource_path
+from http_source import HttpSourceManager
+from instance_lock import connect_host
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+GRID_REFRESH_MS = 3000  # опрос состава сетки работающего движка
+GRID_POLL_MS = 100      # проверка ответа на запрос состава сетки
+
+
+class ViewerApp(tk.Tk):
+    """Второе окно программы (например, на втором мониторе): кадры работающего движка
+    по локальному HTTP, без своих браузеров и захвата; двойной щелчок разворачивает ячейку"""
+
+    def __init__(self, host, port, period_ms=1000):
+        super().__init__()
+        self.base_url = f"http://{connect_host(host)}:{port}"
+        self.period = period_ms
+        self.title("Видеонаблюдение — просмотр")
+        try:
+            self.iconbitmap(resource_path("resource/eye.ico"))
+        except tk.TclError:
+            pass
+        screen_width = self.winfo_screenwidth()
+        screen_height = self.winfo_screenheight() - 50
+        self.geometry(f"{screen_width - 10}x{screen_height - 15}+0+0")
+        self.cell_width = (screen_width - 10) // 3
+        self.cell_height = (screen_height - 15) // 3
+        self.original_nocam_image = Image.open(resource_path("resource/nocam.png"))
+        self.original_noconnect_image = Image.open(resource_path("resource/noconnect.png"))
+        self.nocam_photo = ImageTk.PhotoImage(self.original_nocam_image.resize((self.cell_width, self.cell_height), Image.LANCZOS))
+        self.noconnect_photo = ImageTk.PhotoImage(self.original_noconnect_image.resize((self.cell_width, self.cell_height), Image.LANCZOS))
+
+        self.camera_frame = tk.Frame(self)
+        self.camera_frame.pack(expand=True, fill=tk.BOTH)
+        self.cells = []
+        for i in range(3):
+            for j in range(3):
+                cell = CellFrame(self.camera_frame, i * 3 + j)
+                cell.grid(row=i, column=j, sticky="nsew")
+                self.cells.append(cell)
+                self.camera_frame.rowconfigure(i, weight=1)
+                self.camera_frame.columnconfigure(j, weight=1)
+        self.expanded_index = None
+        self.stream_urls = [None] * 9
+        self.frame_times = [None] * 9
+        # Потоки MJPEG движка читаются тем же клиентом, что и HTTP-камеры
+        self.sources = HttpSourceManager(interval=1.0)
+
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh_grid()
+        self.update_frames()
+
+    def on_cell_click(self, cell_index):
+        pass
+
+    def open_modal(self, cell_index):
+        # Развернуть ячейку на всё окно или вернуть сетку
+        if self.expanded_index is None:
+            self.expanded_index = cell_index
+            for cell in self.cells:
+                if cell.index != cell_index:
+                    cell.grid_remove()
+            self.cells[cell_index].grid(row=0, column=0, rowspan=3, columnspan=3, sticky="nsew")
+        else:
+            self.expanded_index = None
+            for cell in self.cells:
+                cell.grid(row=cell.index // 3, column=cell.index % 3, rowspan=1, columnspan=1, sticky="nsew")
+        self.frame_times = [None] * 9
+
+    def refresh_grid(self):
+        # Запрос — в фоновом потоке: движок на экране входа принимает соединения, но не отвечает
+        self.grid_reply = None
+        thread = threading.Thread(target=self._fetch_grid, daemon=True)
+        thread.start()
+        self._poll_grid(thread)
+
+    def _fetch_grid(self):
+        try:
+            with urllib.request.urlopen(self.base_url + "/grid", timeout=2) as response:
+                self.grid_reply = json.loads(response.read().decode("utf-8"))
+        except (OSError, ValueError) as e:
+            # Движок ещё на экране входа или остановлен — повторим позже
+            logger.info(f"[{time.strftime('%H:%M:%S')}] Engine grid not available: {str(e)}")
+
+    def _poll_grid(self, thread):
+        if thread.is_alive():
+            self.after(GRID_POLL_MS, self._poll_grid, thread)
+            return
+        grid = self.grid_reply
+        if grid is not None:
+            for cell, entry in zip(self.cells, grid):
+                cam = {"street": entry["street"], "link": entry["link"]} if entry else None
+                if cam != cell.cam:
+                    cell.cam = cam
+                    cell.update_display()
+                    self.frame_times[cell.index] = None
+                self.stream_urls[cell.index] = self.base_url + entry["stream"] if entry else None
+            self.sources.sync(self.stream_urls)
+        self.after(GRID_REFRESH_MS, self.refresh_grid)
+
+    def update_frames(self):
+        for cell in self.cells:
+            url = self.stream_urls[cell.index]
+            if not url:
+                continue
+            frame_bytes, frame_time = self.sources.latest(url)
+            if not frame_bytes or frame_time == self.frame_times[cell.index]:
+                continue
+            self.frame_times[cell.index] = frame_time
+            try:
+                pil_image = Image.open(io.BytesIO(frame_bytes))
+                width = max(cell.image_label.winfo_width(), 1)
+                height = max(cell.image_label.winfo_height(), 1)
+                cell.photo = ImageTk.PhotoImage(pil_image.resize((width, height), Image.LANCZOS))
+                cell.image_label.config(image=cell.photo)
+            except Exception as e:
+                logger.error(f"[{time.strftime('%H:%M:%S')}] Error showing engine frame for cell {cell.index}: {str(e)}")
+        self.after(self.period, self.update_frames)
+
+    def on_close(self):
+        self.sources.stop_all()
+        self.destroy()